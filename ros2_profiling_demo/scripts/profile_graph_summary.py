@@ -1,38 +1,21 @@
 #!/usr/bin/env python3
 
 import argparse
-import sys
 
-from ros2profile.api.process import load_mcap_data, load_event_graph
-
-
-def summarize(graph):
-    for node in graph.nodes():
-        print(f'Node: {node.name()}')
-        if node.publishers():
-            print(f'  Publishers: ')
-            for publisher in node.publishers():
-                print(f'    Topic: {publisher.topic_name()}')
-                print(f'      Events: {len(publisher.events())}')
-        if node.subscriptions():
-            print(f'  Subscriptions: ')
-            for subscription in node.subscriptions():
-                print(f'    Topic: {subscription.topic_name()}')
-                print(f'      Callback: {subscription.callback().symbol()}')
-        if node.timers():
-            print(f'  Timers: ')
-            for timer in node.timers():
-                print(f'    Period: {timer.period()}')
-                print(f'      Callback: {timer.callback().symbol()}')
-                print(f'      Events: {len(timer.callback().events())}')
+from ros2profile.api.summary import format_summary, summarize, summary_to_json
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("profile", type=str, help="Profile directory")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
     args = parser.parse_args()
-    graph = load_event_graph(args.profile)
-    summarize(graph)
+    summary = summarize(args.profile)
+    if args.json:
+        print(summary_to_json(summary))
+    else:
+        print('\n'.join(format_summary(summary)))
+
 
 if __name__ == '__main__':
     main()
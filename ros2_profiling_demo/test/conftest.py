@@ -1,6 +1,125 @@
+from collections import defaultdict
+
 import pytest
 
 from ros2profile.api.process import load_mcap_data, load_event_graph
+from ros2profile.data import build_graph
+
+PERIOD = 10_000_000
+
+
+def trace_events(periods=5):
+    """
+    Build raw trace events of a timer in node A publishing /a to a subscriber in node B.
+
+    Node B also has a callback without a timer or subscription, whose events
+    are never triggered.  The timer thread 101 runs on CPU 0 and is preempted
+    for 10 us by thread 300 in each period, the subscriber thread 201 runs on
+    CPU 1 and waits 3 us on the run queue after each wakeup.  The timer
+    callback allocates and frees memory through the libc wrapper, and waits
+    5 us for a mutex held by thread 102 outside of any callback.
+    """
+    events = defaultdict(list)
+
+    def event(name, time, **fields):
+        events[name].append({'_name': name, '_timestamp': time, **fields})
+
+    event('ros2:rcl_init', 0, context_handle=1, version='4.0.0', vpid=100)
+    event('ros2:rcl_node_init', 1, node_handle=11, node_name='A', namespace='/',
+          rmw_handle=1011, vpid=100)
+    event('ros2:rcl_node_init', 1, node_handle=12, node_name='B', namespace='/',
+          rmw_handle=1012, vpid=200)
+    for (callback, symbol) in ((21, 'void timer_a()'), (22, 'void sub_b()'),
+                               (23, 'void service_b()')):
+        event('ros2:rclcpp_callback_register', 2, callback=callback, symbol=symbol)
+
+    event('ros2:rcl_publisher_init', 3, publisher_handle=31, node_handle=11,
+          rmw_publisher_handle=41, topic_name='/a', queue_depth=10)
+    event('ros2:rmw_publisher_init', 3, rmw_publisher_handle=41, gid=[31] * 16)
+    event('ros2:rcl_subscription_init', 4, subscription_handle=61, node_handle=12,
+          rmw_subscription_handle=71, topic_name='/a', queue_depth=5)
+    event('ros2:rclcpp_subscription_init', 4, subscription_handle=61, subscription=81)
+    event('ros2:rclcpp_subscription_callback_added', 4, subscription=81, callback=22)
+    event('ros2:rmw_subscription_init', 4, rmw_subscription_handle=71, gid=[61] * 16)
+    event('ros2:rclcpp_timer_link_node', 5, timer_handle=91, node_handle=11)
+    event('ros2:rcl_timer_init', 5, timer_handle=91, period=PERIOD)
+    event('ros2:rclcpp_timer_callback_added', 5, timer_handle=91, callback=21)
+
+    def callback(handle, start, end, vtid, vpid, cpu):
+        event('ros2:callback_start', start, callback=handle, is_intra_process=False,
+              vtid=vtid, vpid=vpid, cpu_id=cpu)
+        event('ros2:callback_end', end, callback=handle, vtid=vtid, vpid=vpid, cpu_id=cpu)
+
+    def switch(time, cpu, prev_tid, prev_state, next_tid):
+        event('sched_switch', time, cpu_id=cpu, prev_tid=prev_tid, prev_state=prev_state,
+              next_tid=next_tid)
+
+    def wakeup(time, tid, cpu):
+        event('sched_wakeup', time, tid=tid, target_cpu=cpu)
+
+    def memory(period, start, vtid, vpid):
+        # 496 bytes allocated, then 132 bytes freed plus the 64 bytes of the
+        # previous period's aligned block, which is unknown in the first period
+        ids = {'vtid': vtid, 'vpid': vpid}
+        (block, array, aligned) = (0x10000 + period, 0x20000 + period, 0xffff800000000000 + period)
+        event('lttng_ust_libc:malloc', start + 1000, ptr=block, size=100, **ids)
+        event('lttng_ust_libc:calloc', start + 2000, ptr=array, nmemb=4, size=8, **ids)
+        event('lttng_ust_libc:realloc', start + 3000, in_ptr=block, ptr=block, size=300, **ids)
+        event('lttng_ust_libc:posix_memalign', start + 4000, out_ptr=aligned, alignment=64,
+              size=64, result=0, **ids)
+        event('lttng_ust_libc:posix_memalign', start + 5000, out_ptr=0x40000, alignment=64,
+              size=64, result=12, **ids)
+        event('lttng_ust_libc:free', start + 6000, ptr=array, **ids)
+        event('lttng_ust_libc:free', start + 7000, ptr=aligned - 1, **ids)
+        # Released outside of any callback
+        event('lttng_ust_libc:free', start + 300_000, ptr=block, **ids)
+
+    def locks(start, vtid, holder_tid, vpid):
+        mutex = 0x5000
+        for (time, name, tid, fields) in (
+            (8000, 'lock_req', holder_tid, {}),
+            (8000, 'lock_acq', holder_tid, {'status': 0}),
+            (10_000, 'lock_req', vtid, {}),
+            (15_000, 'unlock', holder_tid, {}),
+            (15_000, 'lock_acq', vtid, {'status': 0}),
+            (18_000, 'unlock', vtid, {}),
+            (100_000, 'trylock', vtid, {'status': 0}),
+            (101_000, 'unlock', vtid, {}),
+            # EBUSY, the lock is not taken
+            (110_000, 'trylock', vtid, {'status': 16}),
+        ):
+            event('lttng_ust_pthread:pthread_mutex_' + name, start + time, mutex=mutex,
+                  vtid=tid, vpid=vpid, **fields)
+
+    for period in range(1, periods + 1):
+        start = period * PERIOD
+        callback(21, start, start + 200_000, 101, 100, 0)
+        wakeup(start - 5000, 101, 0)
+        switch(start - 2000, 0, 0, 0, 101)
+        # Preempted with the TASK_REPORT_MAX bit set, as reported by lttng-modules
+        switch(start + 20_000, 0, 101, 0x100, 300)
+        switch(start + 30_000, 0, 300, 1, 101)
+        switch(start + 201_000, 0, 101, 1, 0)
+        memory(period, start, 101, 100)
+        locks(start, 101, 102, 100)
+        message = 1000 + period
+        publish = start + 50_000
+        event('ros2:rclcpp_publish', publish, message=message, publisher_handle=31)
+        event('ros2:rcl_publish', publish + 1000, message=message, publisher_handle=31)
+        event('ros2:rmw_publish', publish + 2000, message=message, publisher_handle=41,
+              timestamp=publish + 2000)
+        take = publish + 100_000 * period
+        event('ros2:rmw_take', take, message=message, rmw_subscription_handle=71,
+              source_timestamp=publish + 2000, taken=True)
+        event('ros2:rcl_take', take + 1000, message=message)
+        event('ros2:rclcpp_take', take + 2000, message=message)
+        callback(22, take + 10_000, take + 310_000, 201, 200, 1)
+        callback(23, take + 400_000, take + 450_000, 201, 200, 1)
+        for (woken, done) in ((take - 5000, take + 311_000), (take + 395_000, take + 451_000)):
+            wakeup(woken, 201, 1)
+            switch(woken + 3000, 1, 0, 0, 201)
+            switch(done, 1, 201, 1, 0)
+    return events
 
 
 def pytest_addoption(parser):
@@ -27,3 +146,13 @@ def profile_event_graph(request):
     if input_dir is None:
         pytest.skip()
     return load_event_graph(input_dir)
+
+
+@pytest.fixture
+def synthetic_events():
+    return trace_events()
+
+
+@pytest.fixture
+def synthetic_graph(synthetic_events):
+    return build_graph(synthetic_events)
@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ros2profile.api.align import sample_times
+from ros2profile.api.process import RecordingData
+
+
+def test_sample_times():
+    frame = pd.DataFrame({
+        '_log_time': pd.to_datetime(['2023-03-26 01:30', '2023-03-26 03:30']),
+        '_log_time_ns': [1, 2],
+    })
+    assert sample_times(frame).tolist() == [1, 2]
+
+    # Without integer log times the local datetimes need their timezone
+    frame = frame.drop(columns=['_log_time_ns'])
+    with pytest.raises(ValueError):
+        sample_times(frame)
+
+    # Both sides of the daylight saving change, an hour apart in UTC
+    times = sample_times(frame, 'Europe/Berlin')
+    assert np.diff(times).tolist() == [3600 * 10**9]
+    assert times[0] == pd.Timestamp('2023-03-26 00:30', tz='UTC').value
+
+
+def test_projection_keeps_log_times(tmp_path):
+    pytest.importorskip('pyarrow')
+    base = str(tmp_path / 'topnode')
+    os.makedirs(base + '.converted')
+    pd.DataFrame({
+        '_log_time': pd.to_datetime(['2023-01-01 00:00']),
+        '_log_time_ns': [1672531200 * 10**9],
+        'pid': [10],
+        'cpu_percent': [1.5],
+    }).to_parquet(os.path.join(base + '.converted', 'cpu_memory_usage.parquet'))
+
+    recording = RecordingData(base, columns=['cpu_percent'])
+    frame = recording['cpu_memory_usage']
+    assert frame.columns.tolist() == ['_log_time', '_log_time_ns', 'cpu_percent']
@@ -0,0 +1,26 @@
+from ros2profile.api.catalog import Catalog, summarize_graph, update_catalog
+from ros2profile.data import build_graph
+
+
+def test_summarize_incomplete_timer(synthetic_events):
+    events = synthetic_events
+    # A timer whose callback registration was not traced
+    events['ros2:rclcpp_timer_link_node'].append(
+        {'_name': 'ros2:rclcpp_timer_link_node', '_timestamp': 6, 'timer_handle': 92,
+         'node_handle': 11})
+    events['ros2:rcl_timer_init'].append(
+        {'_name': 'ros2:rcl_timer_init', '_timestamp': 6, 'timer_handle': 92,
+         'period': 1000})
+    graph = build_graph(events)
+    assert len(graph.timers()) == 2
+
+    metrics = summarize_graph(graph)
+    timers = {entity for (kind, entity, _, _) in metrics if kind == 'timer'}
+    assert timers == {'A timer void timer_a()'}
+
+
+def test_update_catalog(synthetic_graph, tmp_path):
+    catalog_path = str(tmp_path / 'catalog.db')
+    update_catalog(str(tmp_path), synthetic_graph, catalog_path)
+    with Catalog(catalog_path) as catalog:
+        assert len(catalog.runs()) == 1
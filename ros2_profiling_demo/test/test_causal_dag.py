@@ -0,0 +1,84 @@
+from ros2profile.data import build_graph
+from ros2profile.data.causal_dag import CausalDag
+
+from conftest import PERIOD
+
+
+def test_untriggered_event(synthetic_graph):
+    dag = CausalDag(synthetic_graph)
+    service = synthetic_graph.callback_by_handle(23)
+    for event in service.events():
+        assert event.trigger is None
+        assert dag.parents(event) == []
+
+
+def test_triggered_event(synthetic_graph):
+    dag = CausalDag(synthetic_graph)
+    subscriber = synthetic_graph.callback_by_handle(22)
+    for event in subscriber.events():
+        edges = dag.parents(event)
+        assert edges[0].is_trigger
+        assert edges[0].parent is event.trigger
+
+
+def add_fused_input(events):
+    """
+    Add a second subscription to node A, whose callback runs on thread 102.
+
+    In each period it runs once well before the timer callback and once while
+    the timer callback runs, before the publication.
+    """
+    def event(name, time, **fields):
+        events[name].append({'_name': name, '_timestamp': time, **fields})
+
+    event('ros2:rclcpp_callback_register', 2, callback=24, symbol='void sub_a()')
+    event('ros2:rcl_subscription_init', 4, subscription_handle=62, node_handle=11,
+          rmw_subscription_handle=72, topic_name='/b', queue_depth=5)
+    event('ros2:rclcpp_subscription_init', 4, subscription_handle=62, subscription=82)
+    event('ros2:rclcpp_subscription_callback_added', 4, subscription=82, callback=24)
+    event('ros2:rmw_subscription_init', 4, rmw_subscription_handle=72, gid=[62] * 16)
+    for period in range(1, 6):
+        start = period * PERIOD
+        for (begin, end) in ((start - 3_000_000, start - 2_900_000),
+                             (start + 10_000, start + 40_000)):
+            event('ros2:callback_start', begin, callback=24, is_intra_process=False,
+                  vtid=102, vpid=100, cpu_id=1)
+            event('ros2:callback_end', end, callback=24, vtid=102, vpid=100, cpu_id=1)
+    return events
+
+
+def test_fan_in_is_opt_in(synthetic_events):
+    graph = build_graph(add_fused_input(synthetic_events))
+    dag = CausalDag(graph)
+    for publish in graph.publishers[0].events:
+        assert [edge.is_trigger for edge in dag.parents(publish)] == [True]
+
+
+def test_fan_in(synthetic_events):
+    graph = build_graph(add_fused_input(synthetic_events))
+    dag = CausalDag(graph, fan_in=True)
+
+    for (period, publish) in enumerate(graph.publishers[0].events, start=1):
+        start = period * PERIOD
+        edges = dag.parents(publish)
+        assert len(edges) == 2
+        (trigger, fused) = edges
+        assert trigger.is_trigger and trigger.parent.callback_handle == 21
+        # The input running alongside the timer callback can not have fed it
+        assert not fused.is_trigger
+        assert fused.parent.callback_handle == 24
+        assert fused.parent.start() == start - 3_000_000
+
+        assert dag.worst_case_input(publish) is fused
+        assert dag.freshest_input(publish) is trigger
+        assert dag.origin(publish) == start - 3_000_000
+
+
+def test_data_age(synthetic_events):
+    graph = build_graph(add_fused_input(synthetic_events))
+    subscriber = graph.callback_by_handle(22)
+    plain = CausalDag(graph)
+    fused = CausalDag(graph, fan_in=True)
+    for (period, event) in enumerate(subscriber.events(), start=1):
+        assert plain.data_age(event) == 360_000 + 100_000 * period
+        assert fused.data_age(event) == 3_360_000 + 100_000 * period
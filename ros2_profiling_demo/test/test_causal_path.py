@@ -0,0 +1,46 @@
+import pickle
+
+from ros2profile.data.causal_path import discover_paths
+
+
+def test_discover_paths(synthetic_graph):
+    paths = discover_paths(synthetic_graph)
+    assert len(paths) == 1
+
+    path = paths[0]
+    assert path.signature == ('A', '/a', 'B')
+    assert [callback.handle for callback in path.callbacks] == [21, 22]
+    assert path.topics == ['/a']
+
+
+def test_path_instances(synthetic_graph):
+    path = synthetic_graph.paths()[0]
+    assert len(path.instances) == 5
+
+    for instance in path.instances:
+        assert path._match(instance[-1]) == instance
+        assert instance[0].callback_handle == 21
+        assert instance[-1].callback_handle == 22
+
+    # The subscriber takes each message 100 us later than the previous one
+    expected = [360_000 + 100_000 * period for period in range(1, 6)]
+    assert path.latencies.tolist() == expected
+    assert path.latency_histogram.count == 5
+
+
+def test_match_rejects_other_callbacks(synthetic_graph):
+    path = synthetic_graph.paths()[0]
+    service = synthetic_graph.callback_by_handle(23)
+    assert all(path._match(event) is None for event in service.events())
+
+
+def test_paths_of_unpickled_graph(synthetic_graph):
+    # Graphs pickled before paths were cached come without the cache attribute
+    state = dict(synthetic_graph.__dict__)
+    del state['_paths']
+    del state['_thread_schedules']
+    restored = pickle.loads(pickle.dumps(synthetic_graph))
+    restored.__dict__.clear()
+    restored.__setstate__(state)
+    assert len(restored.paths()) == 1
+    assert restored.thread_schedules() == []
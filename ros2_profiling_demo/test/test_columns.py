@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from ros2profile.data.convert.mcap import ColumnTable, MessageFlattener
+
+
+def test_typed_columns():
+    table = ColumnTable(['count', 'load', 'valid', 'name'])
+    table.extend([(1, 0.5, True, 'a'), (2, 1.5, False, 'b')])
+    columns = table.columns()
+
+    assert len(table) == 2
+    assert columns['count'].dtype == np.int64
+    assert columns['load'].dtype == np.float64
+    assert columns['valid'].dtype == np.bool_
+    assert columns['name'].dtype == object
+    assert columns['count'].tolist() == [1, 2]
+    assert columns['name'].tolist() == ['a', 'b']
+
+
+def test_promote_int_to_float():
+    table = ColumnTable(['value', 'other'])
+    table.extend([(1, 10), (2.5, 20)])
+    columns = table.columns()
+    assert columns['value'].dtype == np.float64
+    assert columns['value'].tolist() == [1.0, 2.5]
+    assert columns['other'].dtype == np.int64
+
+    # Float columns accept integers as they are
+    table = ColumnTable(['value'])
+    table.extend([(1.5,), (2,)])
+    assert table.columns()['value'].dtype == np.float64
+
+
+def test_promote_to_object():
+    table = ColumnTable(['value', 'big', 'maybe'])
+    table.extend([(1, 1, 1), ('two', 2**70, None), (3, 3, 3)])
+    columns = table.columns()
+    for field in ('value', 'big', 'maybe'):
+        assert columns[field].dtype == object
+    assert columns['value'].tolist() == [1, 'two', 3]
+    assert columns['big'].tolist() == [1, 2**70, 3]
+    assert columns['maybe'].tolist() == [1, None, 3]
+
+
+def test_partial_row_promotion():
+    # Columns before the failing value already hold the row and are not appended twice
+    table = ColumnTable(['first', 'second', 'third'])
+    table.extend([(1, 2, 3), (4, 'five', 6.5)])
+    columns = table.columns()
+    assert len(table) == 2
+    assert columns['first'].tolist() == [1, 4]
+    assert columns['second'].tolist() == [2, 'five']
+    assert columns['third'].tolist() == [3.0, 6.5]
+    assert columns['third'].dtype == np.float64
+
+
+def test_empty_table():
+    table = ColumnTable(['a', 'b'])
+    assert len(table) == 0
+    assert table.to_frame().columns.tolist() == ['a', 'b']
+
+
+def test_flattener():
+    flattener = MessageFlattener()
+    flattener.register_schema('pkg/msg/Usage', {'cpu.percent': 'cpu_percent'})
+    assert flattener.schemas() == ['pkg/msg/Usage']
+
+    msg = SimpleNamespace(
+        log_time=1, log_time_ns=1000,
+        ros_msg=SimpleNamespace(pid=5, cpu=SimpleNamespace(percent=12.5, cores=[1, 2])))
+    (fields, extractor) = flattener.extractor('pkg/msg/Usage', msg)
+    assert fields == ('_log_time', '_log_time_ns', 'pid', 'cpu_percent', 'cpu_cores')
+    assert extractor(msg) == (1, 1000, 5, 12.5, [1, 2])
+
+
+def test_flattener_log_time_only():
+    flattener = MessageFlattener()
+    flattener.register_schema('pkg/msg/Empty')
+    msg = SimpleNamespace(log_time=7, ros_msg=SimpleNamespace())
+    (fields, extractor) = flattener.extractor('pkg/msg/Empty', msg)
+    assert fields == ('_log_time',)
+    assert extractor(msg) == (7,)
+
+
+def test_flattener_unregistered_schema():
+    # Schemas without overrides are flattened with their default column names
+    flattener = MessageFlattener()
+    msg = SimpleNamespace(
+        log_time=3, log_time_ns=3000,
+        ros_msg=SimpleNamespace(header=SimpleNamespace(frame_id='map'), range=2.5))
+    (fields, extractor) = flattener.extractor('pkg/msg/Range', msg)
+    assert fields == ('_log_time', '_log_time_ns', 'header_frame_id', 'range')
+    assert extractor(msg) == (3, 3000, 'map', 2.5)
@@ -0,0 +1,47 @@
+import numpy as np
+
+from ros2profile.api.critical_path import (
+    EXECUTION, QUEUEING, SCHEDULER_WAIT, TRANSPORT, analyze_path, format_report)
+
+
+def test_segments_add_up(synthetic_graph):
+    path = synthetic_graph.paths()[0]
+    report = analyze_path(synthetic_graph, path)
+    assert [segment.kind for segment in report.segments] == [
+        'callback', 'transport', 'queueing', 'callback']
+
+    total = np.add.reduce([segment.total() for segment in report.segments])
+    assert total.tolist() == path.latencies.tolist()
+    by_category = report.by_category()
+    assert np.add.reduce(list(by_category.values())).tolist() == path.latencies.tolist()
+
+
+def test_categories(synthetic_graph):
+    report = analyze_path(synthetic_graph, synthetic_graph.paths()[0])
+    periods = np.arange(1, 6)
+    (timer, transport, queueing, subscriber) = report.segments
+
+    # The timer callback publishes 52 us after its start and is preempted for 10 us
+    assert timer.components[EXECUTION].tolist() == [42_000] * 5
+    assert timer.components[SCHEDULER_WAIT].tolist() == [10_000] * 5
+
+    # The subscriber thread waits 3 us on the run queue before taking the message
+    assert transport.components[SCHEDULER_WAIT].tolist() == [3000] * 5
+    assert transport.components[TRANSPORT].tolist() == (100_000 * periods - 5000).tolist()
+    assert queueing.components[QUEUEING].tolist() == [10_000] * 5
+    assert subscriber.components[EXECUTION].tolist() == [300_000] * 5
+    assert subscriber.components[SCHEDULER_WAIT].tolist() == [0] * 5
+
+    by_category = report.by_category()
+    assert by_category[EXECUTION].tolist() == [342_000] * 5
+    assert by_category[SCHEDULER_WAIT].tolist() == [13_000] * 5
+    assert report.dominant_segment() is subscriber
+    assert report.by_process() == {100: 5 * 52_000, 200: 3_040_000}
+
+
+def test_percentile_and_format(synthetic_graph):
+    report = analyze_path(synthetic_graph, synthetic_graph.paths()[0], percentile=80)
+    assert report.latencies.tolist() == [860_000]
+    rows = dict(format_report(report))
+    assert rows['instances'] == '1'
+    assert rows[TRANSPORT] == '0.495 ms (57.6%)'
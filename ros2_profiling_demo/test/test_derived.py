@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ros2profile.api.derived import (
+    cpu_rates, derive_metrics, io_rates, linear_slope, load_derived, save_derived)
+
+SECOND = 10**9
+# The fourth sample repeats the third one's time, the last one follows a counter reset
+TIMES = [0, SECOND, 2 * SECOND, 2 * SECOND, 3 * SECOND]
+
+
+def cpu_memory_frame():
+    return pd.DataFrame({
+        '_log_time': pd.to_datetime(TIMES),
+        '_log_time_ns': TIMES,
+        'elapsed_time': [0, 100, 200, 200, 300],
+        'user_mode_time': [0, 50, 100, 100, 90],
+        'kernel_model_time': [0, 10, 20, 20, 30],
+        'max_resident_set_size': [100, 110, 120, 120, 130],
+    })
+
+
+def io_stats_frame():
+    return pd.DataFrame({
+        '_log_time': pd.to_datetime(TIMES),
+        '_log_time_ns': TIMES,
+        'bytes_read': [0, 1000, 3000, 3000, 500],
+    })
+
+
+def test_cpu_rates():
+    cpu = cpu_rates(cpu_memory_frame())
+    assert cpu['interval'].tolist() == [SECOND, SECOND, 0, SECOND]
+    # No elapsed time in the third interval, a reset of the user time in the last one
+    assert np.allclose(cpu['user_utilization'], [0.5, 0.5, np.nan, np.nan], equal_nan=True)
+    assert np.allclose(cpu['kernel_utilization'], [0.1, 0.1, np.nan, 0.1], equal_nan=True)
+    assert np.allclose(cpu['cpu_utilization'], [0.6, 0.6, np.nan, np.nan], equal_nan=True)
+
+
+def test_io_rates():
+    io = io_rates(io_stats_frame())
+    assert np.allclose(io['read_bytes_per_s'], [1000, 2000, np.nan, np.nan], equal_nan=True)
+    # Counters the topic does not have are left out
+    assert 'write_bytes_per_s' not in io
+
+
+def test_linear_slope():
+    times = np.array([0, 1, 2, 3]) * SECOND
+    assert linear_slope(times, np.array([10.0, 12.0, 14.0, 16.0])) == pytest.approx(2.0)
+    assert linear_slope(times[:1], np.array([10.0])) == 0.0
+    assert linear_slope(np.zeros(3), np.array([1.0, 2.0, 3.0])) == 0.0
+
+
+def test_derive_metrics(tmp_path):
+    recording = {
+        '/topnode/cpu_memory_usage': cpu_memory_frame(),
+        '/topnode/io_stats': io_stats_frame(),
+    }
+    derived = derive_metrics(recording)
+    assert sorted(derived) == ['cpu', 'io', 'memory', 'summary']
+
+    summary = derived['summary'].iloc[0]
+    assert summary['cpu_utilization_mean'] == pytest.approx(0.6)
+    assert summary['read_bytes_per_s_mean'] == pytest.approx(1500)
+    assert summary['rss_slope_per_s'] == pytest.approx(10.0)
+    assert np.allclose(derived['memory']['growth_per_s'], [10, 10, np.nan, 10], equal_nan=True)
+
+    pytest.importorskip('pyarrow')
+    base = str(tmp_path / 'topnode')
+    save_derived(base, derived)
+    loaded = load_derived(base)
+    assert sorted(loaded) == sorted(derived)
+    assert loaded['summary']['rss_slope_per_s'][0] == pytest.approx(10.0)
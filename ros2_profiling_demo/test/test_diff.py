@@ -0,0 +1,92 @@
+import math
+
+import numpy as np
+import pytest
+
+from ros2profile.api import diff
+from ros2profile.api.diff import Comparison, bootstrap_median_change, holm, mann_whitney
+
+
+def test_mann_whitney_separated():
+    (p_value, effect) = mann_whitney(np.array([1, 2, 3]), np.array([4, 5, 6]))
+    assert effect == 1.0
+    # U = 9, mean 4.5, variance 5.25 with continuity correction
+    z = 4.0 / math.sqrt(5.25)
+    assert p_value == pytest.approx(math.erfc(z / math.sqrt(2)))
+
+    (p_value, effect) = mann_whitney(np.array([4, 5, 6]), np.array([1, 2, 3]))
+    assert effect == -1.0
+    assert p_value == pytest.approx(math.erfc(z / math.sqrt(2)))
+
+
+def test_mann_whitney_same_distribution():
+    values = np.array([5, 1, 4, 2, 3])
+    assert mann_whitney(values, values) == (1.0, 0.0)
+
+    # All values tied leaves no variance to test against
+    assert mann_whitney(np.full(4, 7), np.full(3, 7)) == (1.0, 0.0)
+
+
+def test_mann_whitney_shift():
+    rng = np.random.default_rng(0)
+    a = rng.normal(1000, 50, 500).astype(np.int64)
+    b = rng.normal(1100, 50, 500).astype(np.int64)
+    (p_value, effect) = mann_whitney(a, b)
+    assert p_value < 1e-6
+    assert effect > 0.5
+
+
+def test_bootstrap_median_change():
+    rng = np.random.default_rng(0)
+    a = rng.normal(1000, 50, 2000)
+    b = a * 1.2
+
+    (low, high) = bootstrap_median_change(a, b)
+    assert low < 0.2 < high
+    assert high - low < 0.1
+
+    # The default seed makes the interval reproducible
+    assert bootstrap_median_change(a, b) == (low, high)
+
+    (low, high) = bootstrap_median_change(a, a)
+    assert low < 0.0 < high
+
+
+def test_bootstrap_confidence():
+    rng = np.random.default_rng(1)
+    a = rng.normal(1000, 100, 300)
+    b = rng.normal(1000, 100, 300)
+    narrow = bootstrap_median_change(a, b, confidence=0.5)
+    wide = bootstrap_median_change(a, b, confidence=0.99)
+    assert wide[0] <= narrow[0] <= narrow[1] <= wide[1]
+
+
+def test_bootstrap_resamples_all_values(monkeypatch):
+    rng = np.random.default_rng(2)
+    a = rng.normal(1000, 100, 400)
+    b = rng.normal(1050, 100, 400)
+    interval = bootstrap_median_change(a, b, resamples=200)
+    # Batching the replicates draws the same indices as drawing them at once
+    monkeypatch.setattr(diff, 'BOOTSTRAP_BATCH_VALUES', 1000)
+    assert bootstrap_median_change(a, b, resamples=200) == interval
+
+
+def test_holm():
+    adjusted = holm(np.array([0.04, 0.01, 0.03, 0.5]))
+    assert adjusted.tolist() == pytest.approx([0.09, 0.04, 0.09, 0.5])
+    assert holm(np.array([0.6, 0.5])).tolist() == [1.0, 1.0]
+    assert len(holm(np.array([]))) == 0
+
+
+def test_comparison_adjusted():
+    rng = np.random.default_rng(3)
+    a = rng.normal(1000, 50, 200)
+    comparison = Comparison('callback', ('node', 'timer', 'cb'), a, a * 1.2)
+    comparison.evaluate(0.01, 0.05, 200)
+    assert comparison.regression
+    assert comparison.adjusted_p_value == comparison.p_value
+
+    # Corrected for enough other comparisons, the change is no longer significant
+    comparison.adjust(0.02, 0.01, 0.05)
+    assert comparison.adjusted_p_value == 0.02
+    assert not comparison.regression
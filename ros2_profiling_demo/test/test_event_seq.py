@@ -1,6 +1,6 @@
 import numpy as np
 
-from ros2profile.data.event_sequence import EventSequence
+from ros2profile.data.event_sequence import EventSequence, EventSequenceCache, event_sequences
 
 def test_sequence(profile_event_graph):
     graph = profile_event_graph
@@ -16,9 +16,7 @@ def test_sequence(profile_event_graph):
     sub_events = arkansas_sub.callback().events()
     assert len(sub_events) > 0
 
-    events = []
-    for event in sub_events:
-        events.append(EventSequence(event))
+    events = event_sequences(sub_events)
 
     # We are expecting 26 events in the chain
     # Depending on which tracepoints are available
@@ -40,3 +38,33 @@ def test_sequence(profile_event_graph):
 
     # Assert median latency is less than 1 ms
     assert np.median(latencies) < 1e-3
+
+
+def test_cached_sequences(synthetic_graph):
+    sub_events = synthetic_graph.callback_by_handle(22).events()
+    cache = EventSequenceCache()
+    cached = event_sequences(sub_events, cache=cache)
+    uncached = [EventSequence(event) for event in sub_events]
+
+    for (first, second) in zip(cached, uncached):
+        assert first.sequence == second.sequence
+        assert first.latency() == second.latency()
+    assert [sequence.latency() for sequence in cached] == [
+        360_000 + 100_000 * period for period in range(1, 6)]
+
+    # Every hop is cached once, and a repeated build only reads the cache
+    assert len(cache) == 20
+    again = event_sequences(sub_events, cache=cache)
+    assert len(cache) == 20
+    assert [sequence.sequence for sequence in again] == [sequence.sequence for sequence in cached]
+    assert cache.root_timestamp(sub_events[0]) == 10_000_000
+    assert cache.latency_to_root(sub_events[0]) == 460_000
+
+
+def test_bounded_sequence_skips_cache(synthetic_graph):
+    event = synthetic_graph.callback_by_handle(22).events()[0]
+    trigger = event.trigger
+    cache = EventSequenceCache()
+    sequence = EventSequence(event, trigger, cache)
+    assert len(cache) == 0
+    assert sequence.sequence == EventSequence(event, trigger).sequence
@@ -0,0 +1,47 @@
+def test_frames(profile_event_graph):
+    frames = profile_event_graph.to_frames()
+
+    callbacks = frames['callbacks']
+    events = frames['callback_events']
+    assert len(callbacks) == len(profile_event_graph.callbacks)
+    assert set(events['callback_handle']) <= set(callbacks['handle'])
+
+    # Every trigger edge should reference known event IDs
+    edges = frames['trigger_edges']
+    ids = set(events['id']) | set(frames['publish_events']['id']) | \
+        set(frames['subscription_events']['id'])
+    assert set(edges['child_id']) <= ids
+    assert set(edges['parent_id']) <= ids
+
+
+def test_synthetic_tables(synthetic_graph):
+    # Building the graph leaves the tables to be built on first use
+    assert synthetic_graph._tables is None
+    tables = synthetic_graph.tables()
+
+    assert list(tables['timers']['period']) == [10_000_000]
+    assert list(tables['publishers']['queue_depth']) == [10]
+    assert list(tables['publish_events']['rmw_publish']) == \
+        list(tables['publish_events']['source_timestamp'])
+    assert len(tables['callback_events']['id']) == 15
+
+    # Untriggered service callbacks have no incoming edge
+    edges = tables['trigger_edges']
+    assert len(edges['child_id']) == len(set(edges['child_id']))
+    service = tables['callback_events']['callback_handle'] == 23
+    assert not set(tables['callback_events']['id'][service]) & set(edges['child_id'])
+
+
+def test_tables_of_unpickled_graph(synthetic_graph):
+    # Events pickled before the scheduling, memory and lock analyses
+    event = synthetic_graph.callback_by_handle(23).events()[0]
+    state = dict(event.__dict__)
+    for name in ('_on_cpu_time', '_preemptions', '_allocated_bytes', '_lock_wait_time',
+                 '_trigger'):
+        del state[name]
+    event.__dict__.clear()
+    event.__setstate__(state)
+
+    events = synthetic_graph.tables()['callback_events']
+    assert events['on_cpu_time'][events['start'] == event.start()].tolist() == [-1]
+    assert event.trigger is None
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from ros2profile.data.histogram import LatencyHistogram
+
+
+def test_exact_small_values():
+    histogram = LatencyHistogram.from_values(range(1, 101))
+    assert histogram.count == 100
+    assert histogram.min == 1
+    assert histogram.max == 100
+    assert histogram.mean == pytest.approx(50.5)
+    assert histogram.std == pytest.approx(np.std(np.arange(1, 101)))
+
+    # Values below the sub-bucket count are kept exactly
+    assert histogram.percentile(50) == 50
+    assert histogram.percentile(99) == 99
+    assert histogram.percentile(100) == 100
+
+
+def test_bucketing_precision():
+    rng = np.random.default_rng(0)
+    values = rng.integers(10**3, 10**9, size=10_000)
+    histogram = LatencyHistogram.from_values(values)
+
+    # Two significant figures bound the relative error of every percentile
+    for percentile in (1, 10, 50, 90, 99, 99.9):
+        expected = np.percentile(values, percentile, method='inverted_cdf')
+        assert histogram.percentile(percentile) == pytest.approx(expected, rel=1e-2)
+
+    assert histogram.percentile(0) == pytest.approx(values.min(), rel=1e-2)
+    assert histogram.percentile(100) == values.max()
+
+
+def test_clip_to_highest_trackable_value():
+    histogram = LatencyHistogram(highest_trackable_value=10**6)
+    histogram.record(10**9)
+    histogram.record(-5)
+    assert histogram.min == 0
+    assert histogram.max == 10**6
+
+
+def test_merge():
+    rng = np.random.default_rng(1)
+    first = rng.integers(0, 10**7, size=1000)
+    second = rng.integers(10**6, 10**8, size=500)
+
+    merged = LatencyHistogram.from_values(first) + LatencyHistogram.from_values(second)
+    combined = LatencyHistogram.from_values(np.concatenate([first, second]))
+
+    assert merged.count == 1500
+    assert merged.min == combined.min
+    assert merged.max == combined.max
+    assert merged.mean == pytest.approx(combined.mean)
+    assert merged.std == pytest.approx(combined.std)
+    percentiles = [0, 25, 50, 75, 99, 100]
+    assert np.array_equal(merged.percentiles(percentiles), combined.percentiles(percentiles))
+
+
+def test_merge_empty():
+    histogram = LatencyHistogram.from_values([5, 7])
+    histogram.merge(LatencyHistogram())
+    assert histogram.count == 2
+
+    empty = LatencyHistogram()
+    empty.merge(histogram)
+    assert (empty.min, empty.max) == (5, 7)
+
+    assert np.isnan(LatencyHistogram().mean)
+    assert np.all(np.isnan(LatencyHistogram().percentiles([50, 99])))
+
+
+def test_merge_different_layouts():
+    with pytest.raises(ValueError):
+        LatencyHistogram(significant_figures=2).merge(LatencyHistogram(significant_figures=3))
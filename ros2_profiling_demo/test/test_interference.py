@@ -0,0 +1,49 @@
+from ros2profile.data import build_graph
+from ros2profile.data.interference import cpu_interference
+
+from conftest import PERIOD
+
+
+def test_no_interference(synthetic_graph):
+    # The timer thread runs on CPU 0 and the subscriber thread on CPU 1
+    interference = cpu_interference(synthetic_graph)
+    assert interference.handles == [21, 22, 23]
+    assert not interference.matrix.any()
+    assert interference.busy_time(21) == 5 * 200_000
+    assert interference.hot_pairs() == []
+
+
+def test_migrating_callback(synthetic_events):
+    # In the first period, the subscriber thread is preempted on CPU 1 and
+    # runs on CPU 0 for 15 us, while the timer callback waits there
+    def switch(time, cpu, prev_tid, next_tid):
+        synthetic_events['sched_switch'].append({
+            '_name': 'sched_switch', '_timestamp': PERIOD + time, 'cpu_id': cpu,
+            'prev_tid': prev_tid, 'prev_state': 0x100, 'next_tid': next_tid})
+
+    switch(170_000, 1, 201, 0)
+    switch(180_000, 0, 101, 201)
+    switch(190_000, 0, 201, 101)
+    switch(195_000, 1, 0, 201)
+    graph = build_graph(synthetic_events)
+
+    # The subscriber callback started on CPU 1, but is charged to CPU 0 too
+    assert {ev.cpu_id for ev in graph.callback_by_handle(22).events()} == {1}
+    interference = cpu_interference(graph)
+    assert interference.overlap(21, 22) == 15_000
+    assert interference.overlap(22, 21) == 15_000
+    assert interference.overlap(21, 23) == 0
+    assert interference.hot_pairs() == [(21, 22, 15_000, 0.015)]
+    assert interference.hot_pairs(cross_process=False, min_fraction=0.1) == []
+
+
+def test_start_cpu_without_schedule(synthetic_events):
+    # Without sched_switch events, each event is charged to the CPU it started on
+    del synthetic_events['sched_switch']
+    for name in ('ros2:callback_start', 'ros2:callback_end'):
+        for event in synthetic_events[name]:
+            event['cpu_id'] = 0
+    interference = cpu_interference(build_graph(synthetic_events))
+    # Only the first subscriber callback starts before the timer callback ends
+    assert interference.overlap(21, 22) == 40_000
+    assert interference.overlap(22, 23) == 0
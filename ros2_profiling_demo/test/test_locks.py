@@ -0,0 +1,60 @@
+import numpy as np
+
+from ros2profile.data import build_graph
+from ros2profile.data.locks import contention_matrix, lock_summary, thread_contention
+
+from conftest import PERIOD
+
+
+def test_lock_times(synthetic_graph):
+    for event in synthetic_graph.callback_by_handle(21).events():
+        # A contended lock and a successful trylock, the failed trylock is ignored
+        assert event.locks == 2
+        assert event.lock_wait_time == 5000
+        assert event.lock_hold_time == 4000
+        # Thread 102 held the mutex outside of any callback
+        assert event.lock_contenders == {(None, 102): 5000}
+
+    # Node B has no pthread wrapper events
+    assert all(ev.locks is None for ev in synthetic_graph.callback_by_handle(22).events())
+
+    summary = lock_summary(synthetic_graph)
+    assert summary[21]['locks'] == 10
+    assert summary[21]['wait_time'] == 25_000
+    assert summary[21]['max_wait_time'] == 5000
+    assert summary[21]['hold_time'] == 20_000
+    assert summary[21]['contended_calls'] == 5
+
+
+def test_contention_outside_callbacks(synthetic_graph):
+    (labels, matrix) = contention_matrix(synthetic_graph)
+    assert labels == [21, None]
+    assert matrix.tolist() == [[0, 25_000], [0, 0]]
+    assert thread_contention(synthetic_graph) == {(101, 102): 25_000}
+
+
+def test_contention_between_callbacks(synthetic_events):
+    # Thread 102 now holds the mutex from a callback of its own
+    for period in range(1, 6):
+        start = period * PERIOD
+        for (name, time) in (('ros2:callback_start', start + 5000),
+                             ('ros2:callback_end', start + 16_000)):
+            synthetic_events[name].append({
+                '_name': name, '_timestamp': time, 'callback': 24, 'is_intra_process': False,
+                'vtid': 102, 'vpid': 100, 'cpu_id': 1})
+    synthetic_events['ros2:rclcpp_callback_register'].append(
+        {'_name': 'ros2:rclcpp_callback_register', '_timestamp': 2, 'callback': 24,
+         'symbol': 'void worker_a()'})
+    graph = build_graph(synthetic_events)
+
+    for event in graph.callback_by_handle(21).events():
+        assert event.lock_contenders == {(24, 102): 5000}
+    for event in graph.callback_by_handle(24).events():
+        assert event.locks == 1
+        assert event.lock_wait_time == 0
+        assert event.lock_hold_time == 7000
+
+    (labels, matrix) = contention_matrix(graph)
+    assert labels == [21, 24]
+    assert np.array_equal(matrix, [[0, 25_000], [0, 0]])
+    assert thread_contention(graph) == {(101, 102): 25_000}
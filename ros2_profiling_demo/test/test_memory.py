@@ -0,0 +1,36 @@
+from ros2profile.data.memory import _allocation_ops, _freed_sizes, allocation_summary
+
+
+def test_freed_sizes(synthetic_events):
+    ops = _allocation_ops(synthetic_events)
+    freed = _freed_sizes(ops)
+    first = ops['timestamp'] < 20_000_000
+
+    # realloc in place frees the 100 bytes of the malloc, then allocates 300 bytes
+    # that the last free releases, the block freed first is unknown
+    assert freed[first & ~ops['is_alloc']].tolist() == [100, 32, 0, 300]
+    # The failed posix_memalign is dropped, the pointer of the successful one kept
+    assert ops['ptr'][first & ops['is_alloc']].tolist() == [
+        0x10001, 0x20001, 0xffff800000000001, 0x10001]
+    assert ops['size'][first & ops['is_alloc']].tolist() == [100, 32, 64, 300]
+
+
+def test_callback_allocations(synthetic_graph):
+    timer_events = synthetic_graph.callback_by_handle(21).events()
+    for (period, event) in enumerate(timer_events, start=1):
+        assert event.allocations == 4
+        assert event.allocated_bytes == 496
+        assert event.frees == 3
+        # The aligned block of the previous period is unknown in the first one
+        assert event.heap_growth == (364 if period == 1 else 300)
+
+    # Node B has no libc wrapper events
+    assert all(ev.allocations is None for ev in synthetic_graph.callback_by_handle(22).events())
+
+    summary = allocation_summary(synthetic_graph)
+    assert list(summary.keys()) == [21]
+    assert summary[21]['allocations'] == 20
+    assert summary[21]['allocated_bytes'] == 5 * 496
+    assert summary[21]['frees'] == 15
+    # Bytes still outstanding from the timer callback, the block freed outside is not counted
+    assert summary[21]['heap_growth'] == 364 + 4 * 300
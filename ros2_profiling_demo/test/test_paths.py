@@ -0,0 +1,21 @@
+import numpy as np
+
+from ros2profile.data.causal_path import slowest_paths
+
+
+def test_paths(profile_event_graph):
+    graph = profile_event_graph
+    paths = graph.paths()
+    assert len(paths) > 0
+
+    # Every path starts at a timer and ends at a callback
+    for path in paths:
+        assert path.root.callback is path.callbacks[0]
+        assert len(path.latencies) == len(path.instances)
+
+    slowest = slowest_paths(paths, count=5, percentile=99)
+    assert len(slowest) > 0
+
+    # Assert the slowest chain stays below 10 ms at the 99th percentile
+    latencies = slowest[0].latencies / 1e9
+    assert np.percentile(latencies, 99) < 1e-2
@@ -0,0 +1,111 @@
+import pytest
+
+from ros2profile.api.pipeline import (
+    BLOCKED, CACHED, FAILED, LOADED, RAN, SKIPPED, Pipeline, PipelineError, Stage)
+
+
+def add(*values):
+    return sum(values)
+
+
+def fail(*values):
+    raise RuntimeError('conversion failed')
+
+
+def stages(tmp_path, calls=None, func=add):
+    def record(name, value):
+        def stage(*values):
+            if calls is not None:
+                calls.append(name)
+            return value + sum(values)
+        return stage
+
+    return [
+        Stage('a', record('a', 1), output=str(tmp_path / 'a')),
+        Stage('b', func, args=(2,), output=str(tmp_path / 'b')),
+        Stage('decode', record('decode', 10)),
+        Stage('graph', record('graph', 0), inputs=('decode',), output=str(tmp_path / 'graph')),
+        Stage('tables', record('tables', 0), inputs=('graph',), output=str(tmp_path / 'tables')),
+        Stage('catalog', record('catalog', 0), inputs=('graph',), run_if_inputs_ran=True),
+        Stage('report', record('report', 0), inputs=('a', 'b')),
+    ]
+
+
+def statuses(report):
+    return {result.name: result.status for result in report.results}
+
+
+@pytest.mark.parametrize('jobs', [0, 2])
+def test_run_and_cache(tmp_path, jobs):
+    pipeline = Pipeline(stages(tmp_path))
+    assert set(pipeline.plan().values()) == {RAN}
+    pipeline.run(jobs)
+    assert (tmp_path / 'tables').exists()
+
+    calls = []
+    pipeline = Pipeline(stages(tmp_path, calls))
+    plan = pipeline.plan()
+    assert plan == {
+        'a': LOADED, 'b': LOADED, 'decode': SKIPPED, 'graph': CACHED, 'tables': CACHED,
+        'catalog': SKIPPED, 'report': RAN}
+    assert statuses(pipeline.run(jobs)) == plan
+    assert calls == ['report']
+
+
+def test_rerun_missing_output(tmp_path):
+    Pipeline(stages(tmp_path)).run(0)
+    (tmp_path / 'graph').unlink()
+
+    calls = []
+    pipeline = Pipeline(stages(tmp_path, calls))
+    plan = pipeline.plan()
+    # The graph is rebuilt from a fresh decode, its sinks run again
+    assert plan['decode'] == RAN
+    assert plan['graph'] == RAN
+    assert plan['tables'] == CACHED
+    assert plan['catalog'] == RAN
+    pipeline.run(0)
+    assert calls.index('decode') < calls.index('graph') < calls.index('catalog')
+
+
+@pytest.mark.parametrize('jobs', [0, 2])
+def test_failure_lets_independent_stages_finish(tmp_path, jobs):
+    pipeline = Pipeline(stages(tmp_path, func=fail))
+    with pytest.raises(PipelineError) as error:
+        pipeline.run(jobs)
+
+    assert list(error.value.failures) == ['b']
+    results = statuses(error.value.report)
+    assert results['b'] == FAILED
+    assert results['report'] == BLOCKED
+    assert results['graph'] == RAN
+    # Outputs of independent stages are saved, so a later run only redoes the rest
+    assert (tmp_path / 'a').exists()
+    assert (tmp_path / 'graph').exists()
+    assert (tmp_path / 'tables').exists()
+    assert not (tmp_path / 'b').exists()
+
+
+def test_rerun_unloadable_output(tmp_path):
+    calls = []
+    pipeline = Pipeline([
+        Stage('convert', lambda: calls.append('convert') or 1,
+              output=str(tmp_path / 'convert'), save=None, load=None),
+        Stage('report', lambda value: calls.append('report') or value, inputs=('convert',)),
+    ])
+    (tmp_path / 'convert').touch()
+    # A cached output without a loader is recomputed rather than loaded
+    assert pipeline.plan() == {'convert': RAN, 'report': RAN}
+    pipeline.run(0)
+    assert calls == ['convert', 'report']
+
+
+def test_invalid_pipelines(tmp_path):
+    with pytest.raises(ValueError):
+        Pipeline([Stage('a', add), Stage('a', add)])
+    with pytest.raises(ValueError):
+        Pipeline([Stage('a', add, inputs=('missing',))])
+    with pytest.raises(ValueError):
+        Pipeline([Stage('a', add, inputs=('b',)), Stage('b', add, inputs=('a',))])
+    with pytest.raises(ValueError):
+        Pipeline(stages(tmp_path)).run(-1)
@@ -0,0 +1,50 @@
+import os
+import pickle
+
+import pytest
+
+from ros2profile.api.process import EVENT_GRAPH, EVENT_TABLES
+from ros2profile.api.query import connect, load_event_tables, query
+
+MEDIAN_DURATION = '''
+    SELECT n.name, quantile_cont(e.duration, 0.5) AS p50, count(*) AS calls
+    FROM callback_events e
+    JOIN callbacks c ON e.callback_handle = c.handle
+    JOIN nodes n ON c.node_handle = n.handle
+    GROUP BY n.name
+    ORDER BY n.name
+'''
+
+
+@pytest.fixture
+def profile_dir(synthetic_graph, tmp_path):
+    with open(os.path.join(tmp_path, EVENT_GRAPH), 'wb') as f:
+        pickle.dump(synthetic_graph, f)
+    return str(tmp_path)
+
+
+def test_sqlite_query(profile_dir):
+    result = query(profile_dir, MEDIAN_DURATION, backend='sqlite')
+    assert result['name'].tolist() == ['A', 'B']
+    assert result['calls'].tolist() == [5, 5]
+    assert result['p50'].tolist() == [200_000.0, 300_000.0]
+
+    # Interpolated between the tenth and eleventh of the 15 sorted durations
+    result = query(profile_dir, 'SELECT quantile_cont(duration, 0.7) AS p70 '
+                                'FROM callback_events', backend='sqlite')
+    assert result['p70'].tolist() == pytest.approx([280_000])
+
+
+def test_event_tables_cached(profile_dir):
+    tables = load_event_tables(profile_dir)
+    assert os.path.exists(os.path.join(profile_dir, EVENT_TABLES))
+    # The cached tables are loaded even once the graph is gone
+    os.remove(os.path.join(profile_dir, EVENT_GRAPH))
+    cached = load_event_tables(profile_dir)
+    assert cached['callback_events']['start'].tolist() == \
+        tables['callback_events']['start'].tolist()
+
+
+def test_unknown_backend(profile_dir):
+    with pytest.raises(ValueError):
+        connect(profile_dir, 'postgres')
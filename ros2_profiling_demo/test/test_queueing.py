@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from ros2profile.data.queueing import QueueingAnalysis
+
+from conftest import PERIOD
+
+
+def test_subscription_queueing(synthetic_graph):
+    analysis = synthetic_graph.subscriptions[0].queueing()
+    assert analysis.count == 5
+
+    # Messages are available once rmw_publish returns, 52 us into each period,
+    # and taken 100 us later in every period
+    assert analysis.pickup_delay.tolist() == [98_000, 198_000, 298_000, 398_000, 498_000]
+    assert analysis.dispatch_delay.tolist() == [10_000] * 5
+    assert analysis.message_age.tolist() == [108_000, 208_000, 308_000, 408_000, 508_000]
+
+    assert analysis.backlog_times[:2].tolist() == [PERIOD + 52_000, PERIOD + 150_000]
+    assert analysis.backlog.tolist() == [1, 0] * 5
+    assert analysis.max_backlog() == 1
+    assert analysis.time_at_queue_depth() == 0
+
+    # With a queue depth of one, the queue is full for the whole pickup delay
+    shallow = QueueingAnalysis(synthetic_graph.subscriptions[0].events, 1)
+    assert shallow.time_at_queue_depth() == 1_490_000
+
+
+def message(available, taken):
+    return SimpleNamespace(
+        trigger=None, _source_timestamp=available, timestamp=lambda: taken, callback=None)
+
+
+def test_backlog():
+    analysis = QueueingAnalysis([message(0, 30), message(10, 40), message(20, 50)], 2)
+    assert analysis.backlog_times.tolist() == [0, 10, 20, 30, 40, 50]
+    assert analysis.backlog.tolist() == [1, 2, 3, 2, 1, 0]
+    assert analysis.max_backlog() == 3
+    assert analysis.time_at_queue_depth() == 30
+    # Messages without a callback are never dispatched
+    assert analysis.dispatch_delay.tolist() == []
+    assert analysis.summary()['pickup_delay_max'] == 30.0
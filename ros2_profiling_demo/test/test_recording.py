@@ -0,0 +1,87 @@
+from datetime import datetime
+import os
+import pickle
+
+import pandas as pd
+import pytest
+
+from ros2profile.api.process import (
+    CONVERTED_SUFFIX, RecordingData, load_mcap_data, process_one, save_converted)
+
+START = 1_700_000_000 * 10**9
+STEP = 100_000_000
+
+IO_STATS = """uint64 bytes_read
+uint64 bytes_written
+"""
+RANGE = """float64 range
+"""
+
+
+@pytest.fixture
+def recording(tmp_path):
+    writer_module = pytest.importorskip('mcap_ros2.writer')
+    base = str(tmp_path / 'topnode')
+    with open(base + '.mcap', 'wb') as f:
+        writer = writer_module.Writer(f)
+        io_stats = writer.register_msgdef('topnode_interfaces/msg/IoStats', IO_STATS)
+        sensor = writer.register_msgdef('sensor_msgs/msg/Range', RANGE)
+        for idx in range(10):
+            time = START + idx * STEP
+            writer.write_message('/topnode_1/io_stats', io_stats,
+                                 {'bytes_read': idx, 'bytes_written': 2 * idx},
+                                 log_time=time, publish_time=time)
+            writer.write_message('/sensor/range', sensor, {'range': idx / 2},
+                                 log_time=time, publish_time=time)
+        writer.finish()
+    return base
+
+
+def test_decoded_recording(recording):
+    data = RecordingData(recording, topics=['~/io_stats'], start_time=START + 2 * STEP,
+                         end_time=START + 5 * STEP)
+    assert list(data) == ['/topnode_1/io_stats']
+    # Nothing is decoded until a topic is accessed
+    assert data._frames == {}
+    frame = data['/topnode_1/io_stats']
+    assert frame['bytes_read'].tolist() == [2, 3, 4]
+    assert frame['_log_time_ns'].tolist() == [START + idx * STEP for idx in (2, 3, 4)]
+
+    # Topics of unregistered schemas are converted too
+    assert RecordingData(recording)['/sensor/range']['range'].tolist()[:3] == [0.0, 0.5, 1.0]
+
+
+def test_converted_recording(recording):
+    pytest.importorskip('pyarrow')
+    save_converted(recording, process_one(recording + '.mcap'))
+    assert os.path.isdir(recording + CONVERTED_SUFFIX)
+
+    data = RecordingData(recording, start_time=START + 7 * STEP, columns=['bytes_written'])
+    assert sorted(data) == ['/sensor/range', '/topnode_1/io_stats']
+    frame = data['/topnode_1/io_stats']
+    assert frame.columns.tolist() == ['_log_time', '_log_time_ns', 'bytes_written']
+    assert frame['bytes_written'].tolist() == [14, 16, 18]
+
+    data = load_mcap_data(os.path.dirname(recording) + '/', topics=['/sensor/range'])
+    assert list(data['topnode']) == ['/sensor/range']
+
+
+def test_legacy_pickle(tmp_path):
+    base = str(tmp_path / 'topnode')
+    times = [START + idx * STEP for idx in range(10)]
+    frame = pd.DataFrame({
+        # The reader's log times, as local datetimes without integer nanoseconds
+        '_log_time': [datetime.fromtimestamp(time / 1e9) for time in times],
+        'bytes_read': list(range(10)),
+    })
+    with open(base + CONVERTED_SUFFIX, 'wb') as f:
+        pickle.dump({'/topnode_1/io_stats': frame}, f)
+
+    data = RecordingData(base, start_time=START + 2 * STEP, end_time=START + 5 * STEP)
+    # Legacy pickles are loaded whole when the recording is opened
+    assert list(data._frames) == ['/topnode_1/io_stats']
+    assert data['/topnode_1/io_stats']['bytes_read'].tolist() == [2, 3, 4]
+
+    # A bound one nanosecond after a sample excludes it
+    data = RecordingData(base, start_time=START + 2 * STEP + 1, end_time=START + 5 * STEP)
+    assert data['/topnode_1/io_stats']['bytes_read'].tolist() == [3, 4]
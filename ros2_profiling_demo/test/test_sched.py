@@ -0,0 +1,56 @@
+import numpy as np
+
+from ros2profile.data.sched import build_thread_schedules
+from ros2profile.data.timeline import ThreadTimeline, coverage, overlap
+
+from conftest import PERIOD
+
+
+def test_coverage_and_overlap():
+    starts = np.array([10, 30, 60])
+    ends = np.array([20, 50, 70])
+    assert coverage(starts, ends, [0, 10, 15, 25, 40, 100]).tolist() == [0, 0, 5, 10, 20, 40]
+    assert overlap(starts, ends, [0, 15, 45], [100, 35, 65]).tolist() == [40, 10, 10]
+    assert overlap(starts[:0], ends[:0], [0], [100]).tolist() == [0]
+
+
+def test_preempted_states():
+    events = [
+        {'_timestamp': time, 'cpu_id': 0, 'next_tid': tid, 'prev_state': state}
+        for (time, tid, state) in ((0, 7, 0), (10, 8, 0), (20, 7, 0x100), (30, 7, 0x101),
+                                   (40, 0, 1))
+    ]
+    schedule = build_thread_schedules(events)[7]
+    assert schedule.starts.tolist() == [0, 20, 30]
+    assert schedule.ends.tolist() == [10, 30, 40]
+    # Both a plain runnable state and the lttng-modules preempt bit count, sleeping does not
+    assert schedule.preempted.tolist() == [True, True, False]
+
+
+def test_thread_timeline(synthetic_graph):
+    timeline = ThreadTimeline(synthetic_graph)
+    assert sorted(timeline.tids()) == [101, 201]
+    assert len(timeline.events(201)) == 10
+    assert np.all(np.diff(timeline.starts(201)) > 0)
+
+    start = PERIOD
+    idx = timeline.enclosing_indices(101, [start - 1, start, start + 200_000, start + 200_001])
+    assert idx.tolist() == [-1, 0, 0, -1]
+    assert timeline.enclosing(101, 2 * PERIOD + 5).start() == 2 * PERIOD
+    assert timeline.enclosing(300, start) is None
+
+
+def test_callback_scheduling(synthetic_graph):
+    schedule = synthetic_graph.thread_schedule(101)
+    assert len(schedule.starts) == 10
+    assert np.all(schedule.cpus == 0)
+    assert synthetic_graph.thread_schedule(300) is not None
+
+    for event in synthetic_graph.callback_by_handle(21).events():
+        assert event.on_cpu_time == 190_000
+        assert event.preemptions == 1
+        assert event.wait_time == 10_000
+    for event in synthetic_graph.callback_by_handle(22).events():
+        assert event.on_cpu_time == 300_000
+        assert event.preemptions == 0
+        assert event.wait_time == 0
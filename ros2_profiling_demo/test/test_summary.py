@@ -0,0 +1,45 @@
+import json
+
+import pandas as pd
+import pytest
+
+from ros2profile.api.summary import (
+    _duration_stats, format_summary, summarize_tables, summary_to_json)
+
+
+def test_summarize_graph(synthetic_graph):
+    summary = summarize_tables(synthetic_graph.tables())
+    assert [node['name'] for node in summary] == ['A', 'B']
+    (node_a, node_b) = summary
+
+    (publisher,) = node_a['publishers']
+    assert publisher['topic'] == '/a'
+    assert publisher['queue_depth'] == 10
+    # rclcpp_publish to rmw_publish
+    assert (publisher['events'], publisher['max']) == (5, 2000)
+
+    (timer,) = node_a['timers']
+    assert timer['period'] == 10_000_000
+    assert timer['callback']['symbol'] == 'void timer_a()'
+    assert timer['callback']['p99'] == 200_000.0
+
+    (subscription,) = node_b['subscriptions']
+    assert subscription['messages'] == 5
+    assert subscription['callback']['events'] == 5
+    assert subscription['callback']['max'] == 300_000
+
+    lines = format_summary(summary)
+    assert 'Node: /B' in lines
+    assert '        events=5 p50=0.300ms p90=0.300ms p99=0.300ms max=0.300ms' in lines
+    assert json.loads(summary_to_json(summary)) == summary
+
+
+def test_duration_percentiles():
+    frame = pd.DataFrame({'handle': [1] * 100 + [2], 'duration': list(range(1, 101)) + [7]})
+    stats = _duration_stats(frame, 'handle')
+    assert stats[1]['events'] == 100
+    assert stats[1]['p50'] == pytest.approx(50.5)
+    assert stats[1]['p90'] == pytest.approx(90.1)
+    assert stats[1]['p99'] == pytest.approx(99.01)
+    assert stats[1]['max'] == 100
+    assert stats[2] == {'events': 1, 'p50': 7.0, 'p90': 7.0, 'p99': 7.0, 'max': 7}
@@ -0,0 +1,63 @@
+import numpy as np
+
+from ros2profile.data.timer import Timer, TimerAnalysis
+
+
+def test_timers(profile_event_graph):
+    graph = profile_event_graph
+    timers = graph.timers()
+    assert len(timers) > 0
+
+    for timer in timers:
+        analysis = timer.analysis()
+        if analysis.count == 0:
+            continue
+
+        # Timers should never skip a period or overrun it
+        assert np.sum(analysis.skipped) == 0
+        assert np.sum(analysis.overruns) == 0
+
+        # Assert 99th percentile jitter is less than 1 ms
+        assert analysis.jitter_percentiles([99])[0] < 1e6  # ns
+
+        # Assert activations start within 1 ms of their expected time
+        assert np.max(analysis.lateness) < 1e6  # ns
+
+
+def test_synthetic_timer(synthetic_graph):
+    timer = synthetic_graph.timers()[0]
+    analysis = timer.analysis()
+    assert analysis.count == 5
+    assert np.array_equal(analysis.ends - analysis.starts, [200_000] * 5)
+    assert timer.mean_period() == timer.period
+    assert np.sum(analysis.skipped) == 0
+
+
+def test_timer_activations():
+    starts = np.array([5000, 6010, 6995, 9000, 10_020])
+    ends = np.array([5100, 6100, 8500, 9100, 10_100])
+    analysis = TimerAnalysis(1000, starts, ends)
+
+    # The schedule is anchored at the first activation, however late it is
+    assert analysis.expected.tolist() == [5000, 6000, 7000, 9000, 10_000]
+    assert analysis.lateness.tolist() == [0, 10, -5, 0, 20]
+    assert analysis.drift.tolist() == [0, 10, -5, 0, 20]
+    assert analysis.skipped.tolist() == [0, 0, 0, 1, 0]
+    assert analysis.missed.tolist() == [False, False, True, False, False]
+    assert analysis.overruns.tolist() == [False, False, True, False, False]
+    assert analysis.jitter.tolist() == [10, -15, 1005, 20]
+
+    summary = analysis.summary()
+    assert summary['max_lateness'] == 20
+    assert summary['skipped_periods'] == 1
+    assert summary['missed_periods'] == 1
+
+
+def test_timer_without_callback_or_period():
+    timer = Timer(92, 11)
+    assert timer.analysis().count == 0
+    assert timer.analysis().summary()['activations'] == 0
+
+    analysis = TimerAnalysis(None, np.array([1, 2]), np.array([3, 4]))
+    assert analysis.count == 0
+    assert analysis.drift.tolist() == []
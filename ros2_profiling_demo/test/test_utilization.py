@@ -0,0 +1,34 @@
+import numpy as np
+
+from ros2profile.data.utilization import thread_utilization
+
+from conftest import PERIOD
+
+
+def test_binned_utilization(synthetic_graph):
+    utilization = thread_utilization(
+        synthetic_graph, bin_size=150_000, start=PERIOD, end=PERIOD + 300_000)
+    assert sorted(utilization.keys()) == [101, 201]
+
+    # The first timer callback straddles the boundary between the two bins
+    timer = utilization[101]
+    assert timer.vpid == 100
+    assert timer.bin_edges.tolist() == [PERIOD, PERIOD + 150_000, PERIOD + 300_000]
+    assert timer.busy_time.tolist() == [150_000, 50_000]
+    assert np.allclose(timer.busy, [1.0, 1 / 3])
+    assert np.allclose(timer.idle, [0.0, 2 / 3])
+    # Switched out for 10 us in the first bin and 1 us after the callback in the second
+    assert np.allclose(timer.on_cpu, [140_000 / 150_000, 51_000 / 150_000])
+    assert np.isclose(timer.mean_busy(), 200_000 / 300_000)
+
+    subscriber = utilization[201]
+    assert subscriber.busy_time.tolist() == [0, 140_000]
+    assert np.allclose(subscriber.on_cpu, [2000 / 150_000, 1.0])
+
+
+def test_default_range(synthetic_graph):
+    utilization = thread_utilization(synthetic_graph, bin_size=PERIOD)
+    timer = utilization[101]
+    assert timer.bin_edges[0] == PERIOD
+    assert len(timer.busy) == 5
+    assert timer.busy_time.tolist() == [200_000] * 5
@@ -0,0 +1,178 @@
+# Copyright 2023 Open Source Robotics Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Any, Mapping, Optional, Sequence
+
+import numpy as np
+
+import pandas as pd
+
+from ros2profile.data.convert.ctf import load_clock_info
+
+CPU_MEMORY_USAGE = '~/cpu_memory_usage'
+
+SAMPLE_COLUMNS = ('cpu_percent', 'memory_percent', 'max_resident_set_size', 'virtual_size')
+
+
+def trace_clock_offset(input_path: str, offset: Optional[int] = None) -> int:
+    """
+    Get the offset in nanoseconds from MCAP log times to the trace clock.
+
+    LTTng correlates its clock with the realtime clock when the session starts,
+    in which case the CTF metadata places the clock origin at the Unix epoch
+    and the offset is zero. Other traces need an explicit offset.
+    """
+    if offset is not None:
+        return offset
+    info = load_clock_info(input_path)
+    if info is None:
+        raise ValueError(f'No clock snapshots in trace: {input_path}')
+    if not info['origin_is_unix_epoch']:
+        raise ValueError(
+            f"Trace clock '{info['name']}' is not correlated with the Unix epoch, "
+            'pass an explicit offset')
+    return 0
+
+
+def sample_times(frame: pd.DataFrame, timezone: Optional[str] = None) -> np.ndarray:
+    """
+    Get the log times of topnode samples as integer nanoseconds since the epoch.
+
+    :param timezone: timezone of the machine that converted the recording, e.g.
+        'Europe/Berlin', only needed for data converted before integer log
+        times were kept, whose log times are local datetimes
+    """
+    if '_log_time_ns' in frame:
+        return frame['_log_time_ns'].to_numpy(dtype=np.int64)
+    if timezone is None:
+        raise ValueError(
+            'Samples have no integer log times, process the recording again '
+            'or pass the timezone it was converted in')
+    times = frame['_log_time'].dt.tz_localize(timezone).dt.tz_convert('UTC')
+    return times.dt.as_unit('ns').astype(np.int64).to_numpy()
+
+
+def process_samples(
+    mcap_data: Mapping[str, Mapping[str, pd.DataFrame]],
+    offset: int = 0,
+    topic: str = CPU_MEMORY_USAGE,
+    columns: Sequence[str] = SAMPLE_COLUMNS,
+    timezone: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Collect per-process samples of all recordings on the trace clock.
+
+    :param mcap_data: topnode data as returned by load_mcap_data
+    :param offset: offset from MCAP log times to the trace clock
+    :param timezone: see sample_times
+    :return: one row per sample with pid, timestamp and the sample columns,
+        sorted by timestamp
+    """
+    frames = []
+    for recording in mcap_data.values():
+        for name in recording:
+            if not (name == topic or (topic.startswith('~/') and name.endswith(topic[1:]))):
+                continue
+            frame = recording[name]
+            if not len(frame) or 'pid' not in frame:
+                continue
+            samples = pd.DataFrame({
+                'pid': frame['pid'].to_numpy(dtype=np.int64),
+                'timestamp': sample_times(frame, timezone) + offset,
+            })
+            for column in columns:
+                if column in frame:
+                    samples[column] = frame[column].to_numpy()
+            frames.append(samples)
+    if not frames:
+        return pd.DataFrame(columns=['pid', 'timestamp', *columns])
+    return pd.concat(frames, ignore_index=True).sort_values('timestamp', kind='stable')
+
+
+def attach_samples(
+    events: pd.DataFrame,
+    samples: pd.DataFrame,
+    time_column: str = 'start',
+    pid_column: str = 'vpid',
+    direction: str = 'nearest',
+    tolerance: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Attach to each event the sample of its process nearest in time.
+
+    Processes are matched by pid, which assumes tracing and topnode see the
+    same pid namespace. Events without a matching sample get missing values.
+
+    :param direction: 'backward', 'forward' or 'nearest', as in pd.merge_asof
+    :param tolerance: maximum distance in nanoseconds to a matched sample
+    :return: events in their original order with sample_timestamp and the
+        sample columns added
+    """
+    samples = samples.rename(columns={'timestamp': 'sample_timestamp', 'pid': '_sample_pid'})
+    left = events.assign(
+        _order=np.arange(len(events)),
+        _time=events[time_column].to_numpy(dtype=np.int64),
+        _pid=events[pid_column].astype('Int64').fillna(-1).to_numpy(dtype=np.int64))
+    merged = pd.merge_asof(
+        left.sort_values('_time', kind='stable'),
+        samples.astype({'_sample_pid': np.int64, 'sample_timestamp': np.int64}),
+        left_on='_time', right_on='sample_timestamp',
+        left_by='_pid', right_by='_sample_pid',
+        direction=direction, tolerance=tolerance)
+    merged = merged.sort_values('_order', kind='stable').set_index(events.index)
+    return merged.drop(columns=['_order', '_time', '_pid', '_sample_pid'])
+
+
+def sample_bins(
+    samples: pd.DataFrame,
+    bin_size: int = 100_000_000,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Resample process samples onto fixed time bins, taking the latest sample of each bin.
+
+    :return: one row per process and bin with pid, bin_start and the sample columns
+    """
+    if not len(samples):
+        return pd.DataFrame(columns=['pid', 'bin_start', *samples.columns.drop(['pid'])])
+    times = samples['timestamp'].to_numpy(dtype=np.int64)
+    start = int(times.min()) if start is None else start
+    end = int(times.max()) + 1 if end is None else end
+    edges = np.arange(start, end, bin_size, dtype=np.int64)
+    pids = np.unique(samples['pid'].to_numpy(dtype=np.int64))
+    bins = pd.DataFrame({
+        'pid': np.repeat(pids, len(edges)),
+        'bin_start': np.tile(edges, len(pids)),
+    })
+    bins['_bin_last'] = bins['bin_start'] + (bin_size - 1)
+    binned = attach_samples(
+        bins, samples, time_column='_bin_last', pid_column='pid', direction='backward',
+        tolerance=bin_size - 1)
+    return binned.drop(columns=['_bin_last', 'sample_timestamp'])
+
+
+def callback_samples(
+    graph: Any,
+    mcap_data: Mapping[str, Mapping[str, pd.DataFrame]],
+    offset: int = 0,
+    timezone: Optional[str] = None,
+    **kwargs: Any,
+) -> pd.DataFrame:
+    """
+    Get the callback events of a graph with the nearest process sample attached.
+    """
+    events = graph.to_frames()['callback_events']
+    samples = process_samples(mcap_data, offset, timezone=timezone)
+    return attach_samples(events, samples, **kwargs)
@@ -0,0 +1,237 @@
+# Copyright 2023 Open Source Robotics Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import socket
+import sqlite3
+import subprocess
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import yaml
+
+from ros2profile.api.diff import callback_durations, path_latencies
+from ros2profile.data.graph import Graph
+
+RUN_METADATA = 'run_metadata.yaml'
+
+PERCENTILES = (50, 90, 99)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    name TEXT,
+    start_time REAL,
+    duration REAL,
+    git_sha TEXT,
+    launch_file TEXT,
+    hostname TEXT,
+    ros_distro TEXT,
+    config TEXT,
+    processed_time REAL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS metrics_entity ON metrics(kind, entity, metric);
+CREATE INDEX IF NOT EXISTS metrics_run ON metrics(run_id);
+CREATE INDEX IF NOT EXISTS runs_start ON runs(start_time);
+'''
+
+Metric = Tuple[str, str, str, float]
+
+
+def get_catalog_path() -> str:
+    output_dir = os.environ.get('ROS_HOME')
+    if not output_dir:
+        output_dir = os.path.join('~', '.ros')
+    output_dir = os.path.join(output_dir, 'profile', 'catalog.db')
+    return os.path.normpath(os.path.expanduser(output_dir))
+
+
+def git_sha(directory: str) -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ['git', '-C', directory, 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def collect_run_metadata(launch_file: Optional[str]) -> Dict[str, Any]:
+    """
+    Describe the environment a profile run is launched from.
+    """
+    metadata = {
+        'start_time': time.time(),
+        'hostname': socket.gethostname(),
+        'ros_distro': os.environ.get('ROS_DISTRO'),
+        'launch_file': None,
+        'git_sha': None,
+    }
+    if launch_file:
+        launch_file = os.path.abspath(launch_file)
+        metadata['launch_file'] = launch_file
+        metadata['git_sha'] = git_sha(os.path.dirname(launch_file))
+    return metadata
+
+
+def write_run_metadata(output_dir: str, metadata: Dict[str, Any]) -> None:
+    with open(os.path.join(output_dir, RUN_METADATA), 'w', encoding='utf8') as f:
+        yaml.safe_dump(metadata, f)
+
+
+def read_run_metadata(input_path: str) -> Dict[str, Any]:
+    metadata_path = os.path.join(input_path, RUN_METADATA)
+    if not os.path.exists(metadata_path):
+        return {}
+    with open(metadata_path, 'r', encoding='utf8') as f:
+        return yaml.load(f, Loader=yaml.SafeLoader) or {}
+
+
+def _distribution_metrics(kind: str, entity: str, values: np.ndarray) -> List[Metric]:
+    percentiles = np.percentile(values, PERCENTILES)
+    metrics = [
+        (kind, entity, 'count', float(len(values))),
+        (kind, entity, 'mean', float(np.mean(values))),
+        (kind, entity, 'max', float(np.max(values))),
+    ]
+    for (percentile, value) in zip(PERCENTILES, percentiles):
+        metrics.append((kind, entity, f'p{percentile}', float(value)))
+    return metrics
+
+
+def summarize_graph(graph: Graph) -> List[Metric]:
+    """
+    Summarize a run as (kind, entity, metric, value) rows.
+
+    Entities are named the same way the diff matches them across runs, so
+    rows of one entity line up over months of runs.
+    """
+    metrics: List[Metric] = []
+    for (key, durations) in callback_durations(graph).items():
+        metrics.extend(_distribution_metrics('callback', ' '.join(key), durations))
+    for (key, latencies) in path_latencies(graph).items():
+        metrics.extend(_distribution_metrics('path', ' -> '.join(key), latencies))
+    for timer in graph.timers():
+        # Timers whose initialization or callback was not traced cannot be analyzed
+        if timer.callback is None or timer.period is None:
+            continue
+        analysis = timer.analysis()
+        if analysis.count == 0:
+            continue
+        entity = f'{timer.node.name} timer {timer.callback.symbol}'
+        for (metric, value) in analysis.summary().items():
+            metrics.append(('timer', entity, metric, float(value)))
+    return metrics
+
+
+class Catalog:
+    """
+    SQLite index of profile runs and their summary metrics.
+    """
+
+    def __init__(self, catalog_path: Optional[str] = None) -> None:
+        if catalog_path is None:
+            catalog_path = get_catalog_path()
+        os.makedirs(os.path.dirname(catalog_path), exist_ok=True)
+        self._connection: sqlite3.Connection = sqlite3.connect(catalog_path)
+        self._connection.execute('PRAGMA foreign_keys = ON')
+        self._connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add_run(self, input_path: str, graph: Graph) -> int:
+        """
+        Record a processed run, replacing any previous entry for the same directory.
+        """
+        input_path = os.path.abspath(input_path)
+        metadata = read_run_metadata(input_path)
+        config = None
+        config_path = os.path.join(input_path, 'config.yaml')
+        if os.path.exists(config_path):
+            with open(config_path, 'r', encoding='utf8') as f:
+                config = f.read()
+
+        start_time = metadata.get('start_time', os.path.getmtime(input_path))
+        metrics = summarize_graph(graph)
+        with self._connection:
+            self._connection.execute('DELETE FROM runs WHERE path = ?', (input_path,))
+            cursor = self._connection.execute(
+                'INSERT INTO runs (path, name, start_time, duration, git_sha, launch_file, '
+                'hostname, ros_distro, config, processed_time) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (input_path, os.path.basename(os.path.normpath(input_path)), start_time,
+                 metadata.get('duration'), metadata.get('git_sha'),
+                 metadata.get('launch_file'), metadata.get('hostname'),
+                 metadata.get('ros_distro'), config, time.time()))
+            run_id = cursor.lastrowid
+            if run_id is None:
+                raise sqlite3.DatabaseError(f'Failed to insert run: {input_path}')
+            self._connection.executemany(
+                'INSERT INTO metrics (run_id, kind, entity, metric, value) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(run_id,) + metric for metric in metrics])
+        return run_id
+
+    def runs(self, since: Optional[float] = None) -> List[Tuple[Any, ...]]:
+        """
+        List (run_id, path, start_time, duration, git_sha) of runs, oldest first.
+        """
+        return self._connection.execute(
+            'SELECT run_id, path, start_time, duration, git_sha FROM runs '
+            'WHERE start_time >= ? ORDER BY start_time',
+            (since or 0.0,)).fetchall()
+
+    def trend(
+        self,
+        entity: str,
+        metric: str = 'p99',
+        kind: Optional[str] = None,
+        since: Optional[float] = None,
+    ) -> List[Tuple[Any, ...]]:
+        """
+        Get (start_time, path, git_sha, kind, entity, value) rows of a metric over time.
+
+        :param entity: SQL LIKE pattern matched against entity names
+        """
+        query = ('SELECT r.start_time, r.path, r.git_sha, m.kind, m.entity, m.value '
+                 'FROM metrics m JOIN runs r ON m.run_id = r.run_id '
+                 'WHERE m.entity LIKE ? AND m.metric = ? AND r.start_time >= ?')
+        parameters: List[Any] = [entity, metric, since or 0.0]
+        if kind is not None:
+            query += ' AND m.kind = ?'
+            parameters.append(kind)
+        query += ' ORDER BY m.entity, r.start_time'
+        return self._connection.execute(query, parameters).fetchall()
+
+
+def update_catalog(input_path: str, graph: Graph, catalog_path: Optional[str] = None) -> None:
+    with Catalog(catalog_path) as catalog:
+        catalog.add_run(input_path, graph)
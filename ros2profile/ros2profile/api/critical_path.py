@@ -0,0 +1,265 @@
+# Copyright 2023 Open Source Robotics Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ros2profile.data.callback import CallbackEvent
+from ros2profile.data.causal_path import CausalPath, slowest_paths
+from ros2profile.data.graph import Graph
+
+EXECUTION = 'execution'
+SCHEDULER_WAIT = 'scheduler_wait'
+QUEUEING = 'queueing'
+TRANSPORT = 'transport'
+
+CATEGORIES = (EXECUTION, SCHEDULER_WAIT, QUEUEING, TRANSPORT)
+
+
+class Segment:
+    """
+    One hop of a causal path, with its latency split into categories per instance.
+
+    Callback segments run from the callback start to the publication that
+    continues the chain (or the callback end for the sink).  Transport segments
+    run from that publication to the subscriber reading the message, and
+    queueing segments from the read to the subscriber callback start.
+    """
+
+    def __init__(self, kind: str, name: str, node: str, count: int) -> None:
+        self.kind: str = kind
+        self.name: str = name
+        self.node: str = node
+        self.vtids: np.ndarray = np.full(count, -1, dtype=np.int64)
+        self.vpids: np.ndarray = np.full(count, -1, dtype=np.int64)
+        self.components: Dict[str, np.ndarray] = {
+            category: np.zeros(count, dtype=np.int64) for category in CATEGORIES
+        }
+
+    def total(self) -> np.ndarray:
+        """
+        Latency of this segment for every instance
+        """
+        return np.add.reduce(list(self.components.values()))
+
+    def __repr__(self) -> str:
+        return f'<Segment kind={self.kind} name={self.name} mean={np.mean(self.total()):.0f}>'
+
+
+class CriticalPathReport:
+    """
+    Latency attribution of the instances of a causal path
+    """
+
+    def __init__(self, path: CausalPath, latencies: np.ndarray, segments: List[Segment]) -> None:
+        self.path: CausalPath = path
+        self.latencies: np.ndarray = latencies
+        self.segments: List[Segment] = segments
+
+    def by_category(self) -> Dict[str, np.ndarray]:
+        """
+        Latency per category for every instance
+        """
+        totals = {category: np.zeros(len(self.latencies), dtype=np.int64)
+                  for category in CATEGORIES}
+        for segment in self.segments:
+            for category, values in segment.components.items():
+                totals[category] += values
+        return totals
+
+    def _group_by(self, attribute: str) -> Dict[int, int]:
+        totals: Dict[int, int] = defaultdict(int)
+        for segment in self.segments:
+            keys = getattr(segment, attribute)
+            total = segment.total()
+            for key in np.unique(keys):
+                totals[int(key)] += int(total[keys == key].sum())
+        return dict(totals)
+
+    def by_thread(self) -> Dict[int, int]:
+        """
+        Total latency attributed to each thread, summed over instances
+        """
+        return self._group_by('vtids')
+
+    def by_process(self) -> Dict[int, int]:
+        """
+        Total latency attributed to each process, summed over instances
+        """
+        return self._group_by('vpids')
+
+    def dominant_segment(self) -> Optional[Segment]:
+        """
+        The segment contributing the most latency on average
+        """
+        if not self.segments or len(self.latencies) == 0:
+            return None
+        return max(self.segments, key=lambda segment: np.mean(segment.total()))
+
+
+def _publish_end(event) -> int:
+    return max(v for (k, v) in event._stamps.items() if k != 'timestamp')
+
+
+def _split_callback_time(
+    graph: Graph, events: List[CallbackEvent], starts: np.ndarray, ends: np.ndarray,
+    segment: Segment
+) -> None:
+    spans = ends - starts
+    execution = spans.copy()
+    tids = np.array([-1 if ev.vtid is None else ev.vtid for ev in events], dtype=np.int64)
+    for tid in np.unique(tids):
+        schedule = graph.thread_schedule(int(tid))
+        if schedule is None:
+            continue
+        mask = tids == tid
+        execution[mask] = schedule.on_cpu_time(starts[mask], ends[mask])
+    segment.components[EXECUTION] = execution
+    segment.components[SCHEDULER_WAIT] = spans - execution
+
+
+def _split_transport_time(
+    graph: Graph, receivers: List[CallbackEvent], starts: np.ndarray, ends: np.ndarray,
+    segment: Segment
+) -> None:
+    spans = ends - starts
+    waits = np.zeros(len(spans), dtype=np.int64)
+    tids = np.array([-1 if ev.vtid is None else ev.vtid for ev in receivers], dtype=np.int64)
+    for tid in np.unique(tids):
+        schedule = graph.thread_schedule(int(tid))
+        if schedule is None:
+            continue
+        mask = tids == tid
+        waits[mask] = schedule.runqueue_delay(starts[mask], ends[mask])
+    waits = np.minimum(waits, np.maximum(spans, 0))
+    segment.components[TRANSPORT] = spans - waits
+    segment.components[SCHEDULER_WAIT] = waits
+
+
+def _ids(events: List[CallbackEvent], attribute: str) -> np.ndarray:
+    values = [getattr(ev, attribute) for ev in events]
+    return np.array([-1 if value is None else value for value in values], dtype=np.int64)
+
+
+def analyze_path(graph: Graph, path: CausalPath, percentile: float = 0.0) -> CriticalPathReport:
+    """
+    Attribute the latency of a causal path to execution, scheduler wait, queueing and transport.
+
+    :param graph: graph the path was discovered on
+    :param path: causal path to analyze
+    :param percentile: only analyze instances at or above this latency percentile
+    """
+    instances = path.instances
+    latencies = path.latencies
+    if percentile > 0 and len(latencies) > 0:
+        selected = latencies >= np.percentile(latencies, percentile)
+        instances = [chain for (chain, keep) in zip(instances, selected) if keep]
+        latencies = latencies[selected]
+
+    count = len(instances)
+    segments: List[Segment] = []
+    if count == 0:
+        return CriticalPathReport(path, latencies, segments)
+
+    hops = len(instances[0])
+    columns: List[List] = [[chain[idx] for chain in instances] for idx in range(hops)]
+
+    # Chains alternate callback, publish, subscription, callback, ...
+    for idx in range(0, hops, 3):
+        callbacks: List[CallbackEvent] = columns[idx]
+        callback = path.callbacks[idx // 3]
+        node = callback.source.node.name if callback.source is not None else ''
+        starts = np.fromiter((ev.start() for ev in callbacks), dtype=np.int64, count=count)
+
+        if idx + 1 < hops:
+            ends = np.fromiter(
+                (_publish_end(ev) for ev in columns[idx + 1]), dtype=np.int64, count=count)
+        else:
+            ends = np.fromiter((ev.end() for ev in callbacks), dtype=np.int64, count=count)
+
+        segment = Segment('callback', callback.symbol, node, count)
+        segment.vtids = _ids(callbacks, 'vtid')
+        segment.vpids = _ids(callbacks, 'vpid')
+        _split_callback_time(graph, callbacks, starts, ends, segment)
+        segments.append(segment)
+
+        if idx + 3 >= hops:
+            break
+
+        receivers: List[CallbackEvent] = columns[idx + 3]
+        topic = columns[idx + 1][0].source.name
+        reads = np.fromiter(
+            (ev.timestamp() for ev in columns[idx + 2]), dtype=np.int64, count=count)
+        receiver_starts = np.fromiter(
+            (ev.start() for ev in receivers), dtype=np.int64, count=count)
+        receiver_node = columns[idx + 2][0].source.node.name
+
+        transport = Segment('transport', topic, receiver_node, count)
+        transport.vtids = _ids(receivers, 'vtid')
+        transport.vpids = _ids(receivers, 'vpid')
+        _split_transport_time(graph, receivers, ends, reads, transport)
+        segments.append(transport)
+
+        queueing = Segment('queueing', topic, receiver_node, count)
+        queueing.vtids = transport.vtids
+        queueing.vpids = transport.vpids
+        queueing.components[QUEUEING] = receiver_starts - reads
+        segments.append(queueing)
+
+    return CriticalPathReport(path, latencies, segments)
+
+
+def analyze_critical_paths(
+    graph: Graph, count: int = 5, percentile: float = 99.0
+) -> List[CriticalPathReport]:
+    """
+    Analyze the slowest causal paths of a graph, ranked by a latency percentile
+    """
+    return [
+        analyze_path(graph, path, percentile)
+        for path in slowest_paths(graph.paths(), count, percentile)
+    ]
+
+
+def format_report(report: CriticalPathReport) -> List[Tuple[str, str]]:
+    """
+    Summarize a report as (label, value) rows, in milliseconds
+    """
+    rows = [('path', ' -> '.join(report.path.signature)),
+            ('instances', str(len(report.latencies)))]
+    if len(report.latencies) == 0:
+        return rows
+    rows.append(('mean latency', f'{np.mean(report.latencies) / 1e6:.3f} ms'))
+    rows.append(('max latency', f'{np.max(report.latencies) / 1e6:.3f} ms'))
+
+    total = max(int(report.latencies.sum()), 1)
+    for category, values in report.by_category().items():
+        rows.append((category, f'{np.mean(values) / 1e6:.3f} ms '
+                               f'({100 * values.sum() / total:.1f}%)'))
+
+    for segment in report.segments:
+        rows.append((f'  {segment.kind} {segment.node} {segment.name}',
+                     f'{np.mean(segment.total()) / 1e6:.3f} ms'))
+
+    dominant = report.dominant_segment()
+    if dominant is not None:
+        rows.append(('dominant segment', f'{dominant.kind} {dominant.node} {dominant.name}'))
+    for tid, value in sorted(report.by_thread().items(), key=lambda kv: -kv[1]):
+        rows.append((f'  thread {tid}', f'{100 * value / total:.1f}%'))
+    for pid, value in sorted(report.by_process().items(), key=lambda kv: -kv[1]):
+        rows.append((f'  process {pid}', f'{100 * value / total:.1f}%'))
+    return rows
@@ -0,0 +1,194 @@
+# Copyright 2023 Open Source Robotics Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+from typing import Dict, Mapping, Optional
+
+import numpy as np
+
+import pandas as pd
+
+from ros2profile.api.align import sample_times
+
+DERIVED_SUFFIX = '.derived'
+
+CPU_MEMORY_USAGE = '/cpu_memory_usage'
+IO_STATS = '/io_stats'
+MEMORY_STATE = '/memory_state'
+
+# Cumulative IO counters and the names of their per-second rates
+IO_RATES = {
+    'bytes_read': 'read_bytes_per_s',
+    'bytes_written': 'write_bytes_per_s',
+    'characters_read': 'read_chars_per_s',
+    'characters_written': 'write_chars_per_s',
+    'read_syscalls': 'read_syscalls_per_s',
+    'write_syscalls': 'write_syscalls_per_s',
+}
+
+
+def _deltas(values: np.ndarray) -> np.ndarray:
+    """
+    Differences between consecutive counter values, NaN where a counter went backwards.
+    """
+    deltas = np.diff(values.astype(np.float64))
+    deltas[deltas < 0] = np.nan
+    return deltas
+
+
+def _interval_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    times = sample_times(frame)
+    return pd.DataFrame({
+        'timestamp': times[1:],
+        'interval': np.diff(times),
+    })
+
+
+def cpu_rates(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    CPU utilization per sample interval, as a fraction of one core.
+
+    User and kernel time deltas are divided by the elapsed time delta of the
+    same sample, so the result does not depend on the unit topnode reports.
+    """
+    result = _interval_frame(frame)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        elapsed = _deltas(frame['elapsed_time'].to_numpy())
+        elapsed[elapsed == 0] = np.nan
+        user = _deltas(frame['user_mode_time'].to_numpy()) / elapsed
+        kernel = _deltas(frame['kernel_model_time'].to_numpy()) / elapsed
+    result['user_utilization'] = user
+    result['kernel_utilization'] = kernel
+    result['cpu_utilization'] = user + kernel
+    return result
+
+
+def io_rates(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    IO throughput and syscall rates per second over each sample interval.
+    """
+    result = _interval_frame(frame)
+    seconds = result['interval'].to_numpy() / 1e9
+    seconds[seconds == 0] = np.nan
+    for (counter, rate) in IO_RATES.items():
+        if counter in frame:
+            result[rate] = _deltas(frame[counter].to_numpy()) / seconds
+    return result
+
+
+def memory_growth(frame: pd.DataFrame, column: str) -> pd.DataFrame:
+    """
+    Growth per second of a memory size column over each sample interval.
+    """
+    result = _interval_frame(frame)
+    seconds = result['interval'].to_numpy() / 1e9
+    seconds[seconds == 0] = np.nan
+    values = frame[column].to_numpy(dtype=np.float64)
+    result[column] = values[1:]
+    result['growth_per_s'] = np.diff(values) / seconds
+    return result
+
+
+def linear_slope(times: np.ndarray, values: np.ndarray) -> float:
+    """
+    Least squares slope of values per second, e.g. to detect steady RSS growth from leaks.
+    """
+    if len(times) < 2:
+        return 0.0
+    seconds = (times - times[0]) / 1e9
+    seconds = seconds - seconds.mean()
+    denominator = np.dot(seconds, seconds)
+    if denominator == 0:
+        return 0.0
+    return float(np.dot(seconds, values - values.mean()) / denominator)
+
+
+def _find_topic(recording: Mapping[str, pd.DataFrame], suffix: str) -> Optional[pd.DataFrame]:
+    for topic in recording:
+        if topic.endswith(suffix):
+            frame = recording[topic]
+            return frame if len(frame) else None
+    return None
+
+
+def derive_metrics(recording: Mapping[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """
+    Compute per-interval rates of one topnode recording.
+
+    :return: cpu, io and memory interval frames for the topics the recording
+        has, plus a one row summary
+    """
+    derived = {}
+    summary = {}
+
+    cpu_memory = _find_topic(recording, CPU_MEMORY_USAGE)
+    if cpu_memory is not None:
+        cpu = cpu_rates(cpu_memory)
+        derived['cpu'] = cpu
+        summary['cpu_utilization_mean'] = float(cpu['cpu_utilization'].mean())
+        summary['cpu_utilization_max'] = float(cpu['cpu_utilization'].max())
+
+    io_stats = _find_topic(recording, IO_STATS)
+    if io_stats is not None:
+        io = io_rates(io_stats)
+        derived['io'] = io
+        for rate in IO_RATES.values():
+            if rate in io:
+                summary[f'{rate}_mean'] = float(io[rate].mean())
+
+    # Prefer the current resident size, the maximum only shows growth
+    memory_state = _find_topic(recording, MEMORY_STATE)
+    if memory_state is not None and 'resident_size' in memory_state:
+        (memory_frame, column) = (memory_state, 'resident_size')
+    elif cpu_memory is not None and 'max_resident_set_size' in cpu_memory:
+        (memory_frame, column) = (cpu_memory, 'max_resident_set_size')
+    else:
+        memory_frame = None
+    if memory_frame is not None:
+        derived['memory'] = memory_growth(memory_frame, column)
+        summary['rss_slope_per_s'] = linear_slope(
+            sample_times(memory_frame), memory_frame[column].to_numpy(dtype=np.float64))
+
+    derived['summary'] = pd.DataFrame([summary])
+    return derived
+
+
+def save_derived(base: str, derived: Dict[str, pd.DataFrame]) -> None:
+    """
+    Cache derived metrics of a recording next to its converted data.
+    """
+    path = base + DERIVED_SUFFIX
+    staging = path + '.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    for (name, frame) in derived.items():
+        frame.to_parquet(os.path.join(staging, name + '.parquet'), index=False)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(staging, path)
+
+
+def load_derived(base: str) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    Load cached derived metrics, or None when missing or older than the converted data.
+    """
+    path = base + DERIVED_SUFFIX
+    if not os.path.isdir(path):
+        return None
+    converted = base + '.converted'
+    if os.path.exists(converted) and os.path.getmtime(converted) > os.path.getmtime(path):
+        return None
+    return {
+        name[:-len('.parquet')]: pd.read_parquet(os.path.join(path, name))
+        for name in os.listdir(path) if name.endswith('.parquet')}
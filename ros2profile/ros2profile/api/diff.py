@@ -0,0 +1,294 @@
+# Copyright 2023 Open Source Robotics Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ros2profile.data.graph import Graph
+from ros2profile.data.timer import Timer
+
+Key = Tuple[str, ...]
+
+CALLBACK = 'callback'
+PATH = 'path'
+
+# Values drawn per batch of bootstrap replicates, keeps memory bounded on long runs
+BOOTSTRAP_BATCH_VALUES = 5_000_000
+
+
+def mann_whitney(a: np.ndarray, b: np.ndarray) -> Tuple[float, float]:
+    """
+    Two-sided Mann-Whitney U test using the normal approximation with tie correction.
+
+    :return: the p-value and the rank-biserial correlation of b relative to a,
+        positive when b tends to be larger
+    """
+    n_a = len(a)
+    n_b = len(b)
+    values = np.concatenate((a, b))
+    (_, inverse, counts) = np.unique(values, return_inverse=True, return_counts=True)
+    # Average rank of each unique value, ties share the mean of their ranks
+    ends = np.cumsum(counts)
+    ranks = (ends - (counts - 1) / 2.0)[inverse]
+
+    u_b = np.sum(ranks[n_a:]) - n_b * (n_b + 1) / 2.0
+    mean = n_a * n_b / 2.0
+    n = n_a + n_b
+    tie_term = np.sum(counts.astype(np.float64) ** 3 - counts) / (n * (n - 1))
+    var = n_a * n_b / 12.0 * ((n + 1) - tie_term)
+    effect = float(2.0 * u_b / (n_a * n_b) - 1.0)
+    if var <= 0:
+        return (1.0, effect)
+    z = (abs(u_b - mean) - 0.5) / math.sqrt(var)
+    return (min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2))), effect)
+
+
+def holm(p_values: np.ndarray) -> np.ndarray:
+    """
+    Holm-Bonferroni adjusted p-values, controlling the family-wise error rate.
+    """
+    p_values = np.asarray(p_values, dtype=np.float64)
+    count = len(p_values)
+    order = np.argsort(p_values, kind='stable')
+    scaled = p_values[order] * (count - np.arange(count))
+    adjusted = np.empty(count, dtype=np.float64)
+    adjusted[order] = np.minimum(np.maximum.accumulate(scaled), 1.0)
+    return adjusted
+
+
+def _bootstrap_medians(
+    rng: np.random.Generator, values: np.ndarray, resamples: int
+) -> np.ndarray:
+    batch = max(1, BOOTSTRAP_BATCH_VALUES // len(values))
+    medians = np.empty(resamples, dtype=np.float64)
+    for start in range(0, resamples, batch):
+        rows = min(batch, resamples - start)
+        indices = rng.integers(0, len(values), (rows, len(values)))
+        medians[start:start + rows] = np.median(values[indices], axis=1)
+    return medians
+
+
+def bootstrap_median_change(
+    a: np.ndarray,
+    b: np.ndarray,
+    resamples: int = 1000,
+    confidence: float = 0.95,
+    seed: Optional[int] = 0,
+) -> Tuple[float, float]:
+    """
+    Bootstrap confidence interval of the relative change in median from a to b.
+
+    Every replicate resamples all of a and b, drawn in batches of replicates
+    as index matrices.
+    """
+    rng = np.random.default_rng(seed)
+    medians_a = _bootstrap_medians(rng, a, resamples)
+    medians_b = _bootstrap_medians(rng, b, resamples)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = np.where(medians_a > 0, medians_b / medians_a - 1.0, 0.0)
+    alpha = (1.0 - confidence) / 2.0
+    (low, high) = np.quantile(change, [alpha, 1.0 - alpha])
+    return (float(low), float(high))
+
+
+class Comparison:
+    """
+    Distributions of one entity, matched across a baseline and a candidate run.
+    """
+
+    def __init__(self, kind: str, key: Key, baseline: np.ndarray, candidate: np.ndarray) -> None:
+        self._kind: str = kind
+        self._key: Key = key
+        self._baseline: np.ndarray = baseline
+        self._candidate: np.ndarray = candidate
+        self._p_value: float = 1.0
+        self._adjusted_p_value: float = 1.0
+        self._effect_size: float = 0.0
+        self._interval: Tuple[float, float] = (0.0, 0.0)
+        self._regression: bool = False
+        self._improvement: bool = False
+
+    @property
+    def kind(self) -> str:
+        """Entity kind, callback or path"""
+        return self._kind
+
+    @property
+    def key(self) -> Key:
+        """Identity of the entity, stable across runs"""
+        return self._key
+
+    @property
+    def name(self) -> str:
+        return ' -> '.join(self._key) if self._kind == PATH else ' '.join(self._key)
+
+    @property
+    def baseline(self) -> np.ndarray:
+        return self._baseline
+
+    @property
+    def candidate(self) -> np.ndarray:
+        return self._candidate
+
+    @property
+    def median_change(self) -> float:
+        """Relative change of the median from baseline to candidate"""
+        baseline = np.median(self._baseline)
+        if baseline <= 0:
+            return 0.0
+        return float(np.median(self._candidate) / baseline - 1.0)
+
+    @property
+    def p_value(self) -> float:
+        return self._p_value
+
+    @property
+    def adjusted_p_value(self) -> float:
+        """p-value adjusted for the other entities compared alongside this one"""
+        return self._adjusted_p_value
+
+    @property
+    def effect_size(self) -> float:
+        """Rank-biserial correlation, positive when the candidate is slower"""
+        return self._effect_size
+
+    @property
+    def interval(self) -> Tuple[float, float]:
+        """Bootstrap confidence interval of the median change"""
+        return self._interval
+
+    @property
+    def regression(self) -> bool:
+        return self._regression
+
+    @property
+    def improvement(self) -> bool:
+        return self._improvement
+
+    def evaluate(
+        self,
+        alpha: float,
+        threshold: float,
+        resamples: int,
+        seed: Optional[int] = 0,
+    ) -> None:
+        """
+        Test the candidate against the baseline.
+
+        A significant change must pass the Mann-Whitney test at alpha, shift
+        the median by more than threshold and have a bootstrap interval that
+        excludes zero.
+        """
+        (self._p_value, self._effect_size) = mann_whitney(self._baseline, self._candidate)
+        self._interval = bootstrap_median_change(
+            self._baseline, self._candidate, resamples, 1.0 - alpha, seed)
+        self.adjust(self._p_value, alpha, threshold)
+
+    def adjust(self, adjusted_p_value: float, alpha: float, threshold: float) -> None:
+        """
+        Classify the change again with a p-value corrected for multiple comparisons.
+        """
+        self._adjusted_p_value = adjusted_p_value
+        significant = adjusted_p_value < alpha
+        change = self.median_change
+        self._regression = significant and change > threshold and self._interval[0] > 0
+        self._improvement = significant and change < -threshold and self._interval[1] < 0
+
+    def __repr__(self) -> str:
+        return (f'Comparison({self._kind}: {self.name}, change={self.median_change:+.1%}, '
+                f'p={self._p_value:.3g})')
+
+
+def callback_durations(graph: Graph) -> Dict[Key, np.ndarray]:
+    """
+    Collect callback durations keyed by node, trigger and symbol.
+
+    Callbacks that share a key within a run are pooled.
+    """
+    durations: Dict[Key, List[np.ndarray]] = defaultdict(list)
+    for callback in graph.callbacks:
+        source = callback.source
+        events = callback.events()
+        if source is None or not events:
+            continue
+        trigger = 'timer' if isinstance(source, Timer) else source.name
+        key = (source.node.name, trigger, callback.symbol)
+        starts = np.array([event.start() for event in events], dtype=np.int64)
+        ends = np.array([event.end() for event in events], dtype=np.int64)
+        durations[key].append(ends - starts)
+    return {key: np.concatenate(values) for (key, values) in durations.items()}
+
+
+def path_latencies(graph: Graph) -> Dict[Key, np.ndarray]:
+    """
+    Collect causal path latencies keyed by path signature.
+    """
+    latencies: Dict[Key, List[np.ndarray]] = defaultdict(list)
+    for path in graph.paths():
+        if len(path.latencies):
+            latencies[path.signature].append(path.latencies)
+    return {key: np.concatenate(values) for (key, values) in latencies.items()}
+
+
+def compare_graphs(
+    baseline: Graph,
+    candidate: Graph,
+    alpha: float = 0.01,
+    threshold: float = 0.05,
+    min_samples: int = 20,
+    resamples: int = 1000,
+    seed: Optional[int] = 0,
+) -> List[Comparison]:
+    """
+    Compare callback durations and path latencies of entities present in both runs.
+
+    Each entity is tested separately, so the p-values are Holm adjusted over
+    all comparisons before classifying them, keeping the chance of reporting
+    any false regression at alpha.
+
+    :return: comparisons ordered by descending median change
+    """
+    comparisons = []
+    for (kind, collect) in ((CALLBACK, callback_durations), (PATH, path_latencies)):
+        baseline_values = collect(baseline)
+        candidate_values = collect(candidate)
+        for key in sorted(baseline_values.keys() & candidate_values.keys()):
+            a = baseline_values[key]
+            b = candidate_values[key]
+            if len(a) < min_samples or len(b) < min_samples:
+                continue
+            comparison = Comparison(kind, key, a, b)
+            comparison.evaluate(alpha, threshold, resamples, seed)
+            comparisons.append(comparison)
+    adjusted = holm(np.array([comparison.p_value for comparison in comparisons]))
+    for (comparison, p_value) in zip(comparisons, adjusted):
+        comparison.adjust(float(p_value), alpha, threshold)
+    comparisons.sort(key=lambda comparison: comparison.median_change, reverse=True)
+    return comparisons
+
+
+def format_comparison(comparison: Comparison) -> str:
+    if comparison.regression:
+        status = 'REGRESSION'
+    elif comparison.improvement:
+        status = 'improved'
+    else:
+        status = 'ok'
+    (low, high) = comparison.interval
+    return (f'{status:<10}  {comparison.kind:<8}  {comparison.median_change:+8.1%}  '
+            f'[{low:+.1%}, {high:+.1%}]  p={comparison.adjusted_p_value:<9.3g}  '
+            f'r={comparison.effect_size:+.2f}  {comparison.name}')
@@ -0,0 +1,343 @@
+# Copyright 2023 Open Source Robotics Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import os
+import pickle
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+# Where a stage runs
+MAIN = 'main'
+THREAD = 'thread'
+PROCESS = 'process'
+
+# Outcome of a stage
+RAN = 'ran'
+LOADED = 'loaded'
+CACHED = 'cached'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+BLOCKED = 'blocked'
+
+
+def save_pickle(value: Any, path: str) -> None:
+    with open(path, 'wb') as f:
+        p = pickle.Pickler(f, protocol=4)
+        p.dump(value)
+
+
+def load_pickle(path: str) -> Any:
+    with open(path, 'rb') as f:
+        p = pickle.Unpickler(f)
+        return p.load()
+
+
+def _timed(func: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    value = func(*args)
+    return (value, time.perf_counter() - start)
+
+
+class Stage:
+    """
+    One step of a pipeline, called with its arguments followed by the values of its inputs.
+
+    Stages with an output path persist their value there and are reused on
+    later runs while the path exists. Stages without one are ephemeral and
+    only run when a stage that runs needs their value, or, for sinks, on
+    every run unless run_if_inputs_ran restricts them to runs where one of
+    their inputs was recomputed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        args: Sequence[Any] = (),
+        inputs: Sequence[str] = (),
+        pool: str = THREAD,
+        output: Optional[str] = None,
+        save: Optional[Callable[[Any, str], None]] = save_pickle,
+        load: Optional[Callable[[str], Any]] = load_pickle,
+        run_if_inputs_ran: bool = False,
+    ) -> None:
+        self.name: str = name
+        self.func: Callable[..., Any] = func
+        self.args: Tuple[Any, ...] = tuple(args)
+        self.inputs: Tuple[str, ...] = tuple(inputs)
+        self.pool: str = pool
+        self.output: Optional[str] = output
+        self.save: Optional[Callable[[Any, str], None]] = save
+        self.load: Optional[Callable[[str], Any]] = load
+        self.run_if_inputs_ran: bool = run_if_inputs_ran
+
+    @property
+    def cached(self) -> bool:
+        return self.output is not None and os.path.exists(self.output)
+
+    def __repr__(self) -> str:
+        return f'Stage({self.name}, inputs={list(self.inputs)}, pool={self.pool})'
+
+
+class StageResult:
+    def __init__(self, name: str, status: str, seconds: float = 0.0) -> None:
+        self.name: str = name
+        self.status: str = status
+        self.seconds: float = seconds
+
+    def __repr__(self) -> str:
+        return f'StageResult({self.name}, {self.status}, {self.seconds:.3f}s)'
+
+
+class PipelineReport:
+    def __init__(self, results: List[StageResult], seconds: float) -> None:
+        self._results: List[StageResult] = results
+        self._seconds: float = seconds
+
+    @property
+    def results(self) -> List[StageResult]:
+        """Stage results in pipeline order"""
+        return self._results
+
+    @property
+    def seconds(self) -> float:
+        """Wall time of the whole pipeline"""
+        return self._seconds
+
+    def format(self) -> List[str]:
+        if not self._results:
+            return []
+        width = max(len(result.name) for result in self._results)
+        lines = [f'{result.name:<{width}}  {result.status:<7}  {result.seconds:9.3f}s'
+                 for result in self._results]
+        lines.append(f'{"total":<{width}}  {"":<7}  {self._seconds:9.3f}s')
+        return lines
+
+
+class PipelineError(RuntimeError):
+    """
+    Raised once a pipeline has finished every stage it could, when some failed.
+    """
+
+    def __init__(self, failures: Dict[str, BaseException], report: PipelineReport) -> None:
+        stages = ', '.join(f'{name} ({error!r})' for (name, error) in failures.items())
+        super().__init__(f'Pipeline stages failed: {stages}')
+        self.failures: Dict[str, BaseException] = failures
+        self.report: PipelineReport = report
+
+
+class Pipeline:
+    """
+    Declarative DAG of stages, run by a scheduler that starts every stage as
+    soon as its inputs are available.
+
+    Thread stages share a thread pool and process stages a process pool, so
+    independent stages overlap. Values are released once every stage
+    consuming them has finished.
+    """
+
+    def __init__(self, stages: Sequence[Stage]) -> None:
+        self._stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self._stages:
+                raise ValueError(f'Duplicate stage: {stage.name}')
+            self._stages[stage.name] = stage
+        for stage in stages:
+            for name in stage.inputs:
+                if name not in self._stages:
+                    raise ValueError(f'Stage {stage.name} has unknown input: {name}')
+        self._order: List[str] = self._topological_order()
+
+    @property
+    def stages(self) -> List[Stage]:
+        return [self._stages[name] for name in self._order]
+
+    def _topological_order(self) -> List[str]:
+        pending = {name: len(stage.inputs) for (name, stage) in self._stages.items()}
+        order = [name for (name, count) in pending.items() if count == 0]
+        for name in order:
+            for (other, stage) in self._stages.items():
+                if name in stage.inputs:
+                    pending[other] -= stage.inputs.count(name)
+                    if pending[other] == 0:
+                        order.append(other)
+        if len(order) != len(self._stages):
+            raise ValueError('Pipeline stages form a cycle')
+        return order
+
+    def _consumers(self, name: str) -> List[str]:
+        return [other for other in self._order if name in self._stages[other].inputs]
+
+    def plan(self) -> Dict[str, str]:
+        """
+        Decide what happens to each stage: RAN, LOADED, CACHED or SKIPPED.
+        """
+        will_run = {name: not self._stages[name].cached for name in self._order}
+        # Ephemeral stages depend on their neighbours, iterate to a fixed point
+        changed = True
+        while changed:
+            changed = False
+            for name in self._order:
+                stage = self._stages[name]
+                consumers = self._consumers(name)
+                if stage.output is not None:
+                    # A cached output without a loader is recomputed for its consumers
+                    if stage.load is not None or not stage.cached:
+                        continue
+                    run = any(will_run[consumer] for consumer in consumers)
+                elif consumers:
+                    run = any(will_run[consumer] for consumer in consumers)
+                elif stage.run_if_inputs_ran:
+                    run = any(will_run[input_name] for input_name in stage.inputs)
+                else:
+                    run = True
+                if run != will_run[name]:
+                    will_run[name] = run
+                    changed = True
+
+        plan = {}
+        for name in self._order:
+            if will_run[name]:
+                plan[name] = RAN
+            elif self._stages[name].cached and any(
+                    will_run[consumer] for consumer in self._consumers(name)):
+                plan[name] = LOADED
+            elif self._stages[name].cached:
+                plan[name] = CACHED
+            else:
+                plan[name] = SKIPPED
+        return plan
+
+    def run(self, jobs: Optional[int] = None) -> PipelineReport:
+        """
+        Run the stages that are not cached.
+
+        A failing stage does not stop the others: stages that do not depend on
+        it still run and save their outputs, its dependents are BLOCKED, and a
+        PipelineError carrying the report is raised at the end.
+
+        :param jobs: workers per pool, default one per CPU; 0 runs every stage
+            serially in the calling thread
+        """
+        if jobs is not None and jobs < 0:
+            raise ValueError(f'jobs must not be negative: {jobs}')
+        start = time.perf_counter()
+        plan = self.plan()
+        results = [StageResult(name, status) for (name, status) in plan.items()
+                   if status in (CACHED, SKIPPED)]
+        active = [name for name in self._order if plan[name] in (RAN, LOADED)]
+
+        workers = jobs or os.cpu_count() or 1
+        pools: Dict[str, Any] = {}
+        if jobs != 0:
+            pools[THREAD] = ThreadPoolExecutor(max_workers=workers)
+            if any(self._stages[name].pool == PROCESS and plan[name] == RAN for name in active):
+                pools[PROCESS] = ProcessPoolExecutor(max_workers=workers)
+
+        values: Dict[str, Any] = {}
+        remaining = {
+            name: sum(1 for consumer in self._consumers(name) if plan[consumer] == RAN)
+            for name in active}
+        waiting = list(active)
+        running: Dict[Any, str] = {}
+        failures: Dict[str, BaseException] = {}
+        blocked: Set[str] = set()
+        try:
+            while waiting or running:
+                started = False
+                for name in list(waiting):
+                    stage = self._stages[name]
+                    if plan[name] == RAN and any(
+                            input_name in failures or input_name in blocked
+                            for input_name in stage.inputs):
+                        waiting.remove(name)
+                        started = True
+                        blocked.add(name)
+                        results.append(StageResult(name, BLOCKED))
+                        continue
+                    if plan[name] == RAN and any(
+                            input_name not in values for input_name in stage.inputs):
+                        continue
+                    waiting.remove(name)
+                    started = True
+                    if plan[name] == LOADED and stage.load is not None:
+                        (func, args, pool) = (stage.load, (stage.output,), THREAD)
+                    else:
+                        args = stage.args + tuple(values[i] for i in stage.inputs)
+                        (func, pool) = (stage.func, stage.pool)
+                    if pool in pools:
+                        running[pools[pool].submit(_timed, func, *args)] = name
+                    else:
+                        self._complete(
+                            name, plan, lambda: _timed(func, *args), values, remaining,
+                            results, failures)
+                if not running:
+                    if not started:
+                        raise RuntimeError(f'Pipeline stages can not start: {waiting}')
+                    continue
+                (done, _) = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    self._complete(
+                        name, plan, future.result, values, remaining, results, failures)
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+        results.sort(key=lambda result: self._order.index(result.name))
+        report = PipelineReport(results, time.perf_counter() - start)
+        if failures:
+            raise PipelineError(failures, report) from next(iter(failures.values()))
+        return report
+
+    def _complete(
+        self,
+        name: str,
+        plan: Dict[str, str],
+        result: Callable[[], Tuple[Any, float]],
+        values: Dict[str, Any],
+        remaining: Dict[str, int],
+        results: List[StageResult],
+        failures: Dict[str, BaseException],
+    ) -> None:
+        try:
+            self._finish(name, plan, result(), values, remaining, results)
+        except Exception as e:
+            failures[name] = e
+            results.append(StageResult(name, FAILED))
+
+    def _finish(
+        self,
+        name: str,
+        plan: Dict[str, str],
+        timed: Tuple[Any, float],
+        values: Dict[str, Any],
+        remaining: Dict[str, int],
+        results: List[StageResult],
+    ) -> None:
+        (value, seconds) = timed
+        stage = self._stages[name]
+        if plan[name] == RAN and stage.output is not None and stage.save is not None:
+            save_start = time.perf_counter()
+            stage.save(value, stage.output)
+            seconds += time.perf_counter() - save_start
+        results.append(StageResult(name, plan[name], seconds))
+
+        if remaining.get(name):
+            values[name] = value
+        if plan[name] == RAN:
+            for input_name in stage.inputs:
+                remaining[input_name] -= 1
+                if remaining[input_name] == 0:
+                    values.pop(input_name, None)
@@ -12,150 +12,407 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from collections.abc import Mapping
+from datetime import datetime
 import glob
+import importlib.util
 import os
 import pickle
+import shutil
+from urllib.parse import quote, unquote
 
+from mcap.reader import make_reader
 import mcap_ros2.reader
 
+import numpy as np
+
 import pandas as pd
 
+from ros2profile.api.catalog import update_catalog
+from ros2profile.api.derived import derive_metrics, load_derived, save_derived
+from ros2profile.api.pipeline import PROCESS, Pipeline, Stage
 from ros2profile.data.convert.ctf import load_ctf
+from ros2profile.data.convert.mcap import ColumnTable, MessageFlattener
 from ros2profile.data import build_graph
 
+EVENT_GRAPH = 'event_graph'
+EVENT_TABLES = 'event_tables'
+
+CONVERTED_SUFFIX = '.converted'
+PARQUET_SUFFIX = '.parquet'
+
+# Columns kept by every projection, the log time as a datetime and in nanoseconds
+LOG_TIME_COLUMNS = ('_log_time', '_log_time_ns')
+
+
+# Column names of topnode fields that differ from their flattened paths
+TOPNODE_COLUMNS = {
+    'topnode_interfaces/msg/CpuMemoryUsage': {
+        'cpu_usage.elapsed_time': 'elapsed_time',
+        'cpu_usage.user_mode_time': 'user_mode_time',
+        'cpu_usage.total_user_mode_time': 'total_user_mode_time',
+        'cpu_usage.kernel_mode_time': 'kernel_model_time',
+        'cpu_usage.total_kernel_mode_time': 'total_kernel_mode_time',
+        'cpu_usage.percent': 'cpu_percent',
+        'cpu_usage.load_average.last_1min': 'load_avg_1min',
+        'cpu_usage.load_average.last_5min': 'load_avg_5min',
+        'cpu_usage.load_average.last_15min': 'load_avg_15min',
+        'cpu_usage.load_average.task_counts': 'task_counts',
+        'cpu_usage.load_average.available_tasks': 'available_tasks',
+        'cpu_usage.load_average.last_created_task': 'last_created_task',
+        'memory_usage.max_resident_set_size': 'max_resident_set_size',
+        'memory_usage.shared_size': 'shared_size',
+        'memory_usage.virtual_size': 'virtual_size',
+        'memory_usage.percent': 'memory_percent',
+    },
+}
 
-def process_memory_state(msg):
-    return {
-        '_log_time': msg.log_time,
-        'total_program_size': msg.ros_msg.total_program_size,
-        'resident_size': msg.ros_msg.resident_size,
-        'shared_page_count': msg.ros_msg.shared_page_count,
-        'text_size': msg.ros_msg.text_size,
-        'lib_size': msg.ros_msg.lib_size,
-        'data_size': msg.ros_msg.data_size,
-        'dirty_pages': msg.ros_msg.dirty_pages
-    }
-
-
-def process_io_stats(msg):
-    return {
-        '_log_time': msg.log_time,
-        'bytes_read': msg.ros_msg.bytes_read,
-        'bytes_written': msg.ros_msg.bytes_written,
-        'characters_read': msg.ros_msg.characters_read,
-        'characters_written': msg.ros_msg.characters_written,
-        'read_syscalls': msg.ros_msg.read_syscalls,
-        'write_syscalls': msg.ros_msg.write_syscalls,
-        'cancelled_byte_writes': msg.ros_msg.cancelled_byte_writes
-    }
-
-
-def process_stat(msg):
-    return {
-        '_log_time': msg.log_time,
-    }
+FLATTENER = MessageFlattener()
+for (schema_name, columns) in TOPNODE_COLUMNS.items():
+    FLATTENER.register_schema(schema_name, columns)
+
+
+def register_schema(schema_name, columns=None, extractor=None, fields=None):
+    """
+    Override how messages of a schema are converted from recordings.
+
+    Must be called before process() converts the recordings, and at import
+    time of a module when the conversion runs in worker processes.
+    See MessageFlattener.register_schema for the arguments.
+    """
+    FLATTENER.register_schema(schema_name, columns, extractor, fields)
+
+
+def match_topics(topics, available):
+    """
+    Resolve requested topic names against the topics of a recording.
+
+    Names starting with '~/' match that suffix under any namespace, so
+    '~/cpu_memory_usage' selects the topic of every topnode instance.
+    """
+    if topics is None:
+        return None
+    matched = set()
+    for topic in topics:
+        if topic.startswith('~/'):
+            suffix = topic[1:]
+            matched.update(name for name in available if name.endswith(suffix))
+        elif topic in available:
+            matched.add(topic)
+    return matched
+
+
+def read_summary(input_file):
+    """
+    Get the topics and message time range of a recording from its summary.
+
+    Returns None when the file has no summary, e.g. when recording was interrupted.
+    """
+    with open(input_file, 'rb') as f:
+        try:
+            summary = make_reader(f).get_summary()
+        except Exception:
+            return None
+    if summary is None:
+        return None
+    topics = {channel.topic for channel in summary.channels.values()}
+    statistics = summary.statistics
+    if statistics is None or statistics.message_count == 0:
+        return (topics, None, None)
+    return (topics, statistics.message_start_time, statistics.message_end_time)
+
+
+def process_one(input_file, topics=None, start_time=None, end_time=None):
+    """
+    Convert the messages of one recording into a DataFrame per topic.
+
+    Messages can be restricted to topics (see match_topics) and to log times
+    in [start_time, end_time) nanoseconds. Files whose summary shows no
+    matching messages are skipped without reading, otherwise the reader uses
+    the chunk indexes to decode only chunks that overlap the filter.
+    """
+    tables = {}
+
+    reader_topics = None
+    if topics is not None or start_time is not None or end_time is not None:
+        summary = read_summary(input_file)
+        if summary is not None:
+            (available, first_time, last_time) = summary
+            if topics is not None:
+                reader_topics = match_topics(topics, available)
+                if not reader_topics:
+                    return {}
+            if first_time is not None:
+                after_end = end_time is not None and first_time >= end_time
+                before_start = start_time is not None and last_time < start_time
+                if after_end or before_start:
+                    return {}
+        elif topics is not None and not any(topic.startswith('~/') for topic in topics):
+            reader_topics = topics
+
+    messages = mcap_ros2.reader.read_ros2_messages(
+        input_file, topics=reader_topics, start_time=start_time, end_time=end_time)
+    for msg in messages:
+        topic = msg.channel.topic
 
+        if topic not in tables:
+            if topics is not None and not match_topics(topics, {topic}):
+                tables[topic] = None
+                continue
+            (fields, extractor) = FLATTENER.extractor(msg.schema.name, msg)
+            tables[topic] = (ColumnTable(fields), extractor)
+
+        if tables[topic] is None:
+            continue
+        (table, extractor) = tables[topic]
+        table.append(extractor(msg))
 
-def process_cpu_memory_usage(msg):
     return {
-        '_log_time': msg.log_time,
-        'pid': msg.ros_msg.pid,
-        'elapsed_time': msg.ros_msg.cpu_usage.elapsed_time,
-        'user_mode_time': msg.ros_msg.cpu_usage.user_mode_time,
-        'total_user_mode_time': msg.ros_msg.cpu_usage.total_user_mode_time,
-        'kernel_model_time': msg.ros_msg.cpu_usage.kernel_mode_time,
-        'total_kernel_mode_time': msg.ros_msg.cpu_usage.total_kernel_mode_time,
-        'cpu_percent': msg.ros_msg.cpu_usage.percent,
-        'load_avg_1min': msg.ros_msg.cpu_usage.load_average.last_1min,
-        'load_avg_5min': msg.ros_msg.cpu_usage.load_average.last_5min,
-        'load_avg_15min': msg.ros_msg.cpu_usage.load_average.last_15min,
-        'task_counts': msg.ros_msg.cpu_usage.load_average.task_counts,
-        'available_tasks': msg.ros_msg.cpu_usage.load_average.available_tasks,
-        'last_created_task': msg.ros_msg.cpu_usage.load_average.last_created_task,
-
-
-        'max_resident_set_size': msg.ros_msg.memory_usage.max_resident_set_size,
-        'shared_size': msg.ros_msg.memory_usage.shared_size,
-        'virtual_size': msg.ros_msg.memory_usage.virtual_size,
-        'memory_percent': msg.ros_msg.memory_usage.percent
-    }
-
-
-PROCESSORS = {
-    'topnode_interfaces/msg/MemoryState': process_memory_state,
-    'topnode_interfaces/msg/IoStats': process_io_stats,
-    'topnode_interfaces/msg/CpuMemoryUsage': process_cpu_memory_usage,
-    'topnode_interfaces/msg/Stat': process_stat
-}
+        topic: entry[0].to_frame() for (topic, entry) in tables.items() if entry is not None}
 
 
-def process_one(input_file):
-    data = {}
+def _topic_file(topic):
+    return quote(topic, safe='') + PARQUET_SUFFIX
 
-    for msg in mcap_ros2.reader.read_ros2_messages(input_file):
-        schema = msg.schema.name
-        topic = msg.channel.topic
 
-        if topic not in data:
-            data[topic] = []
+def save_converted(base, data):
+    """
+    Store the converted topics of one recording as one Parquet file per topic.
 
-        if schema in PROCESSORS:
-            data[topic].append(PROCESSORS[schema](msg))
+    Files are written to a temporary directory that is renamed into place, so
+    an interrupted conversion is never mistaken for a finished one. Without
+    pyarrow, the topics are pickled together as before.
+    """
+    converted = base + CONVERTED_SUFFIX
+    if importlib.util.find_spec('pyarrow') is None:
+        with open(converted, 'wb') as f:
+            p = pickle.Pickler(f, protocol=4)
+            p.dump(data)
+        return
 
-    for (topic, values) in data.items():
-        data[topic] = pd.DataFrame.from_dict(values)
+    staging = converted + '.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    for (topic, frame) in data.items():
+        frame.to_parquet(os.path.join(staging, _topic_file(topic)), index=False)
+    os.replace(staging, converted)
 
-    return data
 
+def convert_one(base):
+    data = process_one(base + '.mcap')
+    save_converted(base, data)
+    if importlib.util.find_spec('pyarrow') is not None:
+        save_derived(base, derive_metrics(data))
+    return base
 
-def process(input_path):
-    mcap_files = glob.glob(input_path + '*.mcap')
 
-    to_process = []
-    for mcap_file in mcap_files:
-        base = os.path.splitext(mcap_file)[0]
-        if not os.path.exists(base + '.converted'):
-            to_process.append(base)
-    print(f'Processing {len(to_process)} topnode files ({len(mcap_files)} cached)')
+def _graph_tables(graph):
+    return graph.tables()
 
-    for mcap_file in to_process:
-        base = os.path.splitext(mcap_file)[0]
-        data = process_one(mcap_file + '.mcap')
 
-        with open(base + '.converted', 'wb') as f:
-            p = pickle.Pickler(f, protocol=4)
-            p.dump(data)
-
-    if not os.path.exists(os.path.join(input_path, 'event_graph')):
-        events = load_ctf(input_path)
-        graph = build_graph(events)
-        with open(os.path.join(input_path, 'event_graph'), 'wb') as f:
-            p = pickle.Pickler(f, protocol=4)
-            p.dump(graph)
+def processing_pipeline(input_path):
+    """
+    Describe the processing of a profile directory as a pipeline of stages.
 
-
-def load_mcap_data(input_path):
+    Each topnode recording is converted in its own process stage, independent
+    of the CTF decoding that feeds the event graph. The graph and its columnar
+    tables are persisted, so a later run only redoes missing outputs, and the
+    run catalog is updated whenever the graph is rebuilt.
+    """
+    stages = []
+    for mcap_file in sorted(glob.glob(input_path + '*.mcap')):
+        base = os.path.splitext(mcap_file)[0]
+        stages.append(Stage(
+            f'convert {os.path.basename(base)}', convert_one, args=(base,), pool=PROCESS,
+            output=base + CONVERTED_SUFFIX, save=None, load=None))
+
+    stages.extend([
+        Stage('decode ctf', load_ctf, args=(input_path,)),
+        Stage('build graph', build_graph, inputs=('decode ctf',),
+              output=os.path.join(input_path, EVENT_GRAPH)),
+        # Columnar copy of the graph, loadable without building Python objects
+        Stage('event tables', _graph_tables, inputs=('build graph',),
+              output=os.path.join(input_path, EVENT_TABLES)),
+        # A catalog failure is reported like any other stage, after the graph and
+        # its tables have been saved
+        Stage('catalog', update_catalog, args=(input_path,), inputs=('build graph',),
+              run_if_inputs_ran=True),
+    ])
+    return Pipeline(stages)
+
+
+def process(input_path, jobs=None):
+    """
+    Convert topnode recordings and build the event graph of a profile directory.
+
+    Independent stages run concurrently, with MCAP files converted in a pool
+    of jobs worker processes (default: one per CPU). With jobs=0 everything
+    runs serially.
+
+    :return: the per-stage timings
+    :raises PipelineError: when stages failed, once the others have finished
+    """
+    pipeline = processing_pipeline(input_path)
+    conversions = [stage for stage in pipeline.stages if stage.pool == PROCESS]
+    to_process = [stage for stage in conversions if not stage.cached]
+    cached = len(conversions) - len(to_process)
+    print(f'Processing {len(to_process)} topnode files ({cached} cached)')
+    return pipeline.run(jobs)
+
+
+def _log_time_bound(times, timestamp):
+    if pd.api.types.is_datetime64_any_dtype(times):
+        # Frames converted before integer log times were kept only have the
+        # reader's naive local datetimes, so the bound is built in local time
+        # too.  Whole seconds and nanoseconds are converted separately, as a
+        # float of the full timestamp would lose sub-microsecond precision.
+        (seconds, nanoseconds) = divmod(int(timestamp), 10**9)
+        return pd.Timestamp(datetime.fromtimestamp(seconds)) + pd.Timedelta(nanoseconds, unit='ns')
+    return timestamp
+
+
+def _filter_time(frame, start_time, end_time):
+    if start_time is None and end_time is None:
+        return frame
+    if '_log_time_ns' in frame:
+        times = frame['_log_time_ns']
+    elif '_log_time' in frame:
+        times = frame['_log_time']
+    else:
+        return frame
+    mask = np.ones(len(times), dtype=bool)
+    if start_time is not None:
+        mask &= (times >= _log_time_bound(times, start_time)).to_numpy()
+    if end_time is not None:
+        mask &= (times < _log_time_bound(times, end_time)).to_numpy()
+    return frame[mask]
+
+
+class RecordingData(Mapping):
+    """
+    Topics of one topnode recording, each loaded on first access.
+
+    Data is read from per-topic Parquet files when the recording has been
+    converted, from a legacy pickle, or else decoded from the MCAP file.
+    """
+
+    def __init__(self, base, topics=None, start_time=None, end_time=None, columns=None):
+        self._base = base
+        self._start_time = start_time
+        self._end_time = end_time
+        self._columns = columns
+        self._frames = {}
+
+        converted = base + CONVERTED_SUFFIX
+        if os.path.isdir(converted):
+            available = {
+                unquote(name[:-len(PARQUET_SUFFIX)]): os.path.join(converted, name)
+                for name in os.listdir(converted) if name.endswith(PARQUET_SUFFIX)}
+            self._files = available
+        else:
+            self._files = None
+            if os.path.isfile(converted):
+                with open(converted, 'rb') as f:
+                    p = pickle.Unpickler(f)
+                    self._frames = p.load()
+                available = self._frames.keys()
+            else:
+                summary = read_summary(base + '.mcap')
+                if summary is None:
+                    self._frames = process_one(base + '.mcap', topics, start_time, end_time)
+                    available = self._frames.keys()
+                else:
+                    available = summary[0]
+
+        self._topics = sorted(
+            match_topics(topics, available) if topics is not None else available)
+
+    def _project(self, frame):
+        if self._columns is None:
+            return frame
+        return frame[[column for column in frame.columns
+                      if column in LOG_TIME_COLUMNS or column in self._columns]]
+
+    def __getitem__(self, topic):
+        if topic not in self._topics:
+            raise KeyError(topic)
+        if topic in self._frames:
+            frame = self._frames[topic]
+        elif self._files is not None:
+            path = self._files[topic]
+            columns = None
+            if self._columns is not None:
+                import pyarrow.parquet
+                names = pyarrow.parquet.read_schema(path).names
+                columns = [name for name in names
+                           if name in LOG_TIME_COLUMNS or name in self._columns]
+            frame = pd.read_parquet(path, columns=columns)
+        else:
+            # One pass over the recording decodes every selected topic
+            self._frames.update(process_one(
+                self._base + '.mcap', self._topics, self._start_time, self._end_time))
+            frame = self._frames.get(topic, pd.DataFrame())
+        frame = self._project(_filter_time(frame, self._start_time, self._end_time))
+        self._frames[topic] = frame
+        return frame
+
+    def __iter__(self):
+        return iter(self._topics)
+
+    def __len__(self):
+        return len(self._topics)
+
+    def __repr__(self):
+        return f'RecordingData({os.path.basename(self._base)}: {self._topics})'
+
+
+def load_mcap_data(input_path, topics=None, start_time=None, end_time=None, columns=None):
+    """
+    Load topnode data of a profile directory, keyed by recording then topic.
+
+    Recordings are mappings that load a topic on first access. Topics (see
+    match_topics), the [start_time, end_time) range in nanoseconds and the
+    columns to keep apply to converted data as well as to recordings that are
+    decoded directly (see process_one). Recordings without a selected topic
+    are left out.
+    """
     # Find candidate files
     mcap_files = glob.glob(input_path + '*.mcap')
     data = {}
-    for mcap_file in mcap_files:
+    for mcap_file in sorted(mcap_files):
         base = os.path.splitext(mcap_file)[0]
-
-        if os.path.exists(base + '.converted'):
-            with open(base + '.converted', 'rb') as f:
-                p = pickle.Unpickler(f)
-                mcap_data = p.load()
-            data[os.path.basename(base)] = mcap_data
-        else:
-            data[os.path.basename(base)] = process_one(mcap_file)
+        recording = RecordingData(base, topics, start_time, end_time, columns)
+        if len(recording) or topics is None:
+            data[os.path.basename(base)] = recording
     return data
 
 
+def load_derived_metrics(input_path):
+    """
+    Load derived CPU, IO and memory rates of every topnode recording.
+
+    Metrics are read from the cache written during conversion, or computed
+    from the converted data and cached when missing or stale.
+    """
+    mcap_files = glob.glob(input_path + '*.mcap')
+    metrics = {}
+    for mcap_file in sorted(mcap_files):
+        base = os.path.splitext(mcap_file)[0]
+        derived = load_derived(base)
+        if derived is None:
+            derived = derive_metrics(RecordingData(base))
+            if os.path.exists(base + CONVERTED_SUFFIX) and \
+                    importlib.util.find_spec('pyarrow') is not None:
+                save_derived(base, derived)
+        metrics[os.path.basename(base)] = derived
+    return metrics
+
+
 def load_event_graph(input_path):
-    if not os.path.exists(os.path.join(input_path, 'event_graph')):
+    if not os.path.exists(os.path.join(input_path, EVENT_GRAPH)):
         process(input_path)
 
-    with open(os.path.join(input_path, 'event_graph'), 'rb') as f:
+    with open(os.path.join(input_path, EVENT_GRAPH), 'rb') as f:
         p = pickle.Unpickler(f)
         graph_data = p.load()
     return graph_data
@@ -0,0 +1,125 @@
+# Copyright 2023 Open Source Robotics Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pickle
+import sqlite3
+from typing import Any, Optional
+
+import numpy as np
+
+import pandas as pd
+
+from ros2profile.api.process import EVENT_TABLES, load_event_graph
+from ros2profile.data.tables import Tables, tables_to_frames
+
+BACKENDS = ('duckdb', 'sqlite')
+
+
+class _QuantileCont:
+    """SQLite aggregate matching DuckDB's quantile_cont(value, fraction)."""
+
+    def __init__(self):
+        self._values = []
+        self._fraction = 0.5
+
+    def step(self, value, fraction=0.5):
+        if value is not None:
+            self._values.append(value)
+        self._fraction = fraction
+
+    def finalize(self):
+        if not self._values:
+            return None
+        return float(np.quantile(np.array(self._values), self._fraction))
+
+
+def load_event_tables(input_path: str) -> Tables:
+    """
+    Load the columnar event tables of a profile directory.
+
+    Tables are written by process(). Older profile directories only have the
+    event graph, in which case the tables are built from it and cached.
+    """
+    tables_path = os.path.join(input_path, EVENT_TABLES)
+    if os.path.exists(tables_path):
+        with open(tables_path, 'rb') as f:
+            unpickler = pickle.Unpickler(f)
+            return unpickler.load()
+
+    tables = load_event_graph(input_path).tables()
+    with open(tables_path, 'wb') as f:
+        pickler = pickle.Pickler(f, protocol=4)
+        pickler.dump(tables)
+    return tables
+
+
+def default_backend() -> str:
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return 'sqlite'
+    return 'duckdb'
+
+
+def connect(input_path: str, backend: Optional[str] = None) -> Any:
+    """
+    Open an in-memory database with the tables of a profile directory registered.
+
+    DuckDB is used when installed, with the tables registered as views over
+    the frames. Otherwise the tables are copied into SQLite, with a
+    quantile_cont aggregate so percentile queries work on both backends.
+    """
+    if backend is None:
+        backend = default_backend()
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown query backend: {backend}')
+
+    frames = tables_to_frames(load_event_tables(input_path))
+    if backend == 'duckdb':
+        import duckdb
+        con = duckdb.connect()
+        for (name, frame) in frames.items():
+            con.register(name, frame)
+        return con
+
+    con = sqlite3.connect(':memory:')
+    con.create_aggregate('quantile_cont', 2, _QuantileCont)
+    for (name, frame) in frames.items():
+        frame.to_sql(name, con, index=False)
+    return con
+
+
+def query(input_path: str, sql: str, backend: Optional[str] = None) -> pd.DataFrame:
+    """
+    Run a SQL query against the tables of a profile directory.
+
+    For example, the 99th percentile callback duration per node:
+
+        SELECT n.name, quantile_cont(e.duration, 0.99) AS p99
+        FROM callback_events e
+        JOIN callbacks c ON e.callback_handle = c.handle
+        JOIN nodes n ON c.node_handle = n.handle
+        WHERE c.topic_name LIKE '/sensors/%'
+        GROUP BY n.name
+    """
+    if backend is None:
+        backend = default_backend()
+    con = connect(input_path, backend)
+    try:
+        if backend == 'duckdb':
+            return con.execute(sql).df()
+        return pd.read_sql_query(sql, con)
+    finally:
+        con.close()
@@ -0,0 +1,174 @@
+# Copyright 2023 Open Source Robotics Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import pandas as pd
+
+from ros2profile.api.query import load_event_tables
+from ros2profile.data.tables import Tables, tables_to_frames
+
+PERCENTILES = (50, 90, 99)
+
+
+def _duration_stats(frame: pd.DataFrame, key: str) -> Dict[int, Dict[str, Any]]:
+    """
+    Count events and their duration percentiles per handle with grouped aggregations.
+    """
+    if not len(frame):
+        return {}
+    groups = frame.groupby(key, sort=False)['duration']
+    counts = groups.size()
+    quantiles = groups.quantile([p / 100 for p in PERCENTILES]).unstack()
+    maxima = groups.max()
+    stats = {}
+    for (handle, count) in counts.items():
+        entry: Dict[str, Any] = {'events': int(count)}
+        for (percentile, fraction) in zip(PERCENTILES, quantiles.columns):
+            value = quantiles.at[handle, fraction]
+            entry[f'p{percentile}'] = None if pd.isna(value) else float(value)
+        value = maxima.at[handle]
+        entry['max'] = None if pd.isna(value) else int(value)
+        stats[int(handle)] = entry
+    return stats
+
+
+def _empty_stats() -> Dict[str, Any]:
+    stats: Dict[str, Any] = {'events': 0}
+    for percentile in PERCENTILES:
+        stats[f'p{percentile}'] = None
+    stats['max'] = None
+    return stats
+
+
+def summarize_tables(tables: Tables) -> List[Dict[str, Any]]:
+    """
+    Summarize each node with its publishers, subscriptions and timers.
+
+    Everything is computed from the columnar tables, so the object graph is
+    never built. Durations are in nanoseconds.
+    """
+    frames = tables_to_frames(tables)
+    callbacks = frames['callbacks']
+    symbols = dict(zip(callbacks['handle'].tolist(), callbacks['symbol'].tolist()))
+
+    callback_stats = _duration_stats(frames['callback_events'], 'callback_handle')
+    publish_stats = _duration_stats(frames['publish_events'], 'publisher_handle')
+    subscription_events = frames['subscription_events']
+    subscription_counts = {
+        int(handle): int(count) for (handle, count) in
+        subscription_events.groupby('subscription_handle', sort=False).size().items()}
+
+    def callback_summary(handle: Optional[int]) -> Optional[Dict[str, Any]]:
+        if handle is None or pd.isna(handle):
+            return None
+        handle = int(handle)
+        return {'symbol': symbols.get(handle, ''),
+                **callback_stats.get(handle, _empty_stats())}
+
+    summary: Dict[int, Dict[str, Any]] = {}
+    nodes = frames['nodes']
+    for (handle, name, namespace) in zip(nodes['handle'], nodes['name'], nodes['namespace']):
+        summary[int(handle)] = {
+            'name': name, 'namespace': namespace,
+            'publishers': [], 'subscriptions': [], 'timers': []}
+
+    publishers = frames['publishers']
+    for row in publishers.itertuples(index=False):
+        if row.node_handle not in summary:
+            continue
+        summary[row.node_handle]['publishers'].append({
+            'topic': row.topic_name,
+            'queue_depth': None if pd.isna(row.queue_depth) else int(row.queue_depth),
+            **publish_stats.get(int(row.handle), _empty_stats())})
+
+    # Sibling subscriptions created for one handle share events, report them once
+    subscriptions = frames['subscriptions'].drop_duplicates(['node_handle', 'handle'])
+    for row in subscriptions.itertuples(index=False):
+        if row.node_handle not in summary:
+            continue
+        summary[row.node_handle]['subscriptions'].append({
+            'topic': row.topic_name,
+            'messages': subscription_counts.get(int(row.handle), 0),
+            'callback': callback_summary(row.callback_handle)})
+
+    timers = frames['timers']
+    for row in timers.itertuples(index=False):
+        if row.node_handle not in summary:
+            continue
+        summary[row.node_handle]['timers'].append({
+            'period': None if pd.isna(row.period) else int(row.period),
+            'callback': callback_summary(row.callback_handle)})
+
+    return sorted(summary.values(), key=lambda node: (node['namespace'], node['name']))
+
+
+def _format_stats(stats: Dict[str, Any]) -> str:
+    parts = [f"events={stats['events']}"]
+    for key in [f'p{percentile}' for percentile in PERCENTILES] + ['max']:
+        if stats.get(key) is not None:
+            parts.append(f'{key}={stats[key] / 1e6:.3f}ms')
+    return ' '.join(parts)
+
+
+def format_summary(summary: List[Dict[str, Any]]) -> List[str]:
+    lines = []
+    for node in summary:
+        namespace = node['namespace'].rstrip('/')
+        lines.append(f"Node: {namespace}/{node['name']}")
+        if node['publishers']:
+            lines.append('  Publishers:')
+            for publisher in node['publishers']:
+                lines.append(f"    Topic: {publisher['topic']}")
+                lines.append(f'      {_format_stats(publisher)}')
+        if node['subscriptions']:
+            lines.append('  Subscriptions:')
+            for subscription in node['subscriptions']:
+                lines.append(f"    Topic: {subscription['topic']} "
+                             f"(messages={subscription['messages']})")
+                callback = subscription['callback']
+                if callback is not None:
+                    lines.append(f"      Callback: {callback['symbol']}")
+                    lines.append(f'        {_format_stats(callback)}')
+        if node['timers']:
+            lines.append('  Timers:')
+            for timer in node['timers']:
+                period = timer['period']
+                period = f'{period / 1e6:.3f}ms' if period is not None else 'unknown'
+                lines.append(f'    Period: {period}')
+                callback = timer['callback']
+                if callback is not None:
+                    lines.append(f"      Callback: {callback['symbol']}")
+                    lines.append(f'        {_format_stats(callback)}')
+    return lines
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def summary_to_json(summary: List[Dict[str, Any]]) -> str:
+    return json.dumps(summary, indent=2, default=_json_default)
+
+
+def summarize(input_path: str) -> List[Dict[str, Any]]:
+    """
+    Summarize a profile directory from its persisted event tables.
+    """
+    return summarize_tables(load_event_tables(input_path))
@@ -19,10 +19,17 @@ from collections import defaultdict
 import logging
 import os
 
+import numpy as np
+
 from .callback import Callback, CallbackEvent
 from .context import Context
 from .node import Node
 from .graph import Graph
+from .histogram import LatencyHistogram
+from .locks import build_lock_events
+from .memory import build_allocation_events
+from .sched import build_thread_schedules
+from .timeline import ThreadTimeline
 from .publisher import Publisher, PublishEvent, IPPublishEvent, MessageInBuffer
 from .subscription import Subscription, SubscriptionEvent, IpSubscriptionEvent
 from .timer import Timer
@@ -53,6 +60,10 @@ def build_graph(
     process_callback_events: bool = True,
     process_publish_events: bool = True,
     process_subscription_events: bool = True,
+    process_statistics: bool = True,
+    process_kernel_events: bool = True,
+    process_memory_events: bool = True,
+    process_lock_events: bool = True,
 ) -> Graph:
     ret = Graph()
 
@@ -147,6 +158,23 @@ def build_graph(
         and process_subscription_events
     ):
         _associate_publish_events_to_subscription_callbacks(ret)
+
+    timeline = ThreadTimeline(ret) if process_callback_events else None
+
+    if process_kernel_events and timeline:
+        sched_switch_events = event_data.get(constants.SCHED_SWITCH, [])
+        sched_wakeup_events = event_data.get(constants.SCHED_WAKEUP, [])
+        _build_thread_schedules(ret, timeline, sched_switch_events, sched_wakeup_events)
+
+    if process_memory_events and timeline:
+        _build_allocation_events(ret, timeline, event_data)
+
+    if process_lock_events and timeline:
+        _build_lock_events(ret, timeline, event_data)
+
+    if process_statistics:
+        _build_statistics(ret)
+
     return ret
 
 
@@ -349,7 +377,7 @@ def _build_timers(
             continue
 
         found_timer.callback_handle = event["callback"]
-        found_callback = graph.callback_by_handle(found_timer.callback_handle)
+        found_callback = graph.callback_by_handle(event["callback"])
         if found_callback:
             found_timer.callback = found_callback
             found_callback._source = found_timer
@@ -376,6 +404,9 @@ def _build_callback_events(
                         entry["callback"], entry["is_intra_process"]
                     )
                     cur_event._callback_start = entry["_timestamp"]
+                    cur_event._vtid = entry.get("vtid")
+                    cur_event._vpid = entry.get("vpid")
+                    cur_event._cpu_id = entry.get("cpu_id")
             else:
                 if entry["_name"] == constants.ROS_CALLBACK_END:
                     cur_event._callback_end = entry["_timestamp"]
@@ -594,6 +625,8 @@ def _associate_subscription_callbacks(graph: Graph):
 
 def _associate_timer_callbacks(graph: Graph):
     for timer in graph.timers():
+        if timer.callback is None:
+            continue
         timer.callback.source = timer
         timer_cb_events = timer.callback.events()
 
@@ -693,6 +726,8 @@ def _associate_subscription_event_to_publish_event(graph: Graph):
 def _associate_publish_events_to_timer_callbacks(graph: Graph):
     for node in graph.nodes:
         for timer in node.timers:
+            if timer.callback is None:
+                continue
             for publisher in node.publishers:
                 _associate_publisher_to_callback(publisher, timer.callback)
 
@@ -721,3 +756,72 @@ def _associate_publisher_to_callback(publisher: Publisher, callback: Callback):
         else:
             pub_event.trigger = sub_event
             pub_idx += 1
+
+
+def _build_thread_schedules(
+    graph: Graph,
+    timeline: ThreadTimeline,
+    sched_switch_events: RawEvents,
+    sched_wakeup_events: RawEvents,
+) -> None:
+    if len(sched_switch_events) == 0:
+        return
+    logger.debug(f"Building thread schedules from {len(sched_switch_events)} events")
+    schedules = build_thread_schedules(sched_switch_events, sched_wakeup_events)
+    for thread_schedule in schedules.values():
+        graph.add_thread_schedule(thread_schedule)
+    logger.info(f"Detected {len(graph.thread_schedules())} scheduled threads")
+
+    for tid in timeline.tids():
+        schedule = graph.thread_schedule(tid)
+        if schedule is None:
+            continue
+        starts = timeline.starts(tid)
+        ends = timeline.ends(tid)
+        on_cpu_times = schedule.on_cpu_time(starts, ends)
+        preemptions = schedule.preemptions(starts, ends)
+        for event, on_cpu_time, preemption_count in zip(
+            timeline.events(tid), on_cpu_times, preemptions
+        ):
+            event._on_cpu_time = int(on_cpu_time)
+            event._preemptions = int(preemption_count)
+
+
+def _build_allocation_events(
+    graph: Graph, timeline: ThreadTimeline, event_data: RawEventCollection
+) -> None:
+    attributed = build_allocation_events(graph, event_data, timeline)
+    if attributed:
+        logger.info(f"Attributed {attributed} allocation events to callbacks")
+
+
+def _build_lock_events(
+    graph: Graph, timeline: ThreadTimeline, event_data: RawEventCollection
+) -> None:
+    attributed = build_lock_events(graph, event_data, timeline)
+    if attributed:
+        logger.info(f"Attributed {attributed} mutex acquisitions to callbacks")
+
+
+def _build_statistics(graph: Graph) -> None:
+    for callback in graph.callbacks:
+        events = callback.events()
+        durations = np.fromiter(
+            (event.duration() for event in events), dtype=np.int64, count=len(events)
+        )
+        callback.duration_histogram = LatencyHistogram.from_values(durations)
+
+    for publisher in graph.publishers:
+        durations = np.fromiter(
+            (event.duration() for event in publisher.events),
+            dtype=np.int64,
+            count=len(publisher.events),
+        )
+        publisher.publish_histogram = LatencyHistogram.from_values(durations)
+
+    for subscription in graph.subscriptions:
+        delivered = [event.delivery_latency() for event in subscription.events]
+        latencies = np.array(
+            [latency for latency in delivered if latency is not None], dtype=np.int64
+        )
+        subscription.delivery_histogram = LatencyHistogram.from_values(latencies)
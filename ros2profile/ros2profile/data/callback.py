@@ -12,7 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import List, Any
+from typing import List, Any, Dict, Optional, Tuple
+
+from .histogram import LatencyHistogram
 
 
 def _prettify(
@@ -82,12 +84,30 @@ class CallbackEvent:
         self._callback_start: int
         self._callback_end: int
 
-        self._vpid: int
-        self._vtid: int
-        self._cpu_id: int
+        self._vpid: Optional[int] = None
+        self._vtid: Optional[int] = None
+        self._cpu_id: Optional[int] = None
+
+        self._on_cpu_time: Optional[int] = None
+        self._preemptions: Optional[int] = None
+
+        self._allocations: Optional[int] = None
+        self._allocated_bytes: Optional[int] = None
+        self._frees: Optional[int] = None
+        self._freed_bytes: Optional[int] = None
 
-        self._trigger: Any
-        self._source: Any
+        self._locks: Optional[int] = None
+        self._lock_wait_time: Optional[int] = None
+        self._lock_hold_time: Optional[int] = None
+        self._lock_contenders: Optional[Dict[Tuple[Optional[int], int], int]] = None
+
+        self._trigger: Any = None
+        self._source: Any = None
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        # Events pickled by earlier versions lack the newer analysis attributes
+        CallbackEvent.__init__(self, state['_callback_handle'], state['_is_intra_process'])
+        self.__dict__.update(state)
 
     @property
     def trigger(self) -> Any:
@@ -109,6 +129,108 @@ class CallbackEvent:
     def callback_handle(self) -> int:
         return self._callback_handle
 
+    @property
+    def vpid(self) -> Optional[int]:
+        """
+        The process that ran this callback event
+        """
+        return self._vpid
+
+    @property
+    def vtid(self) -> Optional[int]:
+        """
+        The thread that ran this callback event
+        """
+        return self._vtid
+
+    @property
+    def cpu_id(self) -> Optional[int]:
+        """
+        The CPU this callback event started on
+        """
+        return self._cpu_id
+
+    @property
+    def on_cpu_time(self) -> Optional[int]:
+        """
+        Time the thread spent on a CPU during this callback event
+        """
+        return self._on_cpu_time
+
+    @property
+    def wait_time(self) -> Optional[int]:
+        """
+        Time the thread spent off CPU during this callback event
+        """
+        if self._on_cpu_time is None:
+            return None
+        return self.duration() - self._on_cpu_time
+
+    @property
+    def preemptions(self) -> Optional[int]:
+        """
+        Number of times the thread was preempted during this callback event
+        """
+        return self._preemptions
+
+    @property
+    def allocations(self) -> Optional[int]:
+        """
+        Number of heap allocations made during this callback event
+        """
+        return self._allocations
+
+    @property
+    def allocated_bytes(self) -> Optional[int]:
+        """
+        Bytes allocated on the heap during this callback event
+        """
+        return self._allocated_bytes
+
+    @property
+    def frees(self) -> Optional[int]:
+        """
+        Number of heap frees made during this callback event
+        """
+        return self._frees
+
+    @property
+    def heap_growth(self) -> Optional[int]:
+        """
+        Bytes allocated minus bytes freed during this callback event
+        """
+        if self._allocated_bytes is None or self._freed_bytes is None:
+            return None
+        return self._allocated_bytes - self._freed_bytes
+
+    @property
+    def locks(self) -> Optional[int]:
+        """
+        Number of mutex acquisitions made during this callback event
+        """
+        return self._locks
+
+    @property
+    def lock_wait_time(self) -> Optional[int]:
+        """
+        Time spent waiting to acquire mutexes during this callback event
+        """
+        return self._lock_wait_time
+
+    @property
+    def lock_hold_time(self) -> Optional[int]:
+        """
+        Time spent holding mutexes during this callback event
+        """
+        return self._lock_hold_time
+
+    @property
+    def lock_contenders(self) -> Optional[Dict[Tuple[Optional[int], int], int]]:
+        """
+        Time blocked per (callback handle, thread) holding the awaited mutex
+        """
+        return self._lock_contenders
+
     def start(self) -> int:
         return self._callback_start
 
@@ -141,6 +263,7 @@ class Callback:
 
         self._events: List[CallbackEvent] = []
         self._source: Any = None
+        self._duration_histogram: Optional[LatencyHistogram] = None
 
     @property
     def handle(self) -> int:
@@ -168,6 +291,17 @@ class Callback:
         """
         return self._symbol
 
+    @property
+    def duration_histogram(self) -> Optional[LatencyHistogram]:
+        """
+        Distribution of the durations of this callback's events
+        """
+        return self._duration_histogram
+
+    @duration_histogram.setter
+    def duration_histogram(self, value: LatencyHistogram) -> None:
+        self._duration_histogram = value
+
     def num_calls(self) -> int:
         return len(self._events)
 
@@ -0,0 +1,205 @@
+# Copyright 2023 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from .callback import CallbackEvent
+from .publisher import PublishEventBase
+from .subscription import SubscriptionEventBase
+
+if TYPE_CHECKING:
+    from .graph import Graph
+
+
+def _event_time(event: Any) -> int:
+    if isinstance(event, CallbackEvent):
+        return event.start()
+    return event.timestamp()
+
+
+class CausalEdge:
+    """
+    A causal link between two events, with the latency between them
+    """
+
+    def __init__(self, parent: Any, child: Any, is_trigger: bool) -> None:
+        self._parent: Any = parent
+        self._child: Any = child
+        self._is_trigger: bool = is_trigger
+        self._latency: int = _event_time(child) - _event_time(parent)
+
+    @property
+    def parent(self) -> Any:
+        """
+        The upstream event
+        """
+        return self._parent
+
+    @property
+    def child(self) -> Any:
+        """
+        The downstream event
+        """
+        return self._child
+
+    @property
+    def is_trigger(self) -> bool:
+        """
+        Whether the parent directly triggered the child, rather than being a fused input
+        """
+        return self._is_trigger
+
+    @property
+    def latency(self) -> int:
+        """
+        Time between the parent and the child event
+        """
+        return self._latency
+
+    def __repr__(self) -> str:
+        return f"<CausalEdge parent={self._parent} child={self._child} latency={self._latency}>"
+
+
+class CausalDag:
+    """
+    Multi-parent causal graph of the events in a profile.
+
+    Every event has its single trigger as parent.  With fan_in, a publish event
+    also gets one input edge per other subscription of its node: the latest
+    callback event of that subscription that finished before the triggering
+    callback started, whose data the publication may have been computed from.
+    This captures nodes that fuse several inputs into a single output, but
+    assumes every subscription of the node feeds every output, so it is off by
+    default.
+    """
+
+    def __init__(self, graph: 'Graph', fan_in: bool = False) -> None:
+        self._fan_in: bool = fan_in
+        self._parents: Dict[Any, List[CausalEdge]] = {}
+        self._origins: Dict[Any, Tuple[int, int]] = {}
+        self._inputs_by_node: Dict[int, List[Tuple[int, np.ndarray, List[CallbackEvent]]]] = {}
+
+        if not fan_in:
+            return
+        for node in graph.nodes:
+            inputs = []
+            for subscription in node.subscriptions:
+                if subscription.callback is None:
+                    continue
+                events = subscription.callback.events()
+                if len(events) == 0:
+                    continue
+                ends = np.fromiter(
+                    (event.end() for event in events), dtype=np.int64, count=len(events)
+                )
+                # Latest end so far, so that a search only finds fully finished events
+                inputs.append((subscription.callback.handle, np.maximum.accumulate(ends), events))
+            self._inputs_by_node[node.handle] = inputs
+
+    def parents(self, event: Any) -> List[CausalEdge]:
+        """
+        Get the causal parents of an event, triggering parent first
+        """
+        if event in self._parents:
+            return self._parents[event]
+
+        edges: List[CausalEdge] = []
+        trigger = event.trigger
+        if isinstance(trigger, (CallbackEvent, PublishEventBase, SubscriptionEventBase)):
+            edges.append(CausalEdge(trigger, event, True))
+
+        if self._fan_in and isinstance(event, PublishEventBase):
+            if isinstance(trigger, CallbackEvent):
+                (trigger_handle, cutoff) = (trigger.callback_handle, trigger.start())
+            else:
+                (trigger_handle, cutoff) = (None, event.timestamp())
+            for callback_handle, ends, events in \
+                    self._inputs_by_node.get(event.source.node.handle, []):
+                if callback_handle == trigger_handle:
+                    continue
+                idx = int(np.searchsorted(ends, cutoff, side='right')) - 1
+                if idx >= 0:
+                    edges.append(CausalEdge(events[idx], event, False))
+
+        self._parents[event] = edges
+        return edges
+
+    def _origin_range(self, event: Any) -> Tuple[int, int]:
+        """
+        Get the oldest and newest root timestamps upstream of an event
+        """
+        stack = [event]
+        while stack:
+            current = stack[-1]
+            if current in self._origins:
+                stack.pop()
+                continue
+            pending = [edge.parent for edge in self.parents(current)
+                       if edge.parent not in self._origins]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            parent_origins = [self._origins[edge.parent] for edge in self.parents(current)]
+            if parent_origins:
+                self._origins[current] = (
+                    min(origin[0] for origin in parent_origins),
+                    max(origin[1] for origin in parent_origins),
+                )
+            else:
+                time = _event_time(current)
+                self._origins[current] = (time, time)
+        return self._origins[event]
+
+    def origin(self, event: Any) -> int:
+        """
+        Get the timestamp of the oldest data upstream of an event
+        """
+        return self._origin_range(event)[0]
+
+    def data_age(self, event: Any) -> int:
+        """
+        Get the age of the oldest data that contributed to an event
+        """
+        if isinstance(event, CallbackEvent):
+            return event.end() - self.origin(event)
+        return _event_time(event) - self.origin(event)
+
+    def worst_case_input(self, event: Any) -> Optional[CausalEdge]:
+        """
+        Get the input edge carrying the oldest data into an event
+        """
+        edges = self.parents(event)
+        if not edges:
+            return None
+        return min(edges, key=lambda edge: self._origin_range(edge.parent)[0])
+
+    def freshest_input(self, event: Any) -> Optional[CausalEdge]:
+        """
+        Get the input edge carrying the newest data into an event
+        """
+        edges = self.parents(event)
+        if not edges:
+            return None
+        return max(edges, key=lambda edge: self._origin_range(edge.parent)[1])
+
+    def clear(self) -> None:
+        """
+        Evict all resolved edges and origins
+        """
+        self._parents.clear()
+        self._origins.clear()
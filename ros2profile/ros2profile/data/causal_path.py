@@ -0,0 +1,234 @@
+# Copyright 2023 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from .callback import Callback, CallbackEvent
+from .histogram import LatencyHistogram
+from .publisher import Publisher, PublishEventBase
+from .subscription import Subscription, SubscriptionEventBase
+from .timer import Timer
+
+if TYPE_CHECKING:
+    from .graph import Graph
+
+
+class CausalPath:
+    """
+    A chain of entities through the computational graph.
+
+    A path starts at a timer and alternates callback -> publisher -> subscription
+    -> callback until it reaches a callback that does not feed any other callback.
+    """
+
+    def __init__(self, path_id: int, entities: List[Any]) -> None:
+        self._id: int = path_id
+        self._entities: List[Any] = entities
+
+        self._instances: List[List[Any]] = []
+        self._latencies: np.ndarray = np.array([], dtype=np.int64)
+        self._latency_histogram: LatencyHistogram = LatencyHistogram()
+
+    @property
+    def id(self) -> int:
+        """
+        The identifier of this path
+        """
+        return self._id
+
+    @property
+    def entities(self) -> List[Any]:
+        """
+        Timer, callbacks, publishers and subscriptions along this path
+        """
+        return self._entities
+
+    @property
+    def root(self) -> Timer:
+        """
+        The timer at the start of this path
+        """
+        return self._entities[0]
+
+    @property
+    def sink(self) -> Callback:
+        """
+        The callback at the end of this path
+        """
+        return self._entities[-1]
+
+    @property
+    def callbacks(self) -> List[Callback]:
+        """
+        Callbacks along this path, in causal order
+        """
+        return [entity for entity in self._entities if isinstance(entity, Callback)]
+
+    @property
+    def topics(self) -> List[str]:
+        """
+        Topics along this path, in causal order
+        """
+        return [entity.name for entity in self._entities if isinstance(entity, Publisher)]
+
+    @property
+    def signature(self) -> Tuple[str, ...]:
+        """
+        Node and topic names along this path, stable across runs
+        """
+        signature = [self.root.node.name]
+        for entity in self._entities:
+            if isinstance(entity, Publisher):
+                signature.append(entity.name)
+            elif isinstance(entity, Subscription):
+                signature.append(entity.node.name)
+        return tuple(signature)
+
+    @property
+    def instances(self) -> List[List[Any]]:
+        """
+        Event chains that followed this path, root callback event first
+        """
+        return self._instances
+
+    @property
+    def latencies(self) -> np.ndarray:
+        """
+        End-to-end latency of each instance of this path
+        """
+        return self._latencies
+
+    @property
+    def latency_histogram(self) -> LatencyHistogram:
+        """
+        Distribution of the end-to-end latency of this path
+        """
+        return self._latency_histogram
+
+    def _match(self, end_event: CallbackEvent) -> Optional[List[Any]]:
+        """
+        Follow the triggers of an event and check that they walk this path
+        """
+        chain: List[Any] = []
+        event: Any = end_event
+
+        for entity in reversed(self._entities):
+            if isinstance(entity, Timer):
+                if event is not entity:
+                    return None
+            elif isinstance(entity, Callback):
+                if not isinstance(event, CallbackEvent) or \
+                        event.callback_handle != entity.handle:
+                    return None
+                chain.append(event)
+                event = event.trigger
+            elif isinstance(entity, Subscription):
+                if not isinstance(event, SubscriptionEventBase) or \
+                        event.source.rmw_handle != entity.rmw_handle:
+                    return None
+                chain.append(event)
+                event = event.trigger
+            elif isinstance(entity, Publisher):
+                if not isinstance(event, PublishEventBase) or \
+                        event.source.handle != entity.handle:
+                    return None
+                chain.append(event)
+                event = event.trigger
+
+        chain.reverse()
+        return chain
+
+    def _build_instances(self) -> None:
+        self._instances = []
+        latencies = []
+        for event in self.sink.events():
+            chain = self._match(event)
+            if chain is None:
+                continue
+            self._instances.append(chain)
+            latencies.append(chain[-1].end() - chain[0].start())
+        self._latencies = np.array(latencies, dtype=np.int64)
+        self._latency_histogram = LatencyHistogram.from_values(self._latencies)
+
+    def __repr__(self) -> str:
+        return f"<CausalPath id={self._id} path={' -> '.join(self.signature)}>"
+
+
+def _observed_publishers(graph: 'Graph') -> Dict[int, Set[Publisher]]:
+    """
+    Map callback handles to the publishers their events were seen publishing on
+    """
+    publishers: Dict[int, Set[Publisher]] = defaultdict(set)
+    for publisher in graph.publishers:
+        for event in publisher.events:
+            if isinstance(event.trigger, CallbackEvent):
+                publishers[event.trigger.callback_handle].add(publisher)
+    return publishers
+
+
+def discover_paths(graph: 'Graph') -> List[CausalPath]:
+    """
+    Enumerate every causal path from a timer to a sink callback.
+
+    Callback to publisher edges are taken from the publish events associated
+    with each callback, the remaining edges come from the topology.
+    """
+    observed = _observed_publishers(graph)
+    topics = {topic.name: topic for topic in graph.topics}
+    entity_paths: List[List[Any]] = []
+
+    def _walk(callback: Callback, path: List[Any], visited: Set[int]) -> None:
+        extended = False
+        for publisher in sorted(observed.get(callback.handle, ()), key=lambda p: p.handle):
+            topic = topics.get(publisher.name)
+            if topic is None:
+                continue
+            for subscription in topic.subscriptions:
+                next_callback = subscription.callback
+                if next_callback is None or next_callback.handle in visited:
+                    continue
+                extended = True
+                _walk(next_callback,
+                      path + [publisher, subscription, next_callback],
+                      visited | {next_callback.handle})
+        if not extended:
+            entity_paths.append(path)
+
+    for timer in graph.timers():
+        callback = timer.callback
+        if callback is None:
+            continue
+        _walk(callback, [timer, callback], {callback.handle})
+
+    paths = []
+    for path_id, entities in enumerate(entity_paths):
+        path = CausalPath(path_id, entities)
+        path._build_instances()
+        paths.append(path)
+    return paths
+
+
+def slowest_paths(
+    paths: List[CausalPath], count: int = 10, percentile: float = 100.0
+) -> List[CausalPath]:
+    """
+    Rank paths by a percentile of their end-to-end latency, slowest first
+    """
+    measured = [path for path in paths if len(path.latencies) > 0]
+    measured.sort(key=lambda path: np.percentile(path.latencies, percentile), reverse=True)
+    return measured[:count]
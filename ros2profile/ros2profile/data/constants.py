@@ -52,3 +52,17 @@ RCLCPP_RINGBUFFER_DEQUEUE = 'ros2:rclcpp_ring_buffer_dequeue'
 RCLCPP_RINGBUFFER_CLEAR = 'ros2:rclcpp_ring_buffer_clear'
 RCLCPP_INTRA_PUBLISH = 'ros2:rclcpp_intra_publish'
 
+SCHED_SWITCH = 'sched_switch'
+SCHED_WAKEUP = 'sched_wakeup'
+
+LIBC_MALLOC = 'lttng_ust_libc:malloc'
+LIBC_CALLOC = 'lttng_ust_libc:calloc'
+LIBC_REALLOC = 'lttng_ust_libc:realloc'
+LIBC_MEMALIGN = 'lttng_ust_libc:memalign'
+LIBC_POSIX_MEMALIGN = 'lttng_ust_libc:posix_memalign'
+LIBC_FREE = 'lttng_ust_libc:free'
+
+PTHREAD_MUTEX_LOCK_REQ = 'lttng_ust_pthread:pthread_mutex_lock_req'
+PTHREAD_MUTEX_LOCK_ACQ = 'lttng_ust_pthread:pthread_mutex_lock_acq'
+PTHREAD_MUTEX_TRYLOCK = 'lttng_ust_pthread:pthread_mutex_trylock'
+PTHREAD_MUTEX_UNLOCK = 'lttng_ust_pthread:pthread_mutex_unlock'
@@ -17,7 +17,7 @@ import lzma
 import pickle
 
 from collections import defaultdict
-from typing import Dict, Any, List, Union, Callable
+from typing import Dict, Any, List, Optional, Union, Callable
 
 import bt2
 
@@ -79,6 +79,8 @@ BT2_CONV_FUNC: Dict[str, ConversionFunction] = {
     "in_ptr": int,
     "alignment": int,
     "memptr": int,
+    "out_ptr": int,
+    "result": int,
     "mutex": int,
     "status": int,
     "prev_comm": str,
@@ -88,6 +90,11 @@ BT2_CONV_FUNC: Dict[str, ConversionFunction] = {
     "next_comm": str,
     "next_tid": int,
     "next_prio": int,
+    "comm": str,
+    "tid": int,
+    "prio": int,
+    "target_cpu": int,
+    "success": int,
 
 }
 
@@ -146,6 +153,31 @@ def load_ctf(directory: str, ignore_names: List[str] = LTTNG_IGNORE_NAMES) -> Ct
     return events
 
 
+def load_clock_info(directory: str) -> Optional[Dict[str, Any]]:
+    '''
+    Get the clock class of a trace from its first message with a clock snapshot.
+
+    Event timestamps are nanoseconds from the clock origin, which already
+    include the metadata offset. When the origin is the Unix epoch they can be
+    compared with wall clock times such as MCAP log times.
+    '''
+    msg_it = bt2.TraceCollectionMessageIterator(directory)
+    for msg in msg_it:
+        snapshot = getattr(msg, "default_clock_snapshot", None)
+        if snapshot is None:
+            continue
+        clock_class = snapshot.clock_class
+        offset = clock_class.offset
+        return {
+            "name": clock_class.name,
+            "frequency": int(clock_class.frequency),
+            "offset_seconds": int(offset.seconds),
+            "offset_cycles": int(offset.cycles),
+            "origin_is_unix_epoch": bool(clock_class.origin_is_unix_epoch),
+        }
+    return None
+
+
 def write_events_to_pickle(events: CtfEvents, filename: str) -> None:
     with lzma.open(filename, "wb") as pickle_file:
         pickler = pickle.Pickler(pickle_file, protocol=4)
@@ -0,0 +1,243 @@
+# Copyright 2023 Open Source Robotics Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from array import array
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+Extractor = Callable[[Any], Tuple[Any, ...]]
+
+# Values stored as a single column rather than flattened
+SCALAR_TYPES = (bool, int, float, str, bytes, bytearray, list, tuple, np.ndarray)
+
+# array typecode and matching numpy dtype of scalar column values
+TYPECODES = {
+    bool: ('b', np.bool_),
+    int: ('q', np.int64),
+    float: ('d', np.float64),
+}
+
+
+class Column:
+    """
+    Growable column of values, stored in a typed array when the values allow it.
+
+    The type is picked from the first value. Integers are promoted to floats
+    and any other mismatch falls back to a list of objects.
+    """
+
+    def __init__(self, value: Any = None) -> None:
+        self._data: Union[array, List[Any]]
+        self._dtype: Any = object
+        if type(value) in TYPECODES:
+            (typecode, self._dtype) = TYPECODES[type(value)]
+            self._data = array(typecode)
+        else:
+            self._data = []
+        self.append = self._data.append
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def append_promoted(self, value: Any) -> None:
+        """
+        Append a value that does not fit the current storage.
+        """
+        if self._dtype == np.int64 and type(value) is float:
+            self._data = array('d', self._data)
+            self._dtype = np.float64
+        else:
+            self._data = list(self._data)
+            self._dtype = object
+        self.append = self._data.append
+        self.append(value)
+
+    def values(self) -> np.ndarray:
+        """
+        Get the column as a numpy array, sharing memory with typed storage.
+
+        The array is read only and the column can not grow while it is alive.
+        """
+        if isinstance(self._data, list):
+            values = np.empty(len(self._data), dtype=object)
+            values[:] = self._data
+            return values
+        return np.frombuffer(self._data, dtype=self._dtype)
+
+
+class ColumnTable:
+    """
+    Rows of a fixed set of fields, appended as tuples and stored as columns.
+    """
+
+    def __init__(self, fields: Sequence[str]) -> None:
+        self._fields: Sequence[str] = tuple(fields)
+        self._columns: Optional[List[Column]] = None
+        self._appends: List[Any] = []
+        self._size: int = 0
+
+    @property
+    def fields(self) -> Sequence[str]:
+        return self._fields
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, row: Sequence[Any]) -> None:
+        if self._columns is None:
+            self._columns = [Column(value) for value in row]
+            self._appends = [column.append for column in self._columns]
+        try:
+            for (append, value) in zip(self._appends, row):
+                append(value)
+        except (TypeError, OverflowError):
+            # Some columns may already hold this row, promote the rest
+            for (column, value) in zip(self._columns, row):
+                if len(column) == self._size:
+                    try:
+                        column.append(value)
+                    except (TypeError, OverflowError):
+                        column.append_promoted(value)
+            self._appends = [column.append for column in self._columns]
+        self._size += 1
+
+    def extend(self, rows: Iterable[Sequence[Any]]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        if self._columns is None:
+            return {field: np.array([]) for field in self._fields}
+        return {field: column.values() for (field, column) in zip(self._fields, self._columns)}
+
+    def to_frame(self) -> Any:
+        import pandas as pd
+        return pd.DataFrame(self.columns(), copy=False)
+
+    def to_arrow(self) -> Any:
+        import pyarrow as pa
+        columns = {}
+        for (field, values) in self.columns().items():
+            columns[field] = pa.array(values.tolist() if values.dtype == object else values)
+        return pa.table(columns)
+
+
+def message_fields(msg: Any) -> List[str]:
+    """
+    Get the field names of a decoded ROS message, in definition order.
+    """
+    if hasattr(msg, 'get_fields_and_field_types'):
+        return list(msg.get_fields_and_field_types().keys())
+    slots = getattr(type(msg), '__slots__', None)
+    if slots:
+        return [slot for slot in slots if not slot.startswith('_')]
+    return [name for name in vars(msg) if not name.startswith('_')]
+
+
+def flatten_fields(msg: Any, prefix: Tuple[str, ...] = ()) -> List[Tuple[str, ...]]:
+    """
+    Get the paths of all leaf fields of a message, descending into nested messages.
+
+    Arrays and strings are leaves, stored as one object column each.
+    """
+    paths = []
+    for name in message_fields(msg):
+        if not name.isidentifier():
+            continue
+        value = getattr(msg, name)
+        if value is None or isinstance(value, SCALAR_TYPES):
+            paths.append(prefix + (name,))
+        else:
+            paths.extend(flatten_fields(value, prefix + (name,)))
+    return paths
+
+
+class MessageFlattener:
+    """
+    Flatten decoded MCAP messages into tuples, with one extractor per schema.
+
+    Any schema is flattened: its extractor is generated from the first message
+    seen, as a single attrgetter returning the log time followed by every leaf
+    field.  Nested field paths are joined with underscores to name their
+    columns.  Registering a schema only overrides column names or extraction.
+    """
+
+    def __init__(self) -> None:
+        self._renames: Dict[str, Dict[str, str]] = {}
+        self._custom: Dict[str, Tuple[Sequence[str], Extractor]] = {}
+        self._compiled: Dict[str, Tuple[Sequence[str], Extractor]] = {}
+
+    def register_schema(
+        self,
+        schema_name: str,
+        columns: Optional[Dict[str, str]] = None,
+        extractor: Optional[Extractor] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> None:
+        """
+        Override how messages of a schema are flattened.
+
+        :param columns: column names of dotted field paths, e.g.
+            {'cpu_usage.percent': 'cpu_percent'}, others keep their default name
+        :param extractor: hand-written function from a message to a tuple, used
+            instead of the generated one
+        :param fields: column names of the tuples returned by extractor
+        """
+        if extractor is not None:
+            if fields is None:
+                raise ValueError('Custom extractors need their field names')
+            self._custom[schema_name] = (tuple(fields), extractor)
+        else:
+            self._custom.pop(schema_name, None)
+        self._renames[schema_name] = dict(columns or {})
+        self._compiled.pop(schema_name, None)
+
+    def schemas(self) -> List[str]:
+        """
+        Get the schemas with registered overrides.
+        """
+        return list(self._renames.keys())
+
+    def extractor(self, schema_name: str, msg: Any) -> Tuple[Sequence[str], Extractor]:
+        """
+        Get the column names and extractor of a schema, compiling it from msg if needed.
+        """
+        if schema_name in self._compiled:
+            return self._compiled[schema_name]
+        if schema_name in self._custom:
+            compiled = self._custom[schema_name]
+        else:
+            compiled = self._compile(schema_name, msg)
+        self._compiled[schema_name] = compiled
+        return compiled
+
+    def _compile(self, schema_name: str, msg: Any) -> Tuple[Sequence[str], Extractor]:
+        renames = self._renames.get(schema_name, {})
+        paths = flatten_fields(msg.ros_msg)
+        fields = ['_log_time']
+        accessors = ['log_time']
+        if hasattr(msg, 'log_time_ns'):
+            # Integer log time, used to align samples with the trace clock
+            fields.append('_log_time_ns')
+            accessors.append('log_time_ns')
+        for path in paths:
+            fields.append(renames.get('.'.join(path), '_'.join(path)))
+            accessors.append('ros_msg.' + '.'.join(path))
+        getter = attrgetter(*accessors)
+        if len(accessors) == 1:
+            # A single attribute is returned as is rather than in a tuple
+            return (tuple(fields), lambda msg: (getter(msg),))
+        return (tuple(fields), getter)
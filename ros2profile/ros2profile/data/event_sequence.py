@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Any, List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from .callback import CallbackEvent
 from .timer import Timer
@@ -20,67 +20,180 @@ from .subscription import SubscriptionEventBase
 from .publisher import PublishEventBase
 
 
+SequenceEntry = Dict[str, Any]
+# Entries of one event, the upstream event its chain continues with and the
+# timestamp of the root of the chain
+CachedLink = Tuple[Tuple[SequenceEntry, ...], Any, Optional[int]]
+
+
+class EventSequenceCache:
+    '''
+    Memoized upstream paths of causal events.
+
+    Every event visited while building an EventSequence is stored as a link to
+    the upstream event its chain continues with.  Sequences that share a prefix
+    (fan-out, fan-in, repeated timers) stop walking at the first cached hop, and
+    full sequences are only assembled from the links when asked for.
+
+    A cache is meant to live for a single analysis session, either by calling
+    clear() or by using it as a context manager.
+    '''
+    def __init__(self) -> None:
+        self._links: Dict[Any, CachedLink] = {}
+
+    def __contains__(self, event: Any) -> bool:
+        return event in self._links
+
+    def __len__(self) -> int:
+        return len(self._links)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._links)
+
+    def __enter__(self) -> 'EventSequenceCache':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.clear()
+
+    def add(self, event: Any, entries: List[SequenceEntry], parent: Any = None) -> None:
+        '''
+        Store the entries of an event and the cached upstream event it follows
+        '''
+        if parent is not None:
+            root_timestamp = self._links[parent][2]
+        elif entries:
+            root_timestamp = entries[-1]['timestamp']
+        else:
+            root_timestamp = None
+        self._links[event] = (tuple(entries), parent, root_timestamp)
+
+    def sequence(self, event: Any) -> List[SequenceEntry]:
+        '''
+        Get the resolved upstream sequence of an event, latest first
+
+        Entries are copies, so callers may modify them without affecting the cache.
+        '''
+        sequence: List[SequenceEntry] = []
+        while event is not None:
+            (entries, event, _) = self._links[event]
+            sequence.extend(dict(entry) for entry in entries)
+        return sequence
+
+    def root_timestamp(self, event: Any) -> Optional[int]:
+        '''
+        Get the timestamp of the root of the chain an event belongs to
+        '''
+        link = self._links.get(event)
+        if link is None:
+            return None
+        return link[2]
+
+    def latency_to_root(self, event: Any) -> Optional[int]:
+        '''
+        Get the cumulative latency from the root of the chain to an event
+        '''
+        link = self._links.get(event)
+        if link is None or not link[0] or link[2] is None:
+            return None
+        return link[0][0]['timestamp'] - link[2]
+
+    def clear(self) -> None:
+        '''
+        Evict all cached sequences
+        '''
+        self._links.clear()
+
+
+def _event_entries(event: Any) -> Optional[List[SequenceEntry]]:
+    '''
+    Expand a single causal event into its sequence entries, latest first
+    '''
+    if isinstance(event, CallbackEvent):
+        if isinstance(event.source, Timer):
+            topic = 'timer'
+        else:
+            topic = event.source.name
+        return [
+            {
+                'node': event.source.node.name,
+                'event': 'ros2:callback_end',
+                'topic': topic,
+                'timestamp': event.end()
+            },
+            {
+                'node': event.source.node.name,
+                'event': 'ros2:callback_start',
+                'topic': topic,
+                'timestamp': event.start()
+            },
+        ]
+    elif isinstance(event, (SubscriptionEventBase, PublishEventBase)):
+        return [
+            {
+                'node': event.source.node.name,
+                'event': stamp_key,
+                'topic': event.source.name,
+                'timestamp': stamp_value,
+            }
+            for stamp_key, stamp_value in event._stamps.items()
+        ]
+    return None
+
+
 class EventSequence():
-    def __init__(self, end_event, start_event=None):
+    def __init__(self, end_event, start_event=None,
+                 cache: Optional[EventSequenceCache] = None):
         self.start_event = start_event
         self.end_event = end_event
         self.sequence: List[Any] = []
 
-        self._build_sequence(self.end_event, self.start_event)
+        self._build_sequence(self.end_event, self.start_event, cache)
 
     def latency(self):
         return self.sequence[0]['timestamp'] - self.sequence[-1]['timestamp']
 
-    def _build_sequence(self, end_event, start_event=None):
+    def _build_sequence(self, end_event, start_event=None, cache=None):
+        # Cached sequences always run to the root, so they only apply to
+        # unbounded sequences.
+        if start_event is not None:
+            cache = None
+
         event = end_event
+        visited = []
+        cached_parent = None
         self.sequence = []
 
         while event and event != start_event:
-            if isinstance(event, CallbackEvent):
-                if isinstance(event.source, Timer):
-                    self.sequence.append({
-                        'node': event.source.node.name,
-                        'event': 'ros2:callback_end',
-                        'topic': 'timer',
-                        'timestamp': event.end()
-                    })
-                    self.sequence.append({
-                        'node': event.source.node.name,
-                        'event': 'ros2:callback_start',
-                        'topic': 'timer',
-                        'timestamp': event.start()
-                    })
-                else:
-                    self.sequence.append({
-                        'node': event.source.node.name,
-                        'event': 'ros2:callback_end',
-                        'topic': event.source.name,
-                        'timestamp': event.end()
-                    })
-                    self.sequence.append({
-                        'node': event.source.node.name,
-                        'event': 'ros2:callback_start',
-                        'topic': event.source.name,
-                        'timestamp': event.start()
-                    })
-                event = event.trigger
-            elif isinstance(event, SubscriptionEventBase):
-                for stamp_key, stamp_value in event._stamps.items():
-                    self.sequence.append({
-                        'node': event.source.node.name,
-                        'event': stamp_key,
-                        'topic': event.source.name,
-                        'timestamp': stamp_value,
-                    })
-                event = event.trigger
-            elif isinstance(event, PublishEventBase):
-                for stamp_key, stamp_value in event._stamps.items():
-                    self.sequence.append({
-                        'node': event.source.node.name,
-                        'event': stamp_key,
-                        'topic': event.source.name,
-                        'timestamp': stamp_value,
-                    })
-                event = event.trigger
-            else:
+            if cache is not None and event in cache:
+                cached_parent = event
                 break
+            entries = _event_entries(event)
+            if entries is None:
+                break
+            visited.append((event, entries))
+            event = event.trigger
+
+        if cache is None:
+            for _, entries in visited:
+                self.sequence.extend(entries)
+            return
+
+        parent = cached_parent
+        for visited_event, entries in reversed(visited):
+            cache.add(visited_event, entries, parent)
+            parent = visited_event
+        if parent is not None:
+            self.sequence = cache.sequence(parent)
+
+
+def event_sequences(end_events: List[Any], start_event=None,
+                    cache: Optional[EventSequenceCache] = None) -> List[EventSequence]:
+    '''
+    Build the sequences of many events, sharing the upstream paths they have in common
+
+    A new cache is used for the call unless one is given.
+    '''
+    if cache is None:
+        cache = EventSequenceCache()
+    return [EventSequence(event, start_event, cache) for event in end_events]
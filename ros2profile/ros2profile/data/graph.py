@@ -12,9 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 
 from .callback import Callback
+from .sched import ThreadSchedule
+from .tables import Tables, build_tables, tables_to_frames
+from .causal_path import CausalPath, discover_paths
 from .context import Context
 from .publisher import Publisher
 from .subscription import Subscription
@@ -35,6 +38,16 @@ class Graph:
         self._subscriptions: [Subscription] = []
         self._topics: Dict[str, Topic] = {}
         self._timers: Dict[int, Timer] = {}
+        self._paths: Optional[List[CausalPath]] = None
+        self._thread_schedules: Dict[int, ThreadSchedule] = {}
+        self._tables: Optional[Tables] = None
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        # Graphs pickled by earlier versions lack the analysis caches
+        self._paths = None
+        self._thread_schedules = {}
+        self._tables = None
+        self.__dict__.update(state)
 
     def add_context(self, context: Context) -> None:
         '''
@@ -256,3 +269,58 @@ class Graph:
             if topic.name.find(topic_name) >= 0:
                 return topic
         return None
+
+    def paths(self) -> List[CausalPath]:
+        '''
+        Get every causal path from a timer to a sink callback in the graph
+        '''
+        if self._paths is None:
+            self._paths = discover_paths(self)
+        return self._paths
+
+    def path_by_id(self, path_id: int) -> Optional[CausalPath]:
+        '''
+        Get a causal path using it's identifier
+        '''
+        for path in self.paths():
+            if path.id == path_id:
+                return path
+        return None
+
+    def add_thread_schedule(self, schedule: ThreadSchedule) -> None:
+        '''
+        Add the scheduling intervals of a thread to the graph
+        '''
+        self._thread_schedules[schedule.tid] = schedule
+
+    def thread_schedules(self) -> List[ThreadSchedule]:
+        '''
+        Get the scheduling intervals of all traced threads
+        '''
+        return list(self._thread_schedules.values())
+
+    def thread_schedule(self, tid: int) -> Optional[ThreadSchedule]:
+        '''
+        Get the scheduling intervals of a thread
+        '''
+        if tid in self._thread_schedules:
+            return self._thread_schedules[tid]
+        return None
+
+    def tables(self) -> Tables:
+        '''
+        Get the graph and its events as columns, built once and then cached
+        '''
+        if self._tables is None:
+            self._tables = build_tables(self)
+        return self._tables
+
+    def to_frames(self, backend: str = 'pandas') -> Dict[str, Any]:
+        '''
+        Export the graph as tidy tables keyed by integer IDs.
+
+        Returns nodes, callbacks, publishers, subscriptions, timers,
+        callback_events, publish_events, subscription_events and trigger_edges
+        as pandas DataFrames, or as Arrow tables with backend='arrow'.
+        '''
+        return tables_to_frames(self.tables(), backend)
@@ -0,0 +1,206 @@
+# Copyright 2023 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+
+class LatencyHistogram:
+    """
+    Mergeable log-linear histogram of nanosecond values.
+
+    Values are bucketed in the HDR histogram layout: exact below the sub-bucket
+    count, then power-of-two buckets split into linear sub-buckets so that every
+    recorded value keeps the requested number of significant figures.
+    Histograms sharing the same layout can be merged across runs and partitions
+    without keeping the raw values around.
+    """
+
+    def __init__(
+        self, highest_trackable_value: int = 3600 * 10**9, significant_figures: int = 2
+    ) -> None:
+        if significant_figures < 1 or significant_figures > 5:
+            raise ValueError('significant_figures must be between 1 and 5')
+
+        self._highest: int = int(highest_trackable_value)
+        self._significant_figures: int = significant_figures
+
+        self._sub_bucket_bits: int = int(np.ceil(np.log2(2 * 10**significant_figures)))
+        self._sub_bucket_half: int = 1 << (self._sub_bucket_bits - 1)
+        bucket_count = max(0, self._highest.bit_length() - self._sub_bucket_bits) + 2
+
+        self._counts: np.ndarray = np.zeros(bucket_count * self._sub_bucket_half, dtype=np.int64)
+        self._cumulative: Optional[np.ndarray] = None
+
+        self._total: int = 0
+        self._sum: int = 0
+        self._sum_squares: float = 0.0
+        self._min: int = 0
+        self._max: int = 0
+
+    @classmethod
+    def from_values(cls, values: Union[np.ndarray, Iterable[int]], **kwargs) -> 'LatencyHistogram':
+        """
+        Create a histogram holding the given values
+        """
+        histogram = cls(**kwargs)
+        histogram.record_values(values)
+        return histogram
+
+    def _indices(self, values: np.ndarray) -> np.ndarray:
+        # Values stay below 2**53, so the float exponent is the exact bit length
+        bit_length = np.frexp(values.astype(np.float64))[1]
+        bucket = np.maximum(bit_length - self._sub_bucket_bits, 0)
+        return bucket * self._sub_bucket_half + (values >> bucket)
+
+    def _highest_equivalent(self, indices: np.ndarray) -> np.ndarray:
+        bucket = np.maximum(indices // self._sub_bucket_half - 1, 0)
+        sub_bucket = indices - bucket * self._sub_bucket_half
+        return ((sub_bucket + 1) << bucket) - 1
+
+    def record(self, value: int, count: int = 1) -> None:
+        """
+        Record a single value
+        """
+        self.record_values(np.full(count, value, dtype=np.int64))
+
+    def record_values(self, values: Union[np.ndarray, Iterable[int]]) -> None:
+        """
+        Record an array of values
+        """
+        values = np.asarray(
+            values if isinstance(values, np.ndarray) else list(values), dtype=np.int64
+        )
+        if values.size == 0:
+            return
+        values = np.clip(values, 0, self._highest)
+
+        self._counts += np.bincount(self._indices(values), minlength=self._counts.size)
+        self._cumulative = None
+
+        if self._total == 0:
+            self._min = int(values.min())
+            self._max = int(values.max())
+        else:
+            self._min = min(self._min, int(values.min()))
+            self._max = max(self._max, int(values.max()))
+        self._total += int(values.size)
+        self._sum += int(values.sum())
+        self._sum_squares += float(np.square(values, dtype=np.float64).sum())
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        """
+        Add the counts of another histogram with the same layout into this one
+        """
+        if self._counts.size != other._counts.size or \
+                self._sub_bucket_bits != other._sub_bucket_bits:
+            raise ValueError('Cannot merge histograms with different layouts')
+        if other._total == 0:
+            return self
+
+        self._counts += other._counts
+        self._cumulative = None
+
+        if self._total == 0:
+            self._min = other._min
+            self._max = other._max
+        else:
+            self._min = min(self._min, other._min)
+            self._max = max(self._max, other._max)
+        self._total += other._total
+        self._sum += other._sum
+        self._sum_squares += other._sum_squares
+        return self
+
+    def __add__(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        merged = LatencyHistogram(self._highest, self._significant_figures)
+        return merged.merge(self).merge(other)
+
+    @property
+    def count(self) -> int:
+        """
+        Number of recorded values
+        """
+        return self._total
+
+    @property
+    def min(self) -> int:
+        """
+        Smallest recorded value
+        """
+        return self._min
+
+    @property
+    def max(self) -> int:
+        """
+        Largest recorded value
+        """
+        return self._max
+
+    @property
+    def mean(self) -> float:
+        """
+        Mean of the recorded values
+        """
+        if self._total == 0:
+            return float('nan')
+        return self._sum / self._total
+
+    @property
+    def std(self) -> float:
+        """
+        Standard deviation of the recorded values
+        """
+        if self._total == 0:
+            return float('nan')
+        mean = self._sum / self._total
+        return float(np.sqrt(max(self._sum_squares / self._total - mean * mean, 0.0)))
+
+    def percentiles(self, percentiles: Union[np.ndarray, Iterable[float]]) -> np.ndarray:
+        """
+        Values at the given percentiles (0-100), within the histogram precision
+        """
+        percentiles = np.asarray(list(percentiles), dtype=np.float64)
+        if self._total == 0:
+            return np.full(percentiles.shape, np.nan)
+
+        if self._cumulative is None:
+            self._cumulative = np.cumsum(self._counts)
+
+        ranks = np.ceil(np.clip(percentiles, 0, 100) / 100 * self._total)
+        ranks = np.maximum(ranks, 1)
+        indices = np.searchsorted(self._cumulative, ranks)
+        values = self._highest_equivalent(indices)
+        return np.clip(values, self._min, self._max)
+
+    def percentile(self, percentile: float) -> int:
+        """
+        Value at the given percentile (0-100), within the histogram precision
+        """
+        return int(self.percentiles([percentile])[0])
+
+    def __repr__(self) -> str:
+        if self._total == 0:
+            return '<LatencyHistogram count=0>'
+        p50, p99, p999 = self.percentiles([50, 99, 99.9])
+        content = ' '.join([
+            f'count={self._total}',
+            f'p50={p50}',
+            f'p99={p99}',
+            f'p99.9={p999}',
+            f'max={self._max}',
+        ])
+        return f'<LatencyHistogram {content}>'
@@ -0,0 +1,199 @@
+# Copyright 2023 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from .callback import CallbackEvent
+from .sched import ThreadSchedule
+from .timeline import ThreadTimeline, overlap
+
+if TYPE_CHECKING:
+    from .graph import Graph
+
+
+class InterferenceMatrix:
+    """
+    Time callbacks spent competing for the same CPU at the same time
+    """
+
+    def __init__(
+        self,
+        handles: List[int],
+        matrix: np.ndarray,
+        busy: np.ndarray,
+        vpids: Dict[int, Optional[int]],
+    ) -> None:
+        self._handles: List[int] = handles
+        self._index: Dict[int, int] = {handle: idx for (idx, handle) in enumerate(handles)}
+        self._matrix: np.ndarray = matrix
+        self._busy: np.ndarray = busy
+        self._vpids: Dict[int, Optional[int]] = vpids
+
+    @property
+    def handles(self) -> List[int]:
+        """
+        Callback handles labelling the rows and columns of the matrix
+        """
+        return self._handles
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """
+        Symmetric callback x callback overlap time
+        """
+        return self._matrix
+
+    def busy_time(self, handle: int) -> int:
+        """
+        Total time a callback spent running
+        """
+        return int(self._busy[self._index[handle]])
+
+    def overlap(self, first: int, second: int) -> int:
+        """
+        Time two callbacks spent competing for the same CPU at the same time
+        """
+        if first not in self._index or second not in self._index:
+            return 0
+        return int(self._matrix[self._index[first], self._index[second]])
+
+    def hot_pairs(
+        self, min_fraction: float = 0.01, cross_process: bool = True
+    ) -> List[Tuple[int, int, int, float]]:
+        """
+        Pairs of co-scheduled callbacks, most overlapping first.
+
+        :param min_fraction: minimum overlap, relative to the busy time of the
+            less busy callback of the pair
+        :param cross_process: only report callbacks of different processes
+        :return: (first handle, second handle, overlap, fraction) tuples
+        """
+        pairs = []
+        rows, cols = np.nonzero(np.triu(self._matrix, k=1))
+        for row, col in zip(rows, cols):
+            first, second = self._handles[row], self._handles[col]
+            if cross_process and self._vpids.get(first) == self._vpids.get(second):
+                continue
+            overlap = int(self._matrix[row, col])
+            fraction = overlap / max(min(self._busy[row], self._busy[col]), 1)
+            if fraction >= min_fraction:
+                pairs.append((first, second, overlap, float(fraction)))
+        pairs.sort(key=lambda pair: pair[2], reverse=True)
+        return pairs
+
+
+def _union(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Merge intervals into sorted, non-overlapping ones
+    """
+    order = np.argsort(starts, kind='stable')
+    starts = starts[order]
+    ends = np.maximum.accumulate(ends[order])
+    first = np.ones(len(starts), dtype=bool)
+    first[1:] = starts[1:] > ends[:-1]
+    last = np.append(first[1:], True)
+    return starts[first], ends[last]
+
+
+def _cpu_pieces(
+    events: List[CallbackEvent], schedule: Optional[ThreadSchedule]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Split the callback events of a thread at every switch-in of the thread.
+
+    Each piece is charged to the CPU the thread was last switched in on, so a
+    callback that is preempted keeps competing for the CPU it was running on,
+    and a callback that migrates is charged to every CPU it ran on.  Without a
+    schedule, the whole event is charged to the CPU it started on.
+
+    :return: starts, ends, CPUs and event indices of the pieces
+    """
+    count = len(events)
+    starts = np.fromiter((ev.start() for ev in events), dtype=np.int64, count=count)
+    ends = np.fromiter((ev.end() for ev in events), dtype=np.int64, count=count)
+    start_cpus = np.array(
+        [-1 if ev.cpu_id is None else ev.cpu_id for ev in events], dtype=np.int64)
+    if schedule is None or len(schedule.starts) == 0:
+        return starts, ends, start_cpus, np.arange(count)
+
+    switch_ins = schedule.starts
+    lo = np.searchsorted(switch_ins, starts, side='right')
+    hi = np.maximum(np.searchsorted(switch_ins, ends, side='left'), lo)
+    pieces = hi - lo + 1
+
+    owners = np.repeat(np.arange(count), pieces)
+    offsets = np.arange(len(owners)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    # Index of the switch-in each piece starts after, -1 before the first one
+    switch = lo[owners] + offsets - 1
+    last = len(switch_ins) - 1
+
+    piece_starts = np.where(offsets == 0, starts[owners], switch_ins[np.clip(switch, 0, last)])
+    piece_ends = np.where(
+        offsets == pieces[owners] - 1, ends[owners], switch_ins[np.clip(switch + 1, 0, last)])
+    piece_cpus = np.where(
+        switch >= 0, schedule.cpus[np.clip(switch, 0, last)], start_cpus[owners])
+    return piece_starts, piece_ends, piece_cpus, owners
+
+
+def cpu_interference(graph: 'Graph') -> InterferenceMatrix:
+    """
+    Find callbacks competing for the same CPU at the same time.
+
+    Callback events are split into the CPUs their thread was scheduled on (see
+    _cpu_pieces).  The pieces of each callback are merged per CPU, and the
+    overlap of every pair of callbacks on a CPU is found with a binary search
+    of one callback's pieces into the other's.
+    """
+    handles = sorted(callback.handle for callback in graph.callbacks)
+    index = {handle: idx for (idx, handle) in enumerate(handles)}
+    matrix = np.zeros((len(handles), len(handles)), dtype=np.int64)
+    busy = np.zeros(len(handles), dtype=np.int64)
+    vpids: Dict[int, Optional[int]] = {}
+
+    for callback in graph.callbacks:
+        events = callback.events()
+        vpids[callback.handle] = events[0].vpid if events else None
+        busy[index[callback.handle]] = sum(event.duration() for event in events)
+
+    timeline = ThreadTimeline(graph)
+    pieces: Dict[Tuple[int, int], List[Tuple[np.ndarray, np.ndarray]]] = defaultdict(list)
+    for tid in timeline.tids():
+        events = timeline.events(tid)
+        (starts, ends, cpus, owners) = _cpu_pieces(events, graph.thread_schedule(tid))
+        handle_idx = np.array([index[ev.callback_handle] for ev in events], dtype=np.int64)
+        keys = np.stack((cpus, handle_idx[owners]), axis=1)
+        for (cpu, owner) in np.unique(keys, axis=0):
+            if cpu < 0:
+                continue
+            mask = (cpus == cpu) & (handle_idx[owners] == owner)
+            pieces[(int(cpu), int(owner))].append((starts[mask], ends[mask]))
+
+    intervals_by_cpu: Dict[int, List[Tuple[int, np.ndarray, np.ndarray]]] = defaultdict(list)
+    for (cpu, owner), parts in pieces.items():
+        (starts, ends) = _union(np.concatenate([part[0] for part in parts]),
+                                np.concatenate([part[1] for part in parts]))
+        intervals_by_cpu[cpu].append((owner, starts, ends))
+
+    for intervals in intervals_by_cpu.values():
+        for (i, (first, first_starts, first_ends)) in enumerate(intervals):
+            for (second, second_starts, second_ends) in intervals[i + 1:]:
+                shared = int(overlap(second_starts, second_ends, first_starts, first_ends).sum())
+                matrix[first, second] += shared
+                matrix[second, first] += shared
+
+    return InterferenceMatrix(handles, matrix, busy, vpids)
@@ -0,0 +1,260 @@
+# Copyright 2023 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from . import constants
+from .timeline import ThreadTimeline
+
+if TYPE_CHECKING:
+    from .graph import Graph
+
+RawEvents = List[Dict[str, Any]]
+
+# Operation codes, in the order they happen for a single lock
+_REQUEST = 0
+_ACQUIRE = 1
+_RELEASE = 2
+
+
+def _lock_ops(event_data: Dict[str, RawEvents]) -> Dict[str, np.ndarray]:
+    vpids: List[int] = []
+    vtids: List[int] = []
+    stamps: List[int] = []
+    mutexes: List[int] = []
+    ops: List[int] = []
+
+    def _add(event, op):
+        vpids.append(event.get("vpid", 0))
+        vtids.append(event.get("vtid", 0))
+        stamps.append(event["_timestamp"])
+        mutexes.append(event["mutex"])
+        ops.append(op)
+
+    for event in event_data.get(constants.PTHREAD_MUTEX_LOCK_REQ, []):
+        _add(event, _REQUEST)
+    for event in event_data.get(constants.PTHREAD_MUTEX_LOCK_ACQ, []):
+        if event.get("status", 0) == 0:
+            _add(event, _ACQUIRE)
+    for event in event_data.get(constants.PTHREAD_MUTEX_TRYLOCK, []):
+        # A successful trylock acquires without waiting
+        if event.get("status", 0) == 0:
+            _add(event, _REQUEST)
+            _add(event, _ACQUIRE)
+    for event in event_data.get(constants.PTHREAD_MUTEX_UNLOCK, []):
+        _add(event, _RELEASE)
+
+    return {
+        "vpid": np.array(vpids, dtype=np.int64),
+        "vtid": np.array(vtids, dtype=np.int64),
+        "timestamp": np.array(stamps, dtype=np.int64),
+        "mutex": np.array(mutexes, dtype=np.uint64),
+        "op": np.array(ops, dtype=np.int64),
+    }
+
+
+def _pair(ops: Dict[str, np.ndarray], first: int, second: int) -> Dict[str, np.ndarray]:
+    """
+    Pair consecutive operations of the same thread on the same mutex
+    """
+    order = np.lexsort((ops["op"], ops["timestamp"], ops["mutex"], ops["vtid"], ops["vpid"]))
+    sorted_ops = {key: values[order] for (key, values) in ops.items()}
+
+    same = np.zeros(len(order), dtype=bool)
+    same[1:] = (
+        (sorted_ops["vpid"][1:] == sorted_ops["vpid"][:-1]) &
+        (sorted_ops["vtid"][1:] == sorted_ops["vtid"][:-1]) &
+        (sorted_ops["mutex"][1:] == sorted_ops["mutex"][:-1]) &
+        (sorted_ops["op"][:-1] == first) &
+        (sorted_ops["op"][1:] == second)
+    )
+    ends = np.nonzero(same)[0]
+    return {
+        "vpid": sorted_ops["vpid"][ends],
+        "vtid": sorted_ops["vtid"][ends],
+        "mutex": sorted_ops["mutex"][ends],
+        "start": sorted_ops["timestamp"][ends - 1],
+        "end": sorted_ops["timestamp"][ends],
+    }
+
+
+def _holders(holds: Dict[str, np.ndarray]) -> Dict[Tuple[int, int], Dict[str, np.ndarray]]:
+    """
+    Hold intervals of each mutex, sorted by start time
+    """
+    order = np.lexsort((holds["start"], holds["mutex"], holds["vpid"]))
+    holds = {key: values[order] for (key, values) in holds.items()}
+    keys = np.stack((holds["vpid"], holds["mutex"].astype(np.int64)), axis=1)
+    if len(keys) == 0:
+        return {}
+    boundaries = np.nonzero(np.any(keys[1:] != keys[:-1], axis=1))[0] + 1
+    bounds = np.concatenate(([0], boundaries, [len(keys)]))
+    holders = {}
+    for idx in range(len(bounds) - 1):
+        section = slice(bounds[idx], bounds[idx + 1])
+        holders[(int(holds["vpid"][bounds[idx]]), int(holds["mutex"][bounds[idx]]))] = {
+            key: values[section] for (key, values) in holds.items()
+        }
+    return holders
+
+
+def _enclosing(timeline: ThreadTimeline, vtids: np.ndarray, stamps: np.ndarray) -> List[Any]:
+    events: List[Any] = [None] * len(vtids)
+    for tid in np.unique(vtids):
+        positions = np.nonzero(vtids == tid)[0]
+        idx = timeline.enclosing_indices(int(tid), stamps[positions])
+        thread_events = timeline.events(int(tid))
+        for position, event_idx in zip(positions, idx):
+            if event_idx >= 0:
+                events[position] = thread_events[event_idx]
+    return events
+
+
+def build_lock_events(
+    graph: 'Graph', event_data: Dict[str, RawEvents], timeline: ThreadTimeline
+) -> int:
+    """
+    Attribute pthread mutex wait and hold times to the callback events enclosing them.
+
+    The time a callback waits for a mutex is further attributed to the callbacks
+    and threads holding that mutex during the wait.
+
+    :return: number of lock acquisitions attributed to a callback event
+    """
+    ops = _lock_ops(event_data)
+    if len(ops["op"]) == 0:
+        return 0
+
+    waits = _pair(ops, _REQUEST, _ACQUIRE)
+    holds = _pair(ops, _ACQUIRE, _RELEASE)
+    holders = _holders(holds)
+
+    traced_pids = set(np.unique(ops["vpid"]).tolist())
+    for tid in timeline.tids():
+        for event in timeline.events(tid):
+            if event.vpid in traced_pids:
+                event._locks = 0
+                event._lock_wait_time = 0
+                event._lock_hold_time = 0
+                event._lock_contenders = defaultdict(int)
+
+    for event, start, end in zip(
+        _enclosing(timeline, holds["vtid"], holds["start"]), holds["start"], holds["end"]
+    ):
+        if event is not None and event._lock_hold_time is not None:
+            event._lock_hold_time += int(end - start)
+
+    holder_events = {
+        key: _enclosing(timeline, hold["vtid"], hold["start"])
+        for (key, hold) in holders.items()
+    }
+
+    attributed = 0
+    waiters = _enclosing(timeline, waits["vtid"], waits["start"])
+    for idx, event in enumerate(waiters):
+        if event is None or event._locks is None:
+            continue
+        start = int(waits["start"][idx])
+        end = int(waits["end"][idx])
+        event._locks += 1
+        event._lock_wait_time += end - start
+        attributed += 1
+        if end <= start:
+            continue
+
+        key = (int(waits["vpid"][idx]), int(waits["mutex"][idx]))
+        hold = holders.get(key)
+        if hold is None:
+            continue
+        lo = int(np.searchsorted(hold["end"], start, side='right'))
+        hi = int(np.searchsorted(hold["start"], end, side='left'))
+        for hold_idx in range(lo, hi):
+            holder_tid = int(hold["vtid"][hold_idx])
+            if holder_tid == int(waits["vtid"][idx]):
+                continue
+            blocked = min(int(hold["end"][hold_idx]), end) - \
+                max(int(hold["start"][hold_idx]), start)
+            if blocked <= 0:
+                continue
+            holder = holder_events[key][hold_idx]
+            holder_handle = holder.callback_handle if holder is not None else None
+            event._lock_contenders[(holder_handle, holder_tid)] += blocked
+    return attributed
+
+
+def lock_summary(graph: 'Graph') -> Dict[int, Dict[str, int]]:
+    """
+    Lock statistics of each callback, keyed by callback handle
+    """
+    summary = {}
+    for callback in graph.callbacks:
+        events = [ev for ev in callback.events() if ev.locks is not None]
+        if not events:
+            continue
+        waits = np.array([ev.lock_wait_time for ev in events], dtype=np.int64)
+        locks = np.array([ev.locks for ev in events], dtype=np.int64)
+        holds = np.array([ev.lock_hold_time for ev in events], dtype=np.int64)
+        summary[callback.handle] = {
+            "calls": len(events),
+            "locks": int(locks.sum()),
+            "wait_time": int(waits.sum()),
+            "max_wait_time": int(waits.max()),
+            "hold_time": int(holds.sum()),
+            "contended_calls": int(sum(1 for ev in events if ev.lock_contenders)),
+        }
+    return summary
+
+
+def contention_matrix(graph: 'Graph') -> Tuple[List[Optional[int]], np.ndarray]:
+    """
+    Time each callback spent blocked on mutexes held by each other callback.
+
+    :return: callback handles labelling the rows (waiting) and columns (holding),
+        with None standing for code outside of any callback, and the matrix itself
+    """
+    blocked: Dict[Tuple[int, Optional[int]], int] = defaultdict(int)
+    for callback in graph.callbacks:
+        for event in callback.events():
+            for (holder_handle, _), value in (event.lock_contenders or {}).items():
+                blocked[(callback.handle, holder_handle)] += value
+
+    handles = sorted(
+        {key[0] for key in blocked} | {key[1] for key in blocked if key[1] is not None})
+    labels: List[Optional[int]] = list(handles)
+    if any(key[1] is None for key in blocked):
+        labels.append(None)
+    index = {label: idx for (idx, label) in enumerate(labels)}
+
+    matrix = np.zeros((len(labels), len(labels)), dtype=np.int64)
+    for (waiter, holder), value in blocked.items():
+        matrix[index[waiter], index[holder]] = value
+    return labels, matrix
+
+
+def thread_contention(graph: 'Graph') -> Dict[Tuple[int, int], int]:
+    """
+    Time each thread spent blocked on mutexes held by each other thread
+    """
+    blocked: Dict[Tuple[int, int], int] = defaultdict(int)
+    for callback in graph.callbacks:
+        for event in callback.events():
+            if event.vtid is None:
+                continue
+            for (_, holder_tid), value in (event.lock_contenders or {}).items():
+                blocked[(event.vtid, holder_tid)] += value
+    return dict(blocked)
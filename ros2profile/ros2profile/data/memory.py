@@ -0,0 +1,185 @@
+# Copyright 2023 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from typing import Any, Dict, List, TYPE_CHECKING
+
+import numpy as np
+
+from . import constants
+from .timeline import ThreadTimeline
+
+if TYPE_CHECKING:
+    from .graph import Graph
+
+RawEvents = List[Dict[str, Any]]
+
+
+def _allocation_ops(event_data: Dict[str, RawEvents]) -> Dict[str, np.ndarray]:
+    """
+    Flatten libc wrapper events into allocation and free operations.
+
+    A realloc is both a free of its input pointer and an allocation of its
+    result, calloc allocates nmemb * size bytes.
+    """
+    vpids: List[int] = []
+    vtids: List[int] = []
+    stamps: List[int] = []
+    ptrs: List[int] = []
+    sizes: List[int] = []
+    is_alloc: List[bool] = []
+
+    def _add(event, ptr, size, alloc):
+        if not ptr:
+            return
+        vpids.append(event.get("vpid", 0))
+        vtids.append(event.get("vtid", 0))
+        stamps.append(event["_timestamp"])
+        ptrs.append(ptr)
+        sizes.append(size)
+        is_alloc.append(alloc)
+
+    for event in event_data.get(constants.LIBC_MALLOC, []):
+        _add(event, event["ptr"], event["size"], True)
+    for event in event_data.get(constants.LIBC_CALLOC, []):
+        _add(event, event["ptr"], event["nmemb"] * event["size"], True)
+    for event in event_data.get(constants.LIBC_MEMALIGN, []):
+        _add(event, event["ptr"], event["size"], True)
+    for event in event_data.get(constants.LIBC_POSIX_MEMALIGN, []):
+        if event.get("result", 0) != 0:
+            continue
+        _add(event, event.get("out_ptr", event.get("memptr")), event["size"], True)
+    for event in event_data.get(constants.LIBC_REALLOC, []):
+        _add(event, event["in_ptr"], 0, False)
+        _add(event, event["ptr"], event["size"], True)
+    for event in event_data.get(constants.LIBC_FREE, []):
+        _add(event, event["ptr"], 0, False)
+
+    # Pointers are compared as unsigned 64 bit addresses
+    return {
+        "vpid": np.array(vpids, dtype=np.int64),
+        "vtid": np.array(vtids, dtype=np.int64),
+        "timestamp": np.array(stamps, dtype=np.int64),
+        "ptr": np.array(ptrs, dtype=np.uint64),
+        "size": np.array(sizes, dtype=np.int64),
+        "is_alloc": np.array(is_alloc, dtype=bool),
+    }
+
+
+def _freed_sizes(ops: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Size released by each free, taken from the preceding allocation of the same pointer.
+
+    Frees of memory allocated before the trace started release an unknown size
+    and are counted as zero.
+    """
+    count = len(ops["ptr"])
+    freed = np.zeros(count, dtype=np.int64)
+    if count == 0:
+        return freed
+
+    # Frees sort before allocations at the same time so a realloc in place pairs correctly
+    order = np.lexsort((ops["is_alloc"], ops["timestamp"], ops["ptr"], ops["vpid"]))
+    vpids = ops["vpid"][order]
+    ptrs = ops["ptr"][order]
+    sizes = ops["size"][order]
+    is_alloc = ops["is_alloc"][order]
+
+    same_block = np.zeros(count, dtype=bool)
+    same_block[1:] = (vpids[1:] == vpids[:-1]) & (ptrs[1:] == ptrs[:-1]) & is_alloc[:-1]
+    matched = same_block & ~is_alloc
+
+    previous_sizes = np.zeros(count, dtype=np.int64)
+    previous_sizes[1:] = sizes[:-1]
+    freed[order] = np.where(matched, previous_sizes, 0)
+    return freed
+
+
+def build_allocation_events(
+    graph: 'Graph', event_data: Dict[str, RawEvents], timeline: ThreadTimeline
+) -> int:
+    """
+    Attribute libc allocations and frees to the callback events enclosing them.
+
+    :return: number of operations attributed to a callback event
+    """
+    ops = _allocation_ops(event_data)
+    if len(ops["ptr"]) == 0:
+        return 0
+    freed = _freed_sizes(ops)
+
+    # Callbacks of traced processes that never allocate still get zeroed statistics
+    traced_pids = set(np.unique(ops["vpid"]).tolist())
+    for tid in timeline.tids():
+        for event in timeline.events(tid):
+            if event.vpid in traced_pids:
+                event._allocations = 0
+                event._allocated_bytes = 0
+                event._frees = 0
+                event._freed_bytes = 0
+
+    attributed = 0
+    for tid in np.unique(ops["vtid"]):
+        events = timeline.events(int(tid))
+        if not events:
+            continue
+        mask = ops["vtid"] == tid
+        idx = timeline.enclosing_indices(int(tid), ops["timestamp"][mask])
+        inside = idx >= 0
+        if not np.any(inside):
+            continue
+        idx = idx[inside]
+        alloc = ops["is_alloc"][mask][inside]
+        count = len(events)
+
+        allocations = np.bincount(idx[alloc], minlength=count)
+        allocated = np.bincount(idx[alloc], weights=ops["size"][mask][inside][alloc],
+                                minlength=count)
+        frees = np.bincount(idx[~alloc], minlength=count)
+        released = np.bincount(idx[~alloc], weights=freed[mask][inside][~alloc],
+                               minlength=count)
+
+        for event_idx, event in enumerate(events):
+            event._allocations = int(allocations[event_idx])
+            event._allocated_bytes = int(allocated[event_idx])
+            event._frees = int(frees[event_idx])
+            event._freed_bytes = int(released[event_idx])
+        attributed += len(idx)
+    return attributed
+
+
+def allocation_summary(graph: 'Graph') -> Dict[int, Dict[str, int]]:
+    """
+    Allocation statistics of each callback, keyed by callback handle
+    """
+    summary = {}
+    for callback in graph.callbacks:
+        events = [ev for ev in callback.events() if ev.allocations is not None]
+        if not events:
+            continue
+        allocations = np.array([ev.allocations for ev in events], dtype=np.int64)
+        allocated = np.array([ev.allocated_bytes for ev in events], dtype=np.int64)
+        frees = np.array([ev.frees for ev in events], dtype=np.int64)
+        growth = np.array([ev.heap_growth for ev in events], dtype=np.int64)
+        summary[callback.handle] = {
+            "calls": len(events),
+            "allocating_calls": int(np.count_nonzero(allocations)),
+            "allocations": int(allocations.sum()),
+            "max_allocations": int(allocations.max()),
+            "allocated_bytes": int(allocated.sum()),
+            "max_allocated_bytes": int(allocated.max()),
+            "frees": int(frees.sum()),
+            "heap_growth": int(growth.sum()),
+        }
+    return summary
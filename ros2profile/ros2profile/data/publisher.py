@@ -12,10 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from rclpy.expand_topic_name import expand_topic_name
 
 from .graph_entity import GraphEntity
+from .histogram import LatencyHistogram
 
 class PublishEventBase:
     def __init__(self) -> None:
@@ -48,9 +49,22 @@ class PublishEventBase:
         """
         self._stamps[key] = value
 
+    def stamp(self, key: str) -> Optional[int]:
+        """
+        Get the timestamp recorded at a tracepoint, if any
+        """
+        return self._stamps.get(key)
+
     def timestamp(self) -> int:
         return min(self._stamps.values())
 
+    def duration(self) -> int:
+        """
+        Time spent in the publish call across the traced layers
+        """
+        stamps = [v for (k, v) in self._stamps.items() if k != "timestamp"]
+        return max(stamps) - min(stamps)
+
 class MessageInBuffer:
     def __init__(self, buffer_handle: int, index: int) -> None:
         self._buffer_handle: int = buffer_handle
@@ -155,6 +169,7 @@ class Publisher(GraphEntity):
 
         self._events: List[PublishEvent] = []
         self._buffer_handles = set()
+        self._publish_histogram: Optional[LatencyHistogram] = None
 
     @property
     def name(self) -> str:
@@ -165,6 +180,13 @@ class Publisher(GraphEntity):
             self._topic_name, self.node.name, self.node.namespace
         )
 
+    @property
+    def queue_depth(self) -> int:
+        """
+        The history depth of this publisher
+        """
+        return self._queue_depth
+
     @property
     def gid(self) -> List[int]:
         """
@@ -215,5 +237,16 @@ class Publisher(GraphEntity):
         """
         return self._buffer_handles
 
+    @property
+    def publish_histogram(self) -> Optional[LatencyHistogram]:
+        """
+        Distribution of the publish call durations of this publisher
+        """
+        return self._publish_histogram
+
+    @publish_histogram.setter
+    def publish_histogram(self, value: LatencyHistogram) -> None:
+        self._publish_histogram = value
+
     def __repr__(self) -> str:
         return f"<Publisher handle={self._handle} topic_name={self.name}>"
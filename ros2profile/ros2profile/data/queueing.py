@@ -0,0 +1,147 @@
+# Copyright 2023 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from typing import Any, Optional
+
+import numpy as np
+
+
+def _availability(event: Any) -> Optional[int]:
+    """
+    Time a message became available to the subscription
+    """
+    trigger = event.trigger
+    if trigger is not None:
+        return max(v for (k, v) in trigger._stamps.items() if k != "timestamp")
+    return getattr(event, "_source_timestamp", None)
+
+
+class QueueingAnalysis:
+    """
+    Delay between messages becoming available and their callback running.
+
+    A message is available once its publication completes (or at its source
+    timestamp when the publication was not traced), is picked up by the
+    executor when it is first taken, and is dispatched when its callback starts.
+    """
+
+    def __init__(self, events: list, queue_depth: int) -> None:
+        self._queue_depth: int = queue_depth
+
+        available, taken, origins, callback_starts = [], [], [], []
+        for event in events:
+            availability = _availability(event)
+            if availability is None:
+                continue
+            available.append(availability)
+            taken.append(event.timestamp())
+            origins.append(getattr(event, "_source_timestamp", availability))
+            callback = getattr(event, "callback", None)
+            callback_starts.append(callback.start() if callback is not None else -1)
+
+        self._available = np.array(available, dtype=np.int64)
+        self._taken = np.array(taken, dtype=np.int64)
+        self._origins = np.array(origins, dtype=np.int64)
+        self._callback_starts = np.array(callback_starts, dtype=np.int64)
+        self._dispatched = self._callback_starts >= 0
+
+        # Arrivals sort before takes at the same time
+        times = np.concatenate((self._available, self._taken))
+        steps = np.concatenate((np.ones(len(available), dtype=np.int64),
+                                -np.ones(len(taken), dtype=np.int64)))
+        order = np.lexsort((-steps, times))
+        self._backlog_times: np.ndarray = times[order]
+        self._backlog: np.ndarray = np.cumsum(steps[order])
+
+    @property
+    def count(self) -> int:
+        """
+        Number of messages analyzed
+        """
+        return len(self._available)
+
+    @property
+    def message_age(self) -> np.ndarray:
+        """
+        Age of each dispatched message when its callback started
+        """
+        return self._callback_starts[self._dispatched] - self._origins[self._dispatched]
+
+    @property
+    def pickup_delay(self) -> np.ndarray:
+        """
+        Time from each message becoming available to the executor taking it
+        """
+        return self._taken - self._available
+
+    @property
+    def dispatch_delay(self) -> np.ndarray:
+        """
+        Time from each message being taken to its callback starting
+        """
+        return self._callback_starts[self._dispatched] - self._taken[self._dispatched]
+
+    @property
+    def backlog_times(self) -> np.ndarray:
+        """
+        Times at which the backlog changed
+        """
+        return self._backlog_times
+
+    @property
+    def backlog(self) -> np.ndarray:
+        """
+        Number of available messages not yet taken, after each backlog change
+        """
+        return self._backlog
+
+    def max_backlog(self) -> int:
+        """
+        Largest number of messages waiting to be taken at once
+        """
+        return int(self._backlog.max()) if len(self._backlog) else 0
+
+    def time_at_queue_depth(self) -> int:
+        """
+        Total time the backlog was at or above the subscription queue depth
+        """
+        if len(self._backlog) < 2 or self._queue_depth <= 0:
+            return 0
+        full = self._backlog[:-1] >= self._queue_depth
+        return int(np.diff(self._backlog_times)[full].sum())
+
+    def summary(self) -> dict:
+        """
+        Aggregate queueing statistics
+        """
+        def _percentiles(values):
+            if len(values) == 0:
+                return [float('nan')] * 3
+            return [float(v) for v in np.percentile(values, [50, 99, 100])]
+
+        age = _percentiles(self.message_age)
+        pickup = _percentiles(self.pickup_delay)
+        return {
+            'messages': self.count,
+            'message_age_p50': age[0],
+            'message_age_p99': age[1],
+            'message_age_max': age[2],
+            'pickup_delay_p50': pickup[0],
+            'pickup_delay_p99': pickup[1],
+            'pickup_delay_max': pickup[2],
+            'max_backlog': self.max_backlog(),
+            'queue_depth': self._queue_depth,
+            'time_at_queue_depth': self.time_at_queue_depth(),
+        }
@@ -0,0 +1,211 @@
+# Copyright 2023 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .timeline import overlap
+
+# Value of prev_state when the task was still runnable as it was switched out
+TASK_RUNNING = 0
+# Bit set in prev_state by lttng-modules when a runnable task was preempted
+TASK_REPORT_MAX = 0x100
+
+
+class ThreadSchedule:
+    """
+    On-CPU intervals of a single thread, derived from sched_switch events
+    """
+
+    def __init__(
+        self,
+        tid: int,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        cpus: np.ndarray,
+        preempted: np.ndarray,
+        wakeups: Optional[np.ndarray] = None,
+    ) -> None:
+        self._tid: int = tid
+        self._starts: np.ndarray = starts
+        self._ends: np.ndarray = ends
+        self._cpus: np.ndarray = cpus
+        self._preempted: np.ndarray = preempted
+        self._preempted_ends: np.ndarray = ends[preempted]
+        self._wakeups: np.ndarray = wakeups if wakeups is not None \
+            else np.array([], dtype=np.int64)
+
+    @property
+    def tid(self) -> int:
+        """
+        The thread identifier
+        """
+        return self._tid
+
+    @property
+    def starts(self) -> np.ndarray:
+        """
+        Times the thread was switched in
+        """
+        return self._starts
+
+    @property
+    def ends(self) -> np.ndarray:
+        """
+        Times the thread was switched out
+        """
+        return self._ends
+
+    @property
+    def cpus(self) -> np.ndarray:
+        """
+        CPU of each on-CPU interval
+        """
+        return self._cpus
+
+    @property
+    def preempted(self) -> np.ndarray:
+        """
+        Whether each on-CPU interval ended with the thread still runnable
+        """
+        return self._preempted
+
+    @property
+    def wakeups(self) -> np.ndarray:
+        """
+        Times the thread was woken up
+        """
+        return self._wakeups
+
+    def on_cpu_time(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """
+        Time the thread spent on a CPU within each of the given intervals
+        """
+        return overlap(self._starts, self._ends, starts, ends)
+
+    def preemptions(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """
+        Number of times the thread was preempted within each of the given intervals
+        """
+        before_end = np.searchsorted(self._preempted_ends, ends, side='left')
+        before_start = np.searchsorted(self._preempted_ends, starts, side='right')
+        return np.maximum(before_end - before_start, 0)
+
+    def runqueue_delay(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """
+        Time from the last wakeup within each interval to the thread being switched in
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        if len(self._wakeups) == 0 or len(self._starts) == 0:
+            return np.zeros(starts.shape, dtype=np.int64)
+
+        idx = np.searchsorted(self._wakeups, ends, side='right') - 1
+        wakeups = self._wakeups[np.maximum(idx, 0)]
+        valid = (idx >= 0) & (wakeups >= starts)
+
+        switch_idx = np.searchsorted(self._starts, wakeups, side='left')
+        switch_in = np.where(
+            switch_idx < len(self._starts),
+            self._starts[np.minimum(switch_idx, len(self._starts) - 1)],
+            ends,
+        )
+        delay = np.minimum(switch_in, ends) - wakeups
+        return np.where(valid, np.maximum(delay, 0), 0)
+
+    def __repr__(self) -> str:
+        return f"<ThreadSchedule tid={self._tid} intervals={len(self._starts)}>"
+
+
+def _is_preempted(prev_states: np.ndarray) -> np.ndarray:
+    """
+    Decode which switches took the CPU away from a still runnable task.
+
+    Older kernels report such a task as TASK_RUNNING, while current
+    lttng-modules set the TASK_REPORT_MAX bit on top of its state.
+    """
+    return (prev_states == TASK_RUNNING) | ((prev_states & TASK_REPORT_MAX) != 0)
+
+
+def build_thread_schedules(
+    sched_switch_events: List[Dict[str, Any]],
+    sched_wakeup_events: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[int, ThreadSchedule]:
+    """
+    Build the on-CPU intervals of every thread from sched_switch events.
+
+    On each CPU, the thread switched in by one event runs until the next event
+    on the same CPU switches it out.
+    """
+    wakeups_by_tid: Dict[int, List[int]] = defaultdict(list)
+    for event in sched_wakeup_events or []:
+        wakeups_by_tid[event["tid"]].append(event["_timestamp"])
+
+    events_by_cpu: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for event in sched_switch_events:
+        events_by_cpu[event["cpu_id"]].append(event)
+
+    tids, starts, ends, cpus, preempted = [], [], [], [], []
+    for cpu, events in events_by_cpu.items():
+        count = len(events)
+        if count < 2:
+            continue
+        times = np.fromiter((ev["_timestamp"] for ev in events), dtype=np.int64, count=count)
+        next_tids = np.fromiter((ev["next_tid"] for ev in events), dtype=np.int64, count=count)
+        prev_states = np.fromiter((ev["prev_state"] for ev in events), dtype=np.int64, count=count)
+        order = np.argsort(times, kind='stable')
+        times, next_tids, prev_states = times[order], next_tids[order], prev_states[order]
+
+        tids.append(next_tids[:-1])
+        starts.append(times[:-1])
+        ends.append(times[1:])
+        cpus.append(np.full(count - 1, cpu, dtype=np.int64))
+        preempted.append(_is_preempted(prev_states[1:]))
+
+    if not tids:
+        return {}
+
+    all_tids = np.concatenate(tids)
+    all_starts = np.concatenate(starts)
+    all_ends = np.concatenate(ends)
+    all_cpus = np.concatenate(cpus)
+    all_preempted = np.concatenate(preempted)
+
+    # Thread 0 is the idle task of each CPU
+    running = all_tids != 0
+    order = np.lexsort((all_starts[running], all_tids[running]))
+    all_tids = all_tids[running][order]
+    all_starts = all_starts[running][order]
+    all_ends = all_ends[running][order]
+    all_cpus = all_cpus[running][order]
+    all_preempted = all_preempted[running][order]
+
+    unique_tids, first = np.unique(all_tids, return_index=True)
+    bounds = np.append(first, len(all_tids))
+
+    schedules = {}
+    for idx, tid in enumerate(unique_tids):
+        section = slice(bounds[idx], bounds[idx + 1])
+        schedules[int(tid)] = ThreadSchedule(
+            int(tid),
+            all_starts[section],
+            all_ends[section],
+            all_cpus[section],
+            all_preempted[section],
+            np.sort(np.array(wakeups_by_tid.get(int(tid), []), dtype=np.int64)),
+        )
+    return schedules
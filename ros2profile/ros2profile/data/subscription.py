@@ -12,12 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from rclpy.expand_topic_name import expand_topic_name
 
 from .callback import Callback
 from .graph_entity import GraphEntity
+from .histogram import LatencyHistogram
+from .queueing import QueueingAnalysis
 
 class SubscriptionEventBase:
     def __init__(self) -> None:
@@ -48,9 +50,26 @@ class SubscriptionEventBase:
         """
         self._stamps[key] = value
 
+    def stamp(self, key: str) -> Optional[int]:
+        """
+        Get the timestamp recorded at a tracepoint, if any
+        """
+        return self._stamps.get(key)
+
     def timestamp(self) -> int:
         return min(self._stamps.values())
 
+    def delivery_latency(self) -> Optional[int]:
+        """
+        Time from the publication of the message to it being taken
+        """
+        if self._trigger is not None:
+            return self.timestamp() - self._trigger.timestamp()
+        source_timestamp = getattr(self, "_source_timestamp", None)
+        if source_timestamp is not None:
+            return self.timestamp() - source_timestamp
+        return None
+
 
 class IpSubscriptionEvent(SubscriptionEventBase):
     def __init__(self, buffer_handle: int, index: int) -> None:
@@ -149,6 +168,9 @@ class Subscription(GraphEntity):
         self._ipb_handle: int = None
         self._buffer_handle: int = None
         self._sibbling: Suscription = None
+        self._delivery_histogram: Optional[LatencyHistogram] = None
+        self._queueing: Optional[QueueingAnalysis] = None
+        self._queueing_events: int = 0
 
     @property
     def name(self) -> str:
@@ -184,6 +206,13 @@ class Subscription(GraphEntity):
     def dds_reader_handle(self, value: int) -> None:
         self._dds_reader = value
 
+    @property
+    def queue_depth(self) -> int:
+        """
+        The history depth of this subscription.
+        """
+        return self._queue_depth
+
     @property
     def dds_topic_name(self) -> str:
         """
@@ -257,6 +286,26 @@ class Subscription(GraphEntity):
     def buffer_handle(self, value: int) -> None:
         self._buffer_handle = value
 
+    @property
+    def delivery_histogram(self) -> Optional[LatencyHistogram]:
+        """
+        Distribution of the delivery latencies of this subscription's messages.
+        """
+        return self._delivery_histogram
+
+    @delivery_histogram.setter
+    def delivery_histogram(self, value: LatencyHistogram) -> None:
+        self._delivery_histogram = value
+
+    def queueing(self) -> QueueingAnalysis:
+        """
+        Queueing delay of this subscription's messages, cached until new events appear.
+        """
+        if self._queueing is None or self._queueing_events != len(self._events):
+            self._queueing = QueueingAnalysis(self._events, self._queue_depth)
+            self._queueing_events = len(self._events)
+        return self._queueing
+
     def __repr__(self) -> str:
         return f"<Subscription handle={self._handle} topic_name={self.name}>"
 
@@ -0,0 +1,240 @@
+# Copyright 2023 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+import numpy as np
+
+from . import constants
+from .callback import CallbackEvent
+from .publisher import IPPublishEvent, PublishEventBase
+from .subscription import IpSubscriptionEvent, SubscriptionEventBase
+from .timer import Timer
+
+if TYPE_CHECKING:
+    from .graph import Graph
+
+Table = Dict[str, np.ndarray]
+Tables = Dict[str, Table]
+
+# Integer columns use this value for missing data
+MISSING = -1
+
+CALLBACK_EVENT = 'callback'
+PUBLISH_EVENT = 'publish'
+SUBSCRIPTION_EVENT = 'subscription'
+
+
+def _int_column(values: List[Optional[int]]) -> np.ndarray:
+    return np.array([MISSING if value is None else value for value in values], dtype=np.int64)
+
+
+def _str_column(values: List[str]) -> np.ndarray:
+    return np.array(values, dtype=object)
+
+
+def _name(entity: Any) -> str:
+    try:
+        return entity.name
+    except AttributeError:
+        return ''
+
+
+def build_tables(graph: 'Graph') -> Tables:
+    """
+    Materialize the graph and its events as columns, one table per entity kind.
+
+    Events get an integer ID, unique across all event tables, which the
+    trigger_edges table uses to link each event to its trigger.
+    """
+    tables: Tables = {}
+
+    nodes = graph.nodes
+    tables['nodes'] = {
+        'handle': _int_column([node.handle for node in nodes]),
+        'name': _str_column([node.name for node in nodes]),
+        'namespace': _str_column([node.namespace for node in nodes]),
+    }
+
+    callbacks = graph.callbacks
+    sources = [callback.source for callback in callbacks]
+    tables['callbacks'] = {
+        'handle': _int_column([callback.handle for callback in callbacks]),
+        'symbol': _str_column([callback.symbol for callback in callbacks]),
+        'source_type': _str_column([
+            'timer' if isinstance(source, Timer) else
+            'subscription' if source is not None else ''
+            for source in sources]),
+        'node_handle': _int_column([
+            getattr(source, 'node_handle', None) for source in sources]),
+        'topic_name': _str_column([
+            '' if isinstance(source, Timer) or source is None else _name(source)
+            for source in sources]),
+    }
+
+    publishers = graph.publishers
+    tables['publishers'] = {
+        'handle': _int_column([publisher.handle for publisher in publishers]),
+        'node_handle': _int_column([publisher.node_handle for publisher in publishers]),
+        'topic_name': _str_column([_name(publisher) for publisher in publishers]),
+        'queue_depth': _int_column([publisher.queue_depth for publisher in publishers]),
+    }
+
+    subscriptions = graph.subscriptions
+    tables['subscriptions'] = {
+        'handle': _int_column([subscription.handle for subscription in subscriptions]),
+        'node_handle': _int_column([subscription.node_handle for subscription in subscriptions]),
+        'topic_name': _str_column([_name(subscription) for subscription in subscriptions]),
+        'queue_depth': _int_column([subscription.queue_depth for subscription in subscriptions]),
+        'callback_handle': _int_column([
+            subscription.callback.handle if subscription.callback else None
+            for subscription in subscriptions]),
+    }
+
+    timers = graph.timers()
+    tables['timers'] = {
+        'handle': _int_column([timer.handle for timer in timers]),
+        'node_handle': _int_column([timer.node_handle for timer in timers]),
+        'period': _int_column([timer.period for timer in timers]),
+        'callback_handle': _int_column([timer.callback_handle for timer in timers]),
+    }
+
+    ids: Dict[int, int] = {}
+    kinds: Dict[int, str] = {}
+
+    callback_events: List[CallbackEvent] = [
+        event for callback in callbacks for event in callback.events()]
+    for event in callback_events:
+        kinds[id(event)] = CALLBACK_EVENT
+        ids[id(event)] = len(ids)
+    tables['callback_events'] = {
+        'id': np.arange(len(callback_events), dtype=np.int64),
+        'callback_handle': _int_column([ev.callback_handle for ev in callback_events]),
+        'start': _int_column([ev.start() for ev in callback_events]),
+        'end': _int_column([ev.end() for ev in callback_events]),
+        'duration': _int_column([ev.duration() for ev in callback_events]),
+        'vtid': _int_column([ev.vtid for ev in callback_events]),
+        'vpid': _int_column([ev.vpid for ev in callback_events]),
+        'cpu_id': _int_column([ev.cpu_id for ev in callback_events]),
+        'on_cpu_time': _int_column([ev.on_cpu_time for ev in callback_events]),
+        'preemptions': _int_column([ev.preemptions for ev in callback_events]),
+        'allocated_bytes': _int_column([ev.allocated_bytes for ev in callback_events]),
+        'lock_wait_time': _int_column([ev.lock_wait_time for ev in callback_events]),
+    }
+
+    publish_events: List[PublishEventBase] = [
+        event for publisher in publishers for event in publisher.events]
+    first_id = len(ids)
+    for publish_event in publish_events:
+        kinds[id(publish_event)] = PUBLISH_EVENT
+        ids[id(publish_event)] = len(ids)
+    tables['publish_events'] = {
+        'id': np.arange(first_id, len(ids), dtype=np.int64),
+        'publisher_handle': _int_column([ev.source.handle for ev in publish_events]),
+        'timestamp': _int_column([ev.timestamp() for ev in publish_events]),
+        'duration': _int_column([ev.duration() for ev in publish_events]),
+        'source_timestamp': _int_column([ev.stamp('timestamp') for ev in publish_events]),
+        'intra_process': np.array(
+            [isinstance(ev, IPPublishEvent) for ev in publish_events], dtype=bool),
+    }
+    for stamp in (constants.RCLCPP_PUBLISH, constants.RCL_PUBLISH, constants.RMW_PUBLISH,
+                  constants.RCLCPP_INTRA_PUBLISH):
+        tables['publish_events'][stamp.split(':')[-1]] = _int_column(
+            [ev.stamp(stamp) for ev in publish_events])
+
+    subscription_events: List[SubscriptionEventBase] = []
+    seen = set()
+    for subscription in subscriptions:
+        for subscription_event in subscription.events:
+            # Sibling subscriptions created for the same handle share their events
+            if id(subscription_event) in seen:
+                continue
+            seen.add(id(subscription_event))
+            subscription_events.append(subscription_event)
+    first_id = len(ids)
+    for subscription_event in subscription_events:
+        kinds[id(subscription_event)] = SUBSCRIPTION_EVENT
+        ids[id(subscription_event)] = len(ids)
+    tables['subscription_events'] = {
+        'id': np.arange(first_id, len(ids), dtype=np.int64),
+        'subscription_handle': _int_column([ev.source.handle for ev in subscription_events]),
+        'timestamp': _int_column([ev.timestamp() for ev in subscription_events]),
+        'source_timestamp': _int_column([
+            getattr(ev, 'source_timestamp', None) for ev in subscription_events]),
+        'intra_process': np.array(
+            [isinstance(ev, IpSubscriptionEvent) for ev in subscription_events], dtype=bool),
+    }
+    for stamp in (constants.DDS_READ, constants.RMW_TAKE, constants.RCL_TAKE,
+                  constants.RCLCPP_TAKE, constants.RCLCPP_RINGBUFFER_DEQUEUE):
+        tables['subscription_events'][stamp.split(':')[-1]] = _int_column(
+            [ev.stamp(stamp) for ev in subscription_events])
+
+    child_ids: List[int] = []
+    parent_ids: List[int] = []
+    child_kinds: List[str] = []
+    parent_kinds: List[str] = []
+    for events in (callback_events, publish_events, subscription_events):
+        for child in events:
+            trigger = child.trigger
+            if trigger is None or id(trigger) not in ids:
+                continue
+            child_ids.append(ids[id(child)])
+            parent_ids.append(ids[id(trigger)])
+            child_kinds.append(kinds[id(child)])
+            parent_kinds.append(kinds[id(trigger)])
+    tables['trigger_edges'] = {
+        'child_id': np.array(child_ids, dtype=np.int64),
+        'parent_id': np.array(parent_ids, dtype=np.int64),
+        'child_kind': _str_column(child_kinds),
+        'parent_kind': _str_column(parent_kinds),
+    }
+    return tables
+
+
+def tables_to_frames(tables: Tables, backend: str = 'pandas') -> Dict[str, Any]:
+    """
+    Wrap columnar tables into pandas DataFrames or Arrow tables.
+
+    Integer columns holding missing values become nullable columns, others are
+    wrapped without copying.
+    """
+    if backend == 'arrow':
+        import pyarrow as pa
+        frames = {}
+        for name, table in tables.items():
+            columns = {}
+            for column, values in table.items():
+                if values.dtype == np.int64 and np.any(values == MISSING):
+                    columns[column] = pa.array(values, mask=values == MISSING)
+                elif values.dtype == object:
+                    columns[column] = pa.array(values.tolist(), type=pa.string())
+                else:
+                    columns[column] = pa.array(values)
+            frames[name] = pa.table(columns)
+        return frames
+    elif backend != 'pandas':
+        raise ValueError(f'Unknown frame backend: {backend}')
+
+    import pandas as pd
+    frames = {}
+    for name, table in tables.items():
+        columns = {}
+        for column, values in table.items():
+            if values.dtype == np.int64 and np.any(values == MISSING):
+                columns[column] = pd.arrays.IntegerArray(values, values == MISSING)
+            else:
+                columns[column] = values
+        frames[name] = pd.DataFrame(columns, copy=False)
+    return frames
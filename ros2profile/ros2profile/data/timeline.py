@@ -0,0 +1,124 @@
+# Copyright 2023 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from collections import defaultdict
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+import numpy as np
+
+from .callback import CallbackEvent
+
+if TYPE_CHECKING:
+    from .graph import Graph
+
+
+def coverage(starts: np.ndarray, ends: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """
+    Total length of the intervals that lies before each of the given times.
+
+    :param starts: sorted starts of non-overlapping intervals
+    :param ends: ends of the same intervals
+    :param times: times to evaluate the coverage at
+    """
+    times = np.asarray(times, dtype=np.int64)
+    if len(starts) == 0:
+        return np.zeros(times.shape, dtype=np.int64)
+    lengths = ends - starts
+    cumulative = np.concatenate(([0], np.cumsum(lengths)))
+    idx = np.searchsorted(starts, times, side='right')
+    prev = np.maximum(idx - 1, 0)
+    partial = np.where(idx > 0, np.clip(times - starts[prev], 0, lengths[prev]), 0)
+    return cumulative[prev] + partial
+
+
+def overlap(
+    starts: np.ndarray, ends: np.ndarray, query_starts: np.ndarray, query_ends: np.ndarray
+) -> np.ndarray:
+    """
+    Time each query interval overlaps with a set of sorted, non-overlapping intervals
+    """
+    return coverage(starts, ends, query_ends) - coverage(starts, ends, query_starts)
+
+
+class ThreadTimeline:
+    """
+    Callback events of each thread, sorted by start time.
+
+    Callbacks run by an executor thread never overlap, which allows mapping any
+    timestamp on a thread to its enclosing callback event with a binary search.
+    """
+
+    def __init__(self, graph: 'Graph') -> None:
+        events_by_tid: Dict[int, List[CallbackEvent]] = defaultdict(list)
+        for callback in graph.callbacks:
+            for event in callback.events():
+                if event.vtid is not None:
+                    events_by_tid[event.vtid].append(event)
+
+        self._events: Dict[int, List[CallbackEvent]] = {}
+        self._starts: Dict[int, np.ndarray] = {}
+        self._ends: Dict[int, np.ndarray] = {}
+        for tid, events in events_by_tid.items():
+            events.sort(key=lambda ev: ev.start())
+            self._events[tid] = events
+            self._starts[tid] = np.fromiter(
+                (ev.start() for ev in events), dtype=np.int64, count=len(events))
+            self._ends[tid] = np.fromiter(
+                (ev.end() for ev in events), dtype=np.int64, count=len(events))
+
+    def tids(self) -> List[int]:
+        """
+        Get the threads that ran at least one callback
+        """
+        return list(self._events.keys())
+
+    def events(self, tid: int) -> List[CallbackEvent]:
+        """
+        Get the callback events of a thread, sorted by start time
+        """
+        return self._events.get(tid, [])
+
+    def starts(self, tid: int) -> np.ndarray:
+        """
+        Get the start times of the callback events of a thread
+        """
+        return self._starts.get(tid, np.array([], dtype=np.int64))
+
+    def ends(self, tid: int) -> np.ndarray:
+        """
+        Get the end times of the callback events of a thread
+        """
+        return self._ends.get(tid, np.array([], dtype=np.int64))
+
+    def enclosing_indices(self, tid: int, timestamps: np.ndarray) -> np.ndarray:
+        """
+        Index of the callback event of a thread enclosing each timestamp, or -1
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        starts = self.starts(tid)
+        if len(starts) == 0:
+            return np.full(timestamps.shape, -1, dtype=np.int64)
+        idx = np.searchsorted(starts, timestamps, side='right') - 1
+        inside = (idx >= 0) & (timestamps <= self.ends(tid)[np.maximum(idx, 0)])
+        return np.where(inside, idx, -1)
+
+    def enclosing(self, tid: int, timestamp: int) -> Optional[CallbackEvent]:
+        """
+        Get the callback event of a thread that was running at a timestamp
+        """
+        idx = int(self.enclosing_indices(tid, np.array([timestamp]))[0])
+        if idx < 0:
+            return None
+        return self._events[tid][idx]
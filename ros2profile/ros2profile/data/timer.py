@@ -12,22 +12,134 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from typing import Iterable, Optional
+
 from .callback import Callback
 from .graph_entity import GraphEntity
 
 import numpy as np
 
 
+class TimerAnalysis:
+    """
+    Vectorized activation statistics of a timer.
+
+    Expected fire times are t0 + k * period, where t0 is the first activation,
+    so an executor spinning late does not show up as skipped periods.  Each
+    activation is assigned to the nearest expected fire time.  A timer without
+    a period or activations gives an empty analysis.
+    """
+
+    def __init__(self, period: Optional[int], starts: np.ndarray, ends: np.ndarray) -> None:
+        if period is None or period <= 0:
+            period = 0
+            starts = np.array([], dtype=np.int64)
+            ends = np.array([], dtype=np.int64)
+        self._period: int = period
+        self._starts: np.ndarray = starts
+        self._ends: np.ndarray = ends
+
+        if len(starts) == 0:
+            self._periods = np.array([], dtype=np.int64)
+            self._lateness = np.array([], dtype=np.int64)
+            return
+
+        self._periods = np.rint((starts - starts[0]) / period).astype(np.int64)
+        self._lateness = starts - (starts[0] + self._periods * period)
+
+    @property
+    def count(self) -> int:
+        """Number of activations analyzed."""
+        return len(self._starts)
+
+    @property
+    def starts(self) -> np.ndarray:
+        """Start time of each activation."""
+        return self._starts
+
+    @property
+    def ends(self) -> np.ndarray:
+        """End time of each activation."""
+        return self._ends
+
+    @property
+    def expected(self) -> np.ndarray:
+        """Expected fire time of each activation."""
+        return self._starts - self._lateness
+
+    @property
+    def lateness(self) -> np.ndarray:
+        """Time from the expected fire time to the start of each activation, negative if early."""
+        return self._lateness
+
+    @property
+    def jitter(self) -> np.ndarray:
+        """Deviation of each interval between activations from the period."""
+        return np.diff(self._starts) - self._period
+
+    def jitter_percentiles(self, percentiles: Iterable[float] = (50, 99, 99.9)) -> np.ndarray:
+        """Percentiles of the absolute jitter."""
+        jitter = np.abs(self.jitter)
+        if len(jitter) == 0:
+            return np.full(len(list(percentiles)), np.nan)
+        return np.percentile(jitter, list(percentiles))
+
+    @property
+    def drift(self) -> np.ndarray:
+        """
+        Cumulative drift of each activation from the ideal schedule.
+
+        Skipped periods are part of the ideal schedule, so a skip does not
+        shift the drift of the following activations by a whole period.
+        """
+        if len(self._starts) == 0:
+            return np.array([], dtype=np.int64)
+        return self._starts - (self._starts[0] + self._periods * self._period)
+
+    @property
+    def skipped(self) -> np.ndarray:
+        """Number of periods without an activation before each activation."""
+        skipped = np.zeros(len(self._periods), dtype=np.int64)
+        skipped[1:] = np.maximum(np.diff(self._periods) - 1, 0)
+        return skipped
+
+    @property
+    def missed(self) -> np.ndarray:
+        """Whether each activation finished after the following expected fire time."""
+        return self._ends > self.expected + self._period
+
+    @property
+    def overruns(self) -> np.ndarray:
+        """Whether each activation ran for longer than the period."""
+        return (self._ends - self._starts) > self._period
+
+    def summary(self) -> dict:
+        """Aggregate statistics of the timer activations."""
+        p50, p99, p999 = self.jitter_percentiles((50, 99, 99.9))
+        return {
+            'activations': self.count,
+            'max_lateness': int(self._lateness.max()) if self.count else 0,
+            'jitter_p50': float(p50),
+            'jitter_p99': float(p99),
+            'jitter_p99.9': float(p999),
+            'final_drift': int(self.drift[-1]) if self.count else 0,
+            'skipped_periods': int(self.skipped.sum()),
+            'missed_periods': int(self.missed.sum()),
+            'overruns': int(self.overruns.sum()),
+        }
+
+
 class Timer(GraphEntity):
     def __init__(self, timer_handle: int, node_handle: int) -> None:
         super().__init__(handle=timer_handle, node_handle=node_handle)
 
-        self._period: int
-        self._callback_handle: int
-        self._callback: Callback
+        self._period: Optional[int] = None
+        self._callback_handle: Optional[int] = None
+        self._callback: Optional[Callback] = None
+        self._analysis: Optional[TimerAnalysis] = None
 
     @property
-    def callback(self) -> Callback:
+    def callback(self) -> Optional[Callback]:
         """Callback associated with this subscription."""
         return self._callback
 
@@ -36,7 +148,7 @@ class Timer(GraphEntity):
         self._callback = value
 
     @property
-    def callback_handle(self) -> int:
+    def callback_handle(self) -> Optional[int]:
         """Callback handle associated with this subscription."""
         return self._callback_handle
 
@@ -45,7 +157,7 @@ class Timer(GraphEntity):
         self._callback_handle = value
 
     @property
-    def period(self) -> int:
+    def period(self) -> Optional[int]:
         """Period of the timer."""
         return self._period
 
@@ -53,10 +165,23 @@ class Timer(GraphEntity):
     def period(self, value: int):
         self._period = value
 
-    def mean_period(self) -> int:
+    def mean_period(self) -> float:
         """Return the average period of the timer callback events."""
-        calls = np.array([ev.start() for ev in self.callback.events()])
-        return np.mean(np.diff(calls))
+        starts = self.analysis().starts
+        if len(starts) < 2:
+            return float('nan')
+        return float(np.mean(np.diff(starts)))
+
+    def analysis(self) -> TimerAnalysis:
+        """Return the activation statistics of the timer, cached until new events appear."""
+        events = self._callback.events() if self._callback is not None else []
+        if self._period is None:
+            events = []
+        if self._analysis is None or self._analysis.count != len(events):
+            starts = np.fromiter((ev.start() for ev in events), dtype=np.int64, count=len(events))
+            ends = np.fromiter((ev.end() for ev in events), dtype=np.int64, count=len(events))
+            self._analysis = TimerAnalysis(self._period, starts, ends)
+        return self._analysis
 
     def __repr__(self) -> str:
         return f"<Timer handle={self._handle} period={self._period}>"
@@ -0,0 +1,147 @@
+# Copyright 2023 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from typing import Dict, Optional, TYPE_CHECKING
+
+import numpy as np
+
+from .timeline import ThreadTimeline, coverage
+
+if TYPE_CHECKING:
+    from .graph import Graph
+
+
+class ThreadUtilization:
+    """
+    Busy and idle fractions of an executor thread in fixed time bins
+    """
+
+    def __init__(
+        self,
+        tid: int,
+        vpid: Optional[int],
+        bin_edges: np.ndarray,
+        busy: np.ndarray,
+        on_cpu: Optional[np.ndarray] = None,
+    ) -> None:
+        self._tid: int = tid
+        self._vpid: Optional[int] = vpid
+        self._bin_edges: np.ndarray = bin_edges
+        self._busy: np.ndarray = busy
+        self._on_cpu: Optional[np.ndarray] = on_cpu
+
+    @property
+    def tid(self) -> int:
+        """
+        The thread identifier
+        """
+        return self._tid
+
+    @property
+    def vpid(self) -> Optional[int]:
+        """
+        The process the thread belongs to
+        """
+        return self._vpid
+
+    @property
+    def bin_edges(self) -> np.ndarray:
+        """
+        Edges of the time bins, one more than the number of bins
+        """
+        return self._bin_edges
+
+    @property
+    def busy_time(self) -> np.ndarray:
+        """
+        Time spent running callbacks in each bin
+        """
+        return self._busy
+
+    @property
+    def busy(self) -> np.ndarray:
+        """
+        Fraction of each bin spent running callbacks
+        """
+        return self._busy / np.diff(self._bin_edges)
+
+    @property
+    def idle(self) -> np.ndarray:
+        """
+        Fraction of each bin spent outside of callbacks
+        """
+        return 1.0 - self.busy
+
+    @property
+    def on_cpu(self) -> Optional[np.ndarray]:
+        """
+        Fraction of each bin the thread spent on a CPU, when scheduling data is available
+        """
+        if self._on_cpu is None:
+            return None
+        return self._on_cpu / np.diff(self._bin_edges)
+
+    def mean_busy(self) -> float:
+        """
+        Fraction of the whole range spent running callbacks
+        """
+        return float(self._busy.sum() / (self._bin_edges[-1] - self._bin_edges[0]))
+
+    def __repr__(self) -> str:
+        return f"<ThreadUtilization tid={self._tid} busy={self.mean_busy():.3f}>"
+
+
+def thread_utilization(
+    graph: 'Graph',
+    bin_size: int = 100_000_000,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+) -> Dict[int, ThreadUtilization]:
+    """
+    Busy and idle fractions of every thread that ran callbacks, in fixed time bins.
+
+    :param graph: graph with callback events carrying their thread
+    :param bin_size: width of each bin, in nanoseconds
+    :param start: start of the first bin, defaults to the first callback start
+    :param end: end of the range, defaults to the last callback end
+    """
+    timeline = ThreadTimeline(graph)
+    tids = timeline.tids()
+    if not tids:
+        return {}
+
+    if start is None:
+        start = min(int(timeline.starts(tid)[0]) for tid in tids)
+    if end is None:
+        end = max(int(timeline.ends(tid).max()) for tid in tids)
+    edges = np.arange(start, end + bin_size, bin_size, dtype=np.int64)
+    if len(edges) < 2:
+        edges = np.array([start, start + bin_size], dtype=np.int64)
+
+    utilization = {}
+    for tid in tids:
+        starts = timeline.starts(tid)
+        # Guard against overlapping events from unmatched start/end pairs
+        ends = np.minimum(timeline.ends(tid), np.append(starts[1:], np.iinfo(np.int64).max))
+        busy = np.diff(coverage(starts, ends, edges))
+
+        on_cpu = None
+        schedule = graph.thread_schedule(tid)
+        if schedule is not None:
+            on_cpu = np.diff(coverage(schedule.starts, schedule.ends, edges))
+
+        utilization[tid] = ThreadUtilization(
+            tid, timeline.events(tid)[0].vpid, edges, busy, on_cpu)
+    return utilization
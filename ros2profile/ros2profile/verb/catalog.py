@@ -0,0 +1,75 @@
+# Copyright 2023 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import datetime
+import time
+
+from ros2profile.verb import VerbExtension
+from ros2profile.api.catalog import Catalog
+from ros2profile.api.process import load_event_graph
+
+
+def _format_time(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class CatalogVerb(VerbExtension):
+    def add_arguments(self, parser, cli_name):  # noqa: D102
+        parser.add_argument(
+            '--add', nargs='+', default=[], metavar='INPUT_PATH',
+            help='Process and record existing profile directories in the catalog'
+        )
+        parser.add_argument(
+            '--entity', help='Print the trend of entities matching this SQL LIKE pattern'
+        )
+        parser.add_argument(
+            '--metric', default='p99', help='Metric to print the trend of (default: p99)'
+        )
+        parser.add_argument(
+            '--kind', choices=['callback', 'path', 'timer'], help='Restrict to one entity kind'
+        )
+        parser.add_argument(
+            '--days', type=float, help='Only include runs from the last number of days'
+        )
+        parser.add_argument(
+            '--catalog', help='Catalog database (default: $ROS_HOME/profile/catalog.db)'
+        )
+
+    def main(self, *, args):
+        since = time.time() - args.days * 86400 if args.days else None
+
+        with Catalog(args.catalog) as catalog:
+            for input_path in args.add:
+                catalog.add_run(input_path, load_event_graph(input_path))
+                print(f'Added {input_path}')
+
+            if args.entity:
+                rows = catalog.trend(args.entity, args.metric, args.kind, since)
+                if not rows:
+                    print(f'No {args.metric} values for entities matching {args.entity}')
+                    return 1
+                entity = None
+                for (start_time, path, sha, kind, name, value) in rows:
+                    if name != entity:
+                        entity = name
+                        print(f'{kind} {entity}')
+                    print(f'  {_format_time(start_time)}  {(sha or "")[:8]:<8}  '
+                          f'{value:>14.1f}  {path}')
+            elif not args.add:
+                for (run_id, path, start_time, duration, sha) in catalog.runs(since):
+                    duration = f'{duration:.0f}s' if duration is not None else '-'
+                    print(f'{run_id:>5}  {_format_time(start_time)}  {duration:>7}  '
+                          f'{(sha or "")[:8]:<8}  {path}')
+        return 0
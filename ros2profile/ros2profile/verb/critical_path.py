@@ -0,0 +1,47 @@
+# Copyright 2023 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from ros2profile.verb import VerbExtension
+from ros2profile.api.critical_path import analyze_critical_paths, format_report
+from ros2profile.api.process import load_event_graph
+
+
+class CriticalPathVerb(VerbExtension):
+    def add_arguments(self, parser, cli_name):  # noqa: D102
+        parser.add_argument(
+            'input_path', help='Directory where profile output is stored'
+        )
+        parser.add_argument(
+            '--count', type=int, default=5, help='Number of slowest paths to analyze'
+        )
+        parser.add_argument(
+            '--percentile', type=float, default=99.0,
+            help='Latency percentile used to rank paths and select slow instances'
+        )
+
+    def main(self, *, args):
+        graph = load_event_graph(args.input_path)
+        reports = analyze_critical_paths(graph, args.count, args.percentile)
+        if not reports:
+            print('No causal paths with events found')
+            return 1
+
+        for report in reports:
+            rows = format_report(report)
+            width = max(len(label) for (label, _) in rows)
+            for label, value in rows:
+                print(f'{label:<{width}}  {value}')
+            print()
+        return 0
@@ -0,0 +1,73 @@
+# Copyright 2023 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from ros2profile.verb import VerbExtension
+from ros2profile.api.diff import compare_graphs, format_comparison
+from ros2profile.api.process import load_event_graph
+
+# Exit codes
+OK = 0
+REGRESSION = 1
+ERROR = 2
+
+
+class DiffVerb(VerbExtension):
+    def add_arguments(self, parser, cli_name):  # noqa: D102
+        parser.add_argument(
+            'baseline_path', help='Directory of the baseline profile run'
+        )
+        parser.add_argument(
+            'candidate_path', help='Directory of the profile run to check for regressions'
+        )
+        parser.add_argument(
+            '--alpha', type=float, default=0.01,
+            help='Significance level over all compared entities (Holm corrected)'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.05,
+            help='Minimum relative change of the median to report, e.g. 0.05 for 5%%'
+        )
+        parser.add_argument(
+            '--min-samples', type=int, default=20,
+            help='Skip entities with fewer samples in either run'
+        )
+        parser.add_argument(
+            '--resamples', type=int, default=1000, help='Number of bootstrap resamples'
+        )
+        parser.add_argument(
+            '--all', action='store_true', help='Print every comparison, not only changes'
+        )
+
+    def main(self, *, args):
+        try:
+            baseline = load_event_graph(args.baseline_path)
+            candidate = load_event_graph(args.candidate_path)
+        except Exception as e:
+            print(f'Failed to load profile runs: {e}')
+            return ERROR
+
+        comparisons = compare_graphs(
+            baseline, candidate, args.alpha, args.threshold, args.min_samples, args.resamples)
+        if not comparisons:
+            print('No entities with enough samples in both runs')
+            return ERROR
+
+        regressions = 0
+        for comparison in comparisons:
+            regressions += comparison.regression
+            if args.all or comparison.regression or comparison.improvement:
+                print(format_comparison(comparison))
+        print(f'{regressions} regressions in {len(comparisons)} comparisons')
+        return REGRESSION if regressions else OK
@@ -14,10 +14,12 @@
 
 import os
 import shutil
+import time
 import yaml
 
 from typing import Optional
 
+from ros2profile.api.catalog import collect_run_metadata, write_run_metadata
 from ros2profile.verb import VerbExtension
 
 import launch
@@ -113,6 +115,9 @@ class LaunchVerb(VerbExtension):
         os.makedirs(output_dir, exist_ok=True)
         shutil.copyfile(args.config_file, os.path.join(output_dir, 'config.yaml'))
 
+        metadata = collect_run_metadata(args.launch_file)
+        write_run_metadata(output_dir, metadata)
+
         launch_description.add_action(action=Trace(
             session_name=session_name,
             base_path=output_dir,
@@ -155,4 +160,8 @@ class LaunchVerb(VerbExtension):
 
         launch_service = launch.LaunchService()
         launch_service.include_launch_description(launch_description)
-        return launch_service.run()
+        ret = launch_service.run()
+
+        metadata['duration'] = time.time() - metadata['start_time']
+        write_run_metadata(output_dir, metadata)
+        return ret
@@ -12,16 +12,42 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import argparse
+
 from ros2profile.verb import VerbExtension
+from ros2profile.api.pipeline import PipelineError
 from ros2profile.api.process import process
 
+ERROR = 2
+
+
+def _non_negative(value):
+    jobs = int(value)
+    if jobs < 0:
+        raise argparse.ArgumentTypeError(f'must be zero or positive: {value}')
+    return jobs
+
 
 class ProcessVerb(VerbExtension):
     def add_arguments(self, parser, cli_name):  # noqa: D102
         parser.add_argument(
             'input_path', help='Directory where profile output is stored'
         )
+        parser.add_argument(
+            '--jobs', '-j', type=_non_negative, default=None,
+            help='Worker processes converting topnode recordings '
+                 '(default: one per CPU, 0 to convert serially)'
+        )
 
     def main(self, *, args):
         # Process results
-        process(args.input_path)
+        try:
+            report = process(args.input_path, args.jobs)
+        except PipelineError as e:
+            for line in e.report.format():
+                print(line)
+            for (name, error) in e.failures.items():
+                print(f'Stage {name} failed: {error}')
+            return ERROR
+        for line in report.format():
+            print(line)
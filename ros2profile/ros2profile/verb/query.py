@@ -0,0 +1,42 @@
+# Copyright 2023 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from ros2profile.verb import VerbExtension
+from ros2profile.api.query import BACKENDS, query
+
+
+class QueryVerb(VerbExtension):
+    def add_arguments(self, parser, cli_name):  # noqa: D102
+        parser.add_argument(
+            'input_path', help='Directory where profile output is stored'
+        )
+        parser.add_argument(
+            'sql', help='SQL query over the nodes, callbacks, publishers, subscriptions, '
+                        'timers, callback_events, publish_events, subscription_events '
+                        'and trigger_edges tables'
+        )
+        parser.add_argument(
+            '--backend', choices=BACKENDS, default=None,
+            help='Query engine to use (default: duckdb if installed, else sqlite)'
+        )
+
+    def main(self, *, args):
+        try:
+            result = query(args.input_path, args.sql, args.backend)
+        except Exception as e:
+            print(f'Query failed: {e}')
+            return 1
+        print(result.to_string(index=False))
+        return 0
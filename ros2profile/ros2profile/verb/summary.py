@@ -0,0 +1,36 @@
+# Copyright 2023 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from ros2profile.verb import VerbExtension
+from ros2profile.api.summary import format_summary, summarize, summary_to_json
+
+
+class SummaryVerb(VerbExtension):
+    def add_arguments(self, parser, cli_name):  # noqa: D102
+        parser.add_argument(
+            'input_path', help='Directory where profile output is stored'
+        )
+        parser.add_argument(
+            '--json', action='store_true', help='Print the summary as JSON'
+        )
+
+    def main(self, *, args):
+        summary = summarize(args.input_path)
+        if args.json:
+            print(summary_to_json(summary))
+        else:
+            for line in format_summary(summary):
+                print(line)
+        return 0
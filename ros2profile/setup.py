@@ -27,9 +27,14 @@ setup(
             'ros2profile.verb = ros2profile.verb:VerbExtension'
         ],
         'ros2profile.verb': [
+            'catalog = ros2profile.verb.catalog:CatalogVerb',
+            'critical-path = ros2profile.verb.critical_path:CriticalPathVerb',
+            'diff = ros2profile.verb.diff:DiffVerb',
             'launch = ros2profile.verb.launch:LaunchVerb',
             'process = ros2profile.verb.process:ProcessVerb',
-            'run_test = ros2profile.verb.run_test:RunTestVerb'
+            'query = ros2profile.verb.query:QueryVerb',
+            'run_test = ros2profile.verb.run_test:RunTestVerb',
+            'summary = ros2profile.verb.summary:SummaryVerb'
         ]
     },
 )